@@ -0,0 +1,478 @@
+"""Offline benchmark for the payment ops agent (no LLM gateway, no Slack).
+
+The gateway model is replaced by benchmarks/fake_llm.ScriptedChatModel, which
+replays the tool-call sequences of the docs/demo_prompts.md scenarios. These
+are the same questions as the Streamlit SUGGESTED_QUESTIONS. Slack calls go to
+an in-memory stand-in MCP server. Everything else is the real service:
+run_agent, router, ReAct graph, tools, store, checkpointer and escalation
+queue.
+
+Per dataset it measures:
+  - end-to-end run_agent latency per scenario (--iterations sequential runs)
+  - per-tool latency, from LangChain tool callbacks during those runs
+  - allocations per scenario run (tracemalloc peak / net)
+  - throughput and latency at 1 / 10 / 100 concurrent threads (--concurrency)
+
+Datasets: --data-dir for existing dataset folders, and/or --sizes for
+synthetic datasets of N transactions (benchmarks/generate_dataset.py, anchored
+at now so the 48h windows are populated). They are built once under
+--work-dir. Use PAYMENT_STORE_BACKEND=columnar for the multi-million sizes.
+
+Results are written as JSON (--out). --compare BASELINE.json prints deltas
+and exits 1 when a latency or throughput metric regressed by more than
+--threshold-pct.
+
+    python benchmarks/agent_bench.py --sizes 10000 100000
+    python benchmarks/agent_bench.py --sizes 1000000 --concurrency 1 10 --out results/1m.json
+    python benchmarks/agent_bench.py --sizes 10000 --compare benchmarks/results/baseline.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+import uuid
+from collections import defaultdict
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from langchain_core.callbacks import BaseCallbackHandler  # noqa: E402
+from langchain_core.tracers.context import register_configure_hook  # noqa: E402
+
+from fake_llm import ScriptedChatModel  # noqa: E402
+from generate_dataset import generate  # noqa: E402
+from scenarios import SCENARIOS, Scenario  # noqa: E402
+
+
+# ---------- measurement helpers ----------
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))], 3)
+
+
+def summarize(values: List[float]) -> Dict[str, Any]:
+    return {
+        "n": len(values),
+        "p50_ms": percentile(values, 0.5),
+        "p95_ms": percentile(values, 0.95),
+        "mean_ms": round(statistics.fmean(values), 3) if values else None,
+    }
+
+
+class ToolTimer(BaseCallbackHandler):
+    """Wall time of every tool call, keyed by tool name."""
+
+    run_inline = True
+
+    def __init__(self) -> None:
+        self.started: Dict[Any, tuple] = {}
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+
+    def on_tool_start(
+        self, serialized: Dict[str, Any], input_str: str, *, run_id: Any, **kwargs: Any
+    ) -> None:
+        self.started[run_id] = (
+            (serialized or {}).get("name") or kwargs.get("name") or "?",
+            time.perf_counter(),
+        )
+
+    def on_tool_end(self, output: Any, *, run_id: Any, **kwargs: Any) -> None:
+        name, t0 = self.started.pop(run_id, (None, None))
+        if name is not None:
+            self.samples[name].append((time.perf_counter() - t0) * 1000)
+
+    def on_tool_error(
+        self, error: BaseException, *, run_id: Any, **kwargs: Any
+    ) -> None:
+        self.started.pop(run_id, None)
+
+
+# every runnable started in this context picks up the timer, including run_agent's own graph runs
+_TOOL_TIMER: ContextVar[Optional[ToolTimer]] = ContextVar(
+    "bench_tool_timer", default=None
+)
+register_configure_hook(_TOOL_TIMER, inheritable=True)
+
+
+@contextlib.contextmanager
+def quiet():
+    """run_agent pretty-prints every graph event; keep it off the report."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+# ---------- datasets ----------
+
+
+def scaled_dataset(n: int, work_dir: Path, seed: int = 7) -> Path:
+    """
+    Synthetic dataset with `n` transactions from benchmarks/generate_dataset.py:
+    the bundled rows moved so the newest is an hour old, plus generated
+    merchants, transactions, chargebacks and KB snippets over the last 30
+    days, with decline spikes (one on M400) and high-risk clusters (one on
+    M500) in the last 24h. Built once per size under `work_dir`.
+    """
+    out = work_dir / f"scaled_{n}"
+    marker = out / ".complete"
+    if marker.exists():
+        return out
+    generate(out, transactions=n, merchants=max(5, min(500, n // 2000)), seed=seed)
+    marker.touch()
+    return out
+
+
+# ---------- agent wiring ----------
+
+
+def _stand_in_slack():
+    from fastmcp import Client, FastMCP
+
+    server = FastMCP("slack-stand-in")
+
+    @server.tool
+    def sendMessage(channel: str, message: str, threadTs: str | None = None) -> dict:
+        return {"ok": True, "channel": channel, "ts": f"{time.time():.6f}"}
+
+    @server.tool
+    def getConversations(types: str = "public_channel", limit: int = 50) -> list:
+        return [
+            {"id": "C001", "name": "payments-ops-demo"},
+            {"id": "C002", "name": "risk-approvals-demo"},
+        ]
+
+    return lambda: Client(server)
+
+
+class Harness:
+    def __init__(self, llm_latency_ms: float):
+        from src.agent import graph, payments_tools
+        from src.agent.router import PHRASE_PROMPT
+
+        self.graph = graph
+        self.tools = payments_tools
+        self.model = ScriptedChatModel(
+            latency_ms=llm_latency_ms, phrase_prompt=PHRASE_PROMPT
+        )
+        graph.AGENT = graph.build_agent(self.model)
+        payments_tools.SLACK_MCP_POOL.client_factory = _stand_in_slack()
+
+    def load(self, data_dir: Path) -> Dict[str, Any]:
+        os.environ["PAYMENT_DEMO_DATA_DIR"] = str(data_dir)
+        t0 = time.perf_counter()
+        with quiet():
+            status = self.tools.PAYMENTS_STORE_HOLDER.reload(force=True)
+        if status.get("status") != "reloaded":
+            raise RuntimeError(f"Could not load {data_dir}: {status}")
+        store = self.tools.PAYMENTS_STORE_HOLDER.current
+        return {
+            "data_dir": str(data_dir),
+            "transactions": store.transaction_count,
+            "backend": store.backend_name,
+            "load_s": round(time.perf_counter() - t0, 3),
+        }
+
+    async def run(self, scenario: Scenario) -> float:
+        t0 = time.perf_counter()
+        await self.graph.run_agent(f"bench-{uuid.uuid4().hex}", scenario.question)
+        return (time.perf_counter() - t0) * 1000
+
+    async def latency(
+        self, scenarios: List[Scenario], iterations: int
+    ) -> Dict[str, Any]:
+        timer = ToolTimer()
+        token = _TOOL_TIMER.set(timer)
+        out: Dict[str, Any] = {}
+        try:
+            for scenario in scenarios:
+                calls_before = self.model.calls
+                samples = [await self.run(scenario) for _ in range(iterations)]
+                out[scenario.name] = {
+                    **summarize(samples),
+                    "llm_calls": (self.model.calls - calls_before) / iterations,
+                }
+        finally:
+            _TOOL_TIMER.reset(token)
+        return {
+            "scenarios": out,
+            "tools": {name: summarize(v) for name, v in sorted(timer.samples.items())},
+        }
+
+    async def allocations(self, scenarios: List[Scenario]) -> Dict[str, Any]:
+        out = {}
+        for scenario in scenarios:
+            tracemalloc.start()
+            before, _ = tracemalloc.get_traced_memory()
+            await self.run(scenario)
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            out[scenario.name] = {
+                "peak_kib": round(peak / 1024, 1),
+                "net_kib": round((current - before) / 1024, 1),
+            }
+        return out
+
+    async def throughput(
+        self, scenarios: List[Scenario], concurrency: int, runs: int
+    ) -> Dict[str, Any]:
+        queue: asyncio.Queue = asyncio.Queue()
+        for i in range(runs):
+            queue.put_nowait(scenarios[i % len(scenarios)])
+        samples: List[float] = []
+        errors = 0
+
+        async def worker() -> None:
+            nonlocal errors
+            while not queue.empty():
+                scenario = queue.get_nowait()
+                try:
+                    samples.append(await self.run(scenario))
+                except Exception:
+                    errors += 1
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        wall = time.perf_counter() - t0
+        return {
+            **summarize(samples),
+            "runs": runs,
+            "errors": errors,
+            "wall_s": round(wall, 3),
+            "runs_per_s": round(len(samples) / wall, 2) if wall else None,
+        }
+
+
+# ---------- comparison ----------
+
+
+def _metrics(result: Dict[str, Any]) -> Dict[str, tuple]:
+    """{metric path: (value, higher_is_better)} for the comparable numbers of one result file."""
+    out: Dict[str, tuple] = {}
+    for ds in result["datasets"]:
+        label = ds["label"]
+        for name, s in ds["latency"]["scenarios"].items():
+            out[f"{label}/latency/{name}/p50_ms"] = (s["p50_ms"], False)
+        for name, s in ds["latency"]["tools"].items():
+            out[f"{label}/tool/{name}/p50_ms"] = (s["p50_ms"], False)
+        for level, s in ds["throughput"].items():
+            out[f"{label}/throughput/c{level}/runs_per_s"] = (s["runs_per_s"], True)
+            out[f"{label}/throughput/c{level}/p95_ms"] = (s["p95_ms"], False)
+    return out
+
+
+def compare(
+    current: Dict[str, Any], baseline: Dict[str, Any], threshold_pct: float
+) -> List[str]:
+    """Print metric deltas; return the names of regressed metrics."""
+    base, cur = _metrics(baseline), _metrics(current)
+    regressions = []
+    print(f"\n{'metric':<70} {'baseline':>10} {'current':>10} {'delta':>8}")
+    for key in sorted(set(base) & set(cur)):
+        (b, higher_better), (c, _) = base[key], cur[key]
+        if not b or c is None:
+            continue
+        delta = (c - b) / b * 100
+        worse = -delta if higher_better else delta
+        flag = ""
+        if worse > threshold_pct:
+            flag = "  REGRESSION"
+            regressions.append(key)
+        print(f"{key:<70} {b:>10.2f} {c:>10.2f} {delta:>+7.1f}%{flag}")
+    return regressions
+
+
+# ---------- CLI ----------
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def _datasets(args: argparse.Namespace) -> Iterable[tuple]:
+    for d in args.data_dir or []:
+        yield Path(d).name, Path(d)
+    for n in args.sizes or []:
+        print(f"preparing dataset with {n:,} transactions ...", flush=True)
+        yield f"scaled_{n}", scaled_dataset(n, Path(args.work_dir))
+    if not args.data_dir and not args.sizes:
+        yield "scaled_10000", scaled_dataset(10_000, Path(args.work_dir))
+
+
+async def bench(args: argparse.Namespace) -> Dict[str, Any]:
+    scenarios = [s for s in SCENARIOS if not args.scenarios or s.name in args.scenarios]
+    harness = Harness(args.llm_latency_ms)
+    result: Dict[str, Any] = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": {
+                k: v for k, v in vars(args).items() if k not in ("compare", "out")
+            },
+            "env": {
+                k: os.getenv(k)
+                for k in (
+                    "PAYMENT_STORE_BACKEND",
+                    "AGENT_CHECKPOINTER",
+                    "AGENT_FAST_PATH",
+                    "AGENT_RESPONSE_CACHE",
+                    "AGENT_TRACING",
+                )
+                if os.getenv(k)
+            },
+        },
+        "datasets": [],
+    }
+    for label, data_dir in _datasets(args):
+        info = harness.load(data_dir)
+        print(
+            f"\n== {label}: {info['transactions']:,} transactions ({info['backend']}), loaded in {info['load_s']}s"
+        )
+        with quiet():
+            for (
+                scenario
+            ) in scenarios:  # warm-up: imports, lazy indexes, first connections
+                await harness.run(scenario)
+            latency = await harness.latency(scenarios, args.iterations)
+            allocations = await harness.allocations(scenarios)
+            throughput = {}
+            for level in args.concurrency:
+                throughput[str(level)] = await harness.throughput(
+                    scenarios, level, max(level, args.runs_per_level)
+                )
+        for name, s in latency["scenarios"].items():
+            print(
+                f"  {name:<24} p50 {s['p50_ms']:>8.2f} ms  p95 {s['p95_ms']:>8.2f} ms  "
+                f"llm calls {s['llm_calls']:.0f}  peak {allocations[name]['peak_kib']:>8.1f} KiB"
+            )
+        for name, s in latency["tools"].items():
+            print(
+                f"  tool {name:<32} p50 {s['p50_ms']:>8.3f} ms  p95 {s['p95_ms']:>8.3f} ms  (n={s['n']})"
+            )
+        for level, s in throughput.items():
+            print(
+                f"  concurrency {level:>3}: {s['runs_per_s']:>8.2f} runs/s  p50 {s['p50_ms']:>8.2f} ms  "
+                f"p95 {s['p95_ms']:>8.2f} ms  errors {s['errors']}"
+            )
+        result["datasets"].append(
+            {
+                "label": label,
+                **info,
+                "latency": latency,
+                "allocations": allocations,
+                "throughput": throughput,
+            }
+        )
+
+    queue = harness.tools.ESCALATION_QUEUE
+    if queue is not None:
+        queue.flush(timeout_s=60)
+        result["escalations"] = queue.snapshot()
+        queue.stop()
+    return result
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--data-dir", action="append", help="existing dataset folder (repeatable)"
+    )
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        help="scaled copies of the bundled dataset, e.g. 10000 1000000",
+    )
+    parser.add_argument("--work-dir", default=str(ROOT / "benchmarks" / ".data"))
+    parser.add_argument(
+        "--scenarios", nargs="+", help="subset of scenario names (default: all)"
+    )
+    parser.add_argument(
+        "--iterations", type=int, default=20, help="sequential runs per scenario"
+    )
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument(
+        "--runs-per-level",
+        type=int,
+        default=100,
+        help="runs per concurrency level (at least the level)",
+    )
+    parser.add_argument(
+        "--llm-latency-ms",
+        type=float,
+        default=0.0,
+        help="simulated model latency per call",
+    )
+    parser.add_argument(
+        "--response-cache",
+        action="store_true",
+        help="keep the response cache on (default off)",
+    )
+    parser.add_argument(
+        "--out", help="result file (default benchmarks/results/bench-<timestamp>.json)"
+    )
+    parser.add_argument("--compare", help="baseline result file to compare against")
+    parser.add_argument("--threshold-pct", type=float, default=10.0)
+    args = parser.parse_args()
+
+    # before src.agent is imported: offline, and measure the agent rather than the answer cache
+    os.environ.setdefault("TFY_API_KEY", "offline-benchmark")
+    os.environ.setdefault("AGENT_TRACING", "off")
+    os.environ["AGENT_RESPONSE_CACHE"] = "1" if args.response_cache else "0"
+
+    result = asyncio.run(bench(args))
+    out = Path(
+        args.out
+        or ROOT
+        / "benchmarks"
+        / "results"
+        / f"bench-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(result, indent=2))
+    print(f"\nresults written to {out}")
+
+    if args.compare:
+        regressions = compare(
+            result, json.loads(Path(args.compare).read_text()), args.threshold_pct
+        )
+        if regressions:
+            print(
+                f"\n{len(regressions)} metric(s) regressed by more than {args.threshold_pct}%"
+            )
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+"""Deterministic scripted chat model for offline benchmarks.
+
+ScriptedChatModel stands in for the gateway ChatOpenAI from src/agent/llm.py.
+It finds the scenario whose question is in the latest user message and
+replays that scenario's tool-call turns. The number of tool-call turns already
+in this user turn (including the router fast path's) decides the next turn.
+After the last turn, and for the fast path's phrasing call, it returns the
+scenario's answer. latency_ms simulates model time without the network.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import (
+    AIMessage,
+    BaseMessage,
+    HumanMessage,
+    SystemMessage,
+    ToolMessage,
+)
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from scenarios import SCENARIOS, Scenario
+
+_call_ids = itertools.count(1)
+
+
+def _text(message: BaseMessage) -> str:
+    return message.content if isinstance(message.content, str) else str(message.content)
+
+
+def _parse(content: Any) -> Any:
+    if isinstance(content, str):
+        try:
+            return json.loads(content)
+        except ValueError:
+            return content
+    return content
+
+
+class ScriptedChatModel(BaseChatModel):
+    scenarios: List[Scenario] = SCENARIOS
+    latency_ms: float = 0.0
+    phrase_prompt: Optional[
+        str
+    ] = None  # router.PHRASE_PROMPT: fast-path calls get the answer directly
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted-fake"
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> "ScriptedChatModel":
+        return self
+
+    def _find(self, question: str) -> Optional[Scenario]:
+        return next((s for s in self.scenarios if s.question in question), None)
+
+    def _respond(self, messages: List[BaseMessage]) -> AIMessage:
+        self.calls += 1
+        human = [i for i, m in enumerate(messages) if isinstance(m, HumanMessage)]
+        if not human:
+            return AIMessage(content="No question found.")
+        scenario = self._find(_text(messages[human[-1]]))
+        if scenario is None:
+            return AIMessage(
+                content="I can help with transactions, merchants and escalations (benchmark)."
+            )
+        if (
+            self.phrase_prompt
+            and isinstance(messages[0], SystemMessage)
+            and messages[0].content == self.phrase_prompt
+        ):
+            return AIMessage(content=scenario.answer)
+
+        turn = messages[human[-1] + 1 :]
+        done = sum(1 for m in turn if isinstance(m, AIMessage) and m.tool_calls)
+        if done >= len(scenario.turns):
+            return AIMessage(content=scenario.answer)
+        results: Dict[str, Any] = {
+            m.name: _parse(m.content) for m in turn if isinstance(m, ToolMessage)
+        }
+        return AIMessage(
+            content="",
+            tool_calls=[
+                {
+                    "name": step.name,
+                    "args": step.resolve(results),
+                    "id": f"bench_{next(_call_ids)}",
+                    "type": "tool_call",
+                }
+                for step in scenario.turns[done]
+            ],
+        )
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        return ChatResult(generations=[ChatGeneration(message=self._respond(messages))])
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        # native async so concurrent runs are not limited by the default thread pool
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000)
+        return ChatResult(generations=[ChatGeneration(message=self._respond(messages))])
@@ -0,0 +1,739 @@
+"""Synthetic large-scale dataset for PaymentsData (mastercard_agent_demo_data layout).
+
+Writes merchants.json, transactions.jsonl (or .json), chargebacks.jsonl (or
+.json) and policies_kb.json with the exact MerchantProfile / Transaction /
+Chargeback / PaymentsPolicyKB fields, at any scale:
+
+  - merchants: the five bundled demo merchants plus --merchants synthetic ones
+    (MCC, region, risk segment, volume and chargeback ratio drawn per segment;
+    monitoring status derived from the KB thresholds)
+  - transactions: spread over the --days before --anchor (default: now),
+    merchants weighted by monthly volume, amounts around the merchant's
+    average ticket, decline codes / AVS / CVV / 3DS / risk scores per risk
+    segment. The 68 bundled transactions are kept, moved to the anchor, so the
+    demo questions still resolve
+  - decline spikes (--spikes): a merchant + time window where most rows are
+    declined with 05 or 91; one is always placed on M400 in the last 24h
+  - high-risk clusters (--clusters): a merchant + window with a handful of
+    reused card tokens, risk >= 0.8 and weak 3DS/AVS/CVV; one is always on
+    M500 in the last 24h
+  - chargebacks: drawn from approved rows at the merchant's chargeback ratio
+    (higher inside clusters), received 5-60 days after the transaction
+  - policies_kb.json: the bundled KB plus --kb-snippets generated playbooks
+    with applies_to facets
+
+Rows are generated in fixed-size shards (--shard-size) by --workers processes.
+Each shard has its own seed, so the output depends only on --seed and
+--shard-size, not on the worker count. Shards stream to part files that are
+concatenated in order. generation_manifest.json records the parameters and
+where the spikes and clusters are.
+
+    python benchmarks/generate_dataset.py --out /data/txn_10m --transactions 10000000
+    PAYMENT_DEMO_DATA_DIR=/data/txn_10m PAYMENT_STORE_BACKEND=columnar uvicorn src.main:app
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import random
+import shutil
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+BUNDLED_DATA = ROOT / "mastercard_agent_demo_data"
+
+DEMO_SPIKE_MERCHANT = "M400"
+DEMO_CLUSTER_MERCHANT = "M500"
+
+MCCS = {
+    # mcc: (label, typical segment, avg ticket in USD)
+    "5411": ("Grocery", "Low", 40),
+    "5732": ("Electronics", "Low", 320),
+    "5812": ("Restaurants", "Low", 35),
+    "5999": ("Retail", "Medium", 60),
+    "4722": ("Travel", "Medium", 650),
+    "4511": ("Airlines", "Medium", 480),
+    "7011": ("Hotels", "Medium", 220),
+    "5815": ("Digital Media", "High", 15),
+    "5816": ("Games", "High", 12),
+    "5967": ("Direct Marketing", "High", 45),
+}
+REGIONS = {
+    "IN": ("INR", 83.0),
+    "SG": ("SGD", 1.35),
+    "US": ("USD", 1.0),
+    "GB": ("GBP", 0.79),
+    "AE": ("AED", 3.67),
+}
+PROCESSORS = ("AcquirerA", "AcquirerB", "AcquirerC", "AcquirerD", "AcquirerE")
+NAME_PARTS = (
+    (
+        "Swift",
+        "Blue",
+        "Prime",
+        "Urban",
+        "Nova",
+        "Metro",
+        "Star",
+        "Green",
+        "Bright",
+        "Zen",
+    ),
+    ("Cart", "Mart", "Hub", "Trip", "Play", "Keys", "Bazaar", "Go", "Pay", "Box"),
+)
+
+SEGMENTS = {
+    # segment: (approval rate, risk beta (a, b), chargeback ratio range)
+    "Low": (0.94, (2.0, 9.0), (0.001, 0.008)),
+    "Medium": (0.89, (2.5, 6.0), (0.006, 0.019)),
+    "High": (0.82, (3.0, 4.0), (0.012, 0.03)),
+}
+DECLINE_CODES = (
+    ("05", 0.35),
+    ("51", 0.25),
+    ("57", 0.1),
+    ("14", 0.1),
+    ("54", 0.1),
+    ("91", 0.1),
+)
+DECLINE_REASONS = {
+    "05": "Do Not Honor",
+    "14": "Invalid Card Number",
+    "51": "Insufficient Funds",
+    "54": "Expired Card",
+    "57": "Transaction Not Permitted",
+    "91": "Issuer or switch inoperative",
+}
+CHARGEBACK_REASONS = (
+    ("4837", 0.35),
+    ("4863", 0.2),
+    ("4841", 0.15),
+    ("4855", 0.15),
+    ("4853", 0.15),
+)
+CHARGEBACK_STATUSES = (("open", 0.6), ("won", 0.2), ("lost", 0.2))
+
+NOTE_SPIKE = "Decline spike; suspected issuer routing or acquirer issue"
+NOTE_CLUSTER = "High risk approval; consider step-up auth"
+NOTE_NO_3DS = "3DS not enabled; monitor risk"
+
+
+def _weighted(rng: random.Random, table: Tuple[Tuple[Any, float], ...]) -> Any:
+    x = rng.random()
+    for value, weight in table:
+        x -= weight
+        if x < 0:
+            return value
+    return table[-1][0]
+
+
+# ---------- merchants, anomalies, KB ----------
+
+
+def _monitoring_status(ratio: float, program: Dict[str, Any]) -> str:
+    if ratio >= float(program["monitoring_threshold"]):
+        return "Monitoring"
+    if ratio >= float(program["approaching_threshold"]):
+        return "Approaching"
+    if ratio >= float(program["early_warning_threshold"]):
+        return "EarlyWarning"
+    return "None"
+
+
+def make_merchants(
+    n: int, rng: random.Random, program: Dict[str, Any]
+) -> List[Dict[str, Any]]:
+    merchants = json.loads(
+        (BUNDLED_DATA / "merchants.json").read_text(encoding="utf-8")
+    )
+    for i in range(n):
+        mcc = rng.choice(list(MCCS))
+        label, segment, ticket_usd = MCCS[mcc]
+        if rng.random() < 0.2:  # some merchants sit outside their MCC's usual segment
+            segment = rng.choice(list(SEGMENTS))
+        region = rng.choice(list(REGIONS))
+        currency, fx = REGIONS[region]
+        ratio = round(rng.uniform(*SEGMENTS[segment][2]), 4)
+        name = f"{rng.choice(NAME_PARTS[0])}{rng.choice(NAME_PARTS[1])} {label}"
+        merchants.append(
+            {
+                "merchant_id": f"M{1000 + i}",
+                "merchant_name": name,
+                "mcc": mcc,
+                "region": region,
+                "avg_ticket_size": round(ticket_usd * fx * rng.uniform(0.6, 1.6), 2),
+                "monthly_volume": round(rng.lognormvariate(math.log(5e6 * fx), 1.0), 2),
+                "chargeback_ratio": ratio,
+                "monitoring_program_status": _monitoring_status(ratio, program),
+                "risk_segment": segment,
+                "onboarding_date": (
+                    datetime(2019, 1, 1) + timedelta(days=rng.randrange(2500))
+                )
+                .date()
+                .isoformat(),
+                "processor": rng.choice(PROCESSORS),
+                "integration": {
+                    "three_ds_enabled": rng.random() < 0.8,
+                    "tokenization_enabled": rng.random() < 0.7,
+                },
+                "primary_contact": {
+                    "name": f"Ops Contact {i}",
+                    "email": f"ops{i}@merchant{i}.example",
+                },
+            }
+        )
+    return merchants
+
+
+def make_anomalies(
+    merchants: List[Dict[str, Any]],
+    spikes: int,
+    clusters: int,
+    anchor: datetime,
+    days: float,
+    rng: random.Random,
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Decline spikes and high-risk clusters as (merchant, window) records, in epoch seconds."""
+    end = anchor.timestamp()
+    ids = [m["merchant_id"] for m in merchants]
+
+    def window(hours: Tuple[float, float], recent: bool) -> Tuple[float, float]:
+        length = rng.uniform(*hours) * 3600
+        latest = end - 3600
+        start = (
+            rng.uniform(latest - 20 * 3600, latest - length)
+            if recent
+            else rng.uniform(end - days * 86400, latest - length)
+        )
+        return start, start + length
+
+    spike_list = []
+    for i in range(spikes):
+        merchant = DEMO_SPIKE_MERCHANT if i == 0 else rng.choice(ids)
+        start, stop = window((3, 10), recent=i == 0)
+        spike_list.append(
+            {
+                "merchant_id": merchant,
+                "start": start,
+                "end": stop,
+                "decline_code": rng.choice(("05", "91")),
+                "decline_rate": round(rng.uniform(0.5, 0.8), 2),
+            }
+        )
+    cluster_list = []
+    for i in range(clusters):
+        merchant = DEMO_CLUSTER_MERCHANT if i == 0 else rng.choice(ids)
+        start, stop = window((2, 12), recent=i == 0)
+        cluster_list.append(
+            {
+                "merchant_id": merchant,
+                "start": start,
+                "end": stop,
+                "share": round(rng.uniform(0.3, 0.6), 2),
+                "card_tokens": [
+                    f"tok_{rng.randrange(10**6):06d}" for _ in range(rng.randint(3, 8))
+                ],
+                "issuer_country": rng.choice(list(REGIONS)),
+            }
+        )
+    return spike_list, cluster_list
+
+
+def make_policies(extra_snippets: int, rng: random.Random, seed: int) -> Dict[str, Any]:
+    policies = json.loads(
+        (BUNDLED_DATA / "policies_kb.json").read_text(encoding="utf-8")
+    )
+    policies["version"] = f"{policies['version']}-synthetic-{seed}"
+    topics = [
+        (
+            "decline",
+            code,
+            f"Decline code {code} ({label}) handling",
+            ["decline", code, "issuer"],
+            [
+                f"Check the issuer and BIN mix of recent {code} declines.",
+                f"Advise the customer per {label} guidance.",
+                "Escalate to payments-ops if the rate doubles within six hours.",
+            ],
+        )
+        for code, label in DECLINE_REASONS.items()
+    ] + [
+        (
+            "mcc",
+            mcc,
+            f"{label} merchant risk playbook",
+            ["mcc", mcc, segment.lower(), "risk"],
+            [
+                f"Baseline decline and chargeback rates for {label} merchants.",
+                "Review 3DS coverage and step-up rules.",
+                "Confirm descriptor clarity and refund flows.",
+            ],
+        )
+        for mcc, (label, segment, _) in MCCS.items()
+    ]
+    for i in range(extra_snippets):
+        kind, key, title, tags, content = topics[i % len(topics)]
+        region = rng.choice(list(REGIONS))
+        snippet = {
+            "id": f"KB-SYN-{i:05d}",
+            "title": f"{title} ({region})",
+            "tags": tags + [region.lower()],
+            "content": content
+            + [f"Regional note {i}: follow {region} acquirer escalation contacts."],
+            "applies_to": {"regions": [region]},
+        }
+        if kind == "mcc":
+            snippet["applies_to"]["mcc"] = [key]
+        policies["kb_snippets"].append(snippet)
+    return policies
+
+
+def bundled_transactions(
+    anchor: datetime,
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Bundled transactions / chargebacks moved so the newest transaction is an hour before `anchor`."""
+    txns = json.loads((BUNDLED_DATA / "transactions.json").read_text(encoding="utf-8"))
+    cbs = json.loads((BUNDLED_DATA / "chargebacks.json").read_text(encoding="utf-8"))
+    newest = max(datetime.fromisoformat(t["timestamp"]) for t in txns)
+    delta = anchor - timedelta(hours=1) - newest
+    for t in txns:
+        t["timestamp"] = (datetime.fromisoformat(t["timestamp"]) + delta).isoformat()
+    for c in cbs:
+        c["received_date"] = (
+            datetime.fromisoformat(c["received_date"]) + delta
+        ).isoformat()
+    return txns, cbs
+
+
+# ---------- transaction shards (worker processes) ----------
+
+
+class _ShardGen:
+    """Rows of one shard; everything it needs is picklable plain data."""
+
+    def __init__(self, cfg: Dict[str, Any], shard: int):
+        self.cfg = cfg
+        self.rng = random.Random(f"{cfg['seed']}:{shard}")
+        self.merchants = cfg["merchants"]
+        self.cum_weights = cfg["cum_weights"]
+        self.spikes: Dict[str, List[Dict[str, Any]]] = {}
+        for s in cfg["spikes"]:
+            self.spikes.setdefault(s["merchant_id"], []).append(s)
+        self.clusters: Dict[str, List[Dict[str, Any]]] = {}
+        for c in cfg["clusters"]:
+            self.clusters.setdefault(c["merchant_id"], []).append(c)
+        self.end = cfg["anchor_ts"]
+        self.span = cfg["days"] * 86400
+
+    @staticmethod
+    def _active(
+        events: Optional[List[Dict[str, Any]]], ts: float
+    ) -> Optional[Dict[str, Any]]:
+        for e in events or ():
+            if e["start"] <= ts < e["end"]:
+                return e
+        return None
+
+    def transaction(
+        self, index: int
+    ) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+        rng = self.rng
+        m = self.merchants[self._pick_merchant()]
+        segment = m["risk_segment"]
+        approval, (a, b), _ = SEGMENTS[segment]
+        ts = self.end - rng.random() * self.span
+        currency, _ = REGIONS.get(m["region"], ("USD", 1.0))
+        three_ds_enabled = m["integration"].get("three_ds_enabled", True)
+
+        tx = {
+            "transaction_id": f"T9{index:010d}",
+            "merchant_id": m["merchant_id"],
+            "amount": round(m["avg_ticket_size"] * rng.lognormvariate(0.0, 0.6), 2),
+            "currency": currency,
+            "timestamp": datetime.fromtimestamp(ts, self.cfg["tz"]).isoformat(
+                timespec="seconds"
+            ),
+            "status": "approved",
+            "decline_code": None,
+            "decline_reason": None,
+            "avs_result": _weighted(
+                rng, (("Y", 0.5), ("A", 0.2), ("N", 0.15), (None, 0.15))
+            ),
+            "cvv_result": _weighted(
+                rng, (("M", 0.85), ("N", 0.07), ("U", 0.07), (None, 0.01))
+            ),
+            "three_ds_result": _weighted(
+                rng, (("AUTHENTICATED", 0.9), ("FAILED", 0.06), ("NOT_ENROLLED", 0.04))
+            )
+            if three_ds_enabled
+            else None,
+            "risk_score": round(rng.betavariate(a, b), 2),
+            "issuer_country": m["region"]
+            if rng.random() < 0.85
+            else rng.choice(list(REGIONS)),
+            "channel": _weighted(rng, (("ecom", 0.8), ("pos", 0.15), ("moto", 0.05))),
+            "card_token": f"tok_{rng.randrange(10**6):06d}",
+            "masked_pan": f"************{rng.randrange(10**4):04d}",
+            "note": None if three_ds_enabled else NOTE_NO_3DS,
+        }
+
+        cluster = self._active(self.clusters.get(m["merchant_id"]), ts)
+        in_cluster = cluster is not None and rng.random() < cluster["share"]
+        if in_cluster:
+            tx.update(
+                risk_score=round(rng.uniform(0.8, 0.99), 2),
+                card_token=rng.choice(cluster["card_tokens"]),
+                issuer_country=cluster["issuer_country"],
+                channel="ecom",
+                three_ds_result=rng.choice(("FAILED", "NOT_ENROLLED", None)),
+                avs_result=rng.choice(("N", "U", None)),
+                cvv_result=rng.choice(("N", "U", "M")),
+                note=NOTE_CLUSTER,
+            )
+
+        spike = self._active(self.spikes.get(m["merchant_id"]), ts)
+        if spike is not None and rng.random() < spike["decline_rate"]:
+            code, note = spike["decline_code"], NOTE_SPIKE
+        elif rng.random() > approval - (0.1 if in_cluster else 0.0):
+            code, note = _weighted(rng, DECLINE_CODES), tx["note"]
+        else:
+            code = None
+        if code is not None:
+            tx.update(
+                status="declined",
+                decline_code=code,
+                decline_reason=DECLINE_REASONS[code],
+                note=note,
+            )
+
+        chargeback = None
+        cb_rate = m["chargeback_ratio"] * (8 if in_cluster else 1)
+        if tx["status"] == "approved" and rng.random() < cb_rate:
+            received = ts + rng.uniform(5, 60) * 86400
+            if received <= self.end:
+                chargeback = {
+                    "chargeback_id": f"CB9{index:010d}",
+                    "merchant_id": m["merchant_id"],
+                    "transaction_id": tx["transaction_id"],
+                    "reason_code": "4837"
+                    if in_cluster
+                    else _weighted(rng, CHARGEBACK_REASONS),
+                    "amount": tx["amount"],
+                    "currency": currency,
+                    "received_date": datetime.fromtimestamp(
+                        received, self.cfg["tz"]
+                    ).isoformat(timespec="seconds"),
+                    "status": _weighted(rng, CHARGEBACK_STATUSES),
+                }
+        return tx, chargeback
+
+    def _pick_merchant(self) -> int:
+        # bisect over cumulative monthly volume
+        x = self.rng.random() * self.cum_weights[-1]
+        lo, hi = 0, len(self.cum_weights) - 1
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.cum_weights[mid] <= x:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+
+def _write_shard(task: Tuple[int, int, int, Dict[str, Any]]) -> Tuple[int, int, int]:
+    """Worker: stream one shard to part files; returns (shard, transactions, chargebacks)."""
+    shard, start, count, cfg = task
+    gen = _ShardGen(cfg, shard)
+    parts = Path(cfg["parts_dir"])
+    n_cb = 0
+    with open(
+        parts / f"tx-{shard:06d}.part", "w", encoding="utf-8", buffering=1 << 20
+    ) as tx_out, open(
+        parts / f"cb-{shard:06d}.part", "w", encoding="utf-8", buffering=1 << 20
+    ) as cb_out:
+        for index in range(start, start + count):
+            tx, cb = gen.transaction(index)
+            tx_out.write(json.dumps(tx, separators=(",", ":")))
+            tx_out.write("\n")
+            if cb is not None:
+                cb_out.write(json.dumps(cb, separators=(",", ":")))
+                cb_out.write("\n")
+                n_cb += 1
+    return shard, count, n_cb
+
+
+def _concat(
+    out_path: Path, head_rows: List[Dict[str, Any]], parts: List[Path], as_array: bool
+) -> None:
+    """Stream head rows + part files (one JSON object per line) into JSONL or a JSON array."""
+    with open(out_path, "w", encoding="utf-8", buffering=1 << 20) as out:
+        first = True
+
+        def write_line(line: str) -> None:
+            nonlocal first
+            if as_array:
+                out.write("[\n" if first else ",\n")
+                out.write(line.rstrip("\n"))
+            else:
+                out.write(line if line.endswith("\n") else line + "\n")
+            first = False
+
+        for row in head_rows:
+            write_line(json.dumps(row, separators=(",", ":")))
+        for part in parts:
+            with open(part, "r", encoding="utf-8", buffering=1 << 20) as f:
+                if as_array:
+                    for line in f:
+                        write_line(line)
+                else:
+                    shutil.copyfileobj(f, out, 1 << 20)
+                    first = False
+        if as_array:
+            out.write("[]\n" if first else "\n]\n")
+
+
+# ---------- driver ----------
+
+
+def generate(
+    out_dir: str | Path,
+    transactions: int,
+    merchants: int = 50,
+    days: float = 30,
+    spikes: Optional[int] = None,
+    clusters: Optional[int] = None,
+    kb_snippets: int = 20,
+    seed: int = 42,
+    anchor: Optional[datetime] = None,
+    workers: Optional[int] = None,
+    shard_size: int = 250_000,
+    fmt: str = "jsonl",
+    include_demo: bool = True,
+    progress: bool = False,
+) -> Dict[str, Any]:
+    """Write the dataset to `out_dir`; returns the manifest."""
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    anchor = anchor or datetime.now(timezone.utc).astimezone()
+    rng = random.Random(seed)
+    spikes = max(1, merchants // 10) if spikes is None else spikes
+    clusters = max(1, merchants // 10) if clusters is None else clusters
+    t0 = time.perf_counter()
+
+    policies = make_policies(kb_snippets, rng, seed)
+    merchant_rows = make_merchants(merchants, rng, policies["monitoring_program"])
+    spike_list, cluster_list = make_anomalies(
+        merchant_rows, spikes, clusters, anchor, days, rng
+    )
+    demo_txns, demo_cbs = bundled_transactions(anchor) if include_demo else ([], [])
+    synthetic = max(0, transactions - len(demo_txns))
+
+    cum, total = [], 0.0
+    for m in merchant_rows:
+        total += m["monthly_volume"]
+        cum.append(total)
+    parts_dir = out / ".parts"
+    parts_dir.mkdir(exist_ok=True)
+    cfg = {
+        "seed": seed,
+        "merchants": merchant_rows,
+        "cum_weights": cum,
+        "spikes": spike_list,
+        "clusters": cluster_list,
+        "anchor_ts": anchor.timestamp(),
+        "tz": anchor.tzinfo,
+        "days": days,
+        "parts_dir": str(parts_dir),
+    }
+    tasks = [
+        (i, start, min(shard_size, synthetic - start), cfg)
+        for i, start in enumerate(range(0, synthetic, shard_size))
+    ]
+
+    n_cb = 0
+    workers = max(1, min(workers or os.cpu_count() or 1, len(tasks) or 1))
+    with multiprocessing.get_context(
+        "spawn" if sys.platform == "win32" else "fork"
+    ).Pool(workers) as pool:
+        for done, (shard, _, cbs) in enumerate(
+            pool.imap_unordered(_write_shard, tasks), start=1
+        ):
+            n_cb += cbs
+            if progress:
+                print(
+                    f"[generate] shard {shard} done ({done}/{len(tasks)})", flush=True
+                )
+
+    as_array = fmt == "json"
+    ext = "json" if as_array else "jsonl"
+    for stale in (
+        "transactions.json",
+        "transactions.jsonl",
+        "chargebacks.json",
+        "chargebacks.jsonl",
+    ):
+        (out / stale).unlink(missing_ok=True)
+    _concat(
+        out / f"transactions.{ext}",
+        demo_txns,
+        [parts_dir / f"tx-{i:06d}.part" for i, *_ in tasks],
+        as_array,
+    )
+    _concat(
+        out / f"chargebacks.{ext}",
+        demo_cbs,
+        [parts_dir / f"cb-{i:06d}.part" for i, *_ in tasks],
+        as_array,
+    )
+    shutil.rmtree(parts_dir)
+
+    (out / "merchants.json").write_text(
+        json.dumps(merchant_rows, indent=2), encoding="utf-8"
+    )
+    (out / "policies_kb.json").write_text(
+        json.dumps(policies, indent=2), encoding="utf-8"
+    )
+
+    iso = lambda ts: datetime.fromtimestamp(ts, anchor.tzinfo).isoformat(
+        timespec="seconds"
+    )  # noqa: E731
+    manifest = {
+        "seed": seed,
+        "anchor": anchor.isoformat(),
+        "days": days,
+        "shard_size": shard_size,
+        "format": ext,
+        "counts": {
+            "merchants": len(merchant_rows),
+            "transactions": len(demo_txns) + synthetic,
+            "chargebacks": len(demo_cbs) + n_cb,
+            "kb_snippets": len(policies["kb_snippets"]),
+        },
+        "decline_spikes": [
+            {**s, "start": iso(s["start"]), "end": iso(s["end"])} for s in spike_list
+        ],
+        "high_risk_clusters": [
+            {**c, "start": iso(c["start"]), "end": iso(c["end"])} for c in cluster_list
+        ],
+        "elapsed_s": round(time.perf_counter() - t0, 2),
+        "workers": workers,
+    }
+    (out / "generation_manifest.json").write_text(
+        json.dumps(manifest, indent=2), encoding="utf-8"
+    )
+    return manifest
+
+
+def _iter_rows(path: Path) -> Iterator[Dict[str, Any]]:
+    with open(path, encoding="utf-8") as f:
+        if path.suffix == ".jsonl":
+            for line in f:
+                yield json.loads(line)
+        else:
+            yield from json.load(f)
+
+
+def validate(out_dir: str | Path, sample: int = 10_000) -> None:
+    """Check merchants / KB fully and the first `sample` transactions and chargebacks against the models."""
+    sys.path.insert(0, str(ROOT))
+    from src.agent.payments_data_model import (
+        Chargeback,
+        MerchantProfile,
+        PaymentsPolicyKB,
+        Transaction,
+    )
+
+    out = Path(out_dir)
+    for m in json.loads((out / "merchants.json").read_text(encoding="utf-8")):
+        MerchantProfile.model_validate(m)
+    PaymentsPolicyKB.model_validate(
+        json.loads((out / "policies_kb.json").read_text(encoding="utf-8"))
+    )
+    for name, model in (("transactions", Transaction), ("chargebacks", Chargeback)):
+        path = (
+            out / f"{name}.jsonl"
+            if (out / f"{name}.jsonl").exists()
+            else out / f"{name}.json"
+        )
+        for row in islice(_iter_rows(path), sample):
+            extra = set(row) - set(model.model_fields)
+            if extra:
+                raise ValueError(f"{path.name}: unexpected fields {sorted(extra)}")
+            model.model_validate(row)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--out", required=True, help="output dataset folder")
+    parser.add_argument("--transactions", type=int, default=100_000)
+    parser.add_argument(
+        "--merchants",
+        type=int,
+        default=50,
+        help="synthetic merchants besides the 5 demo ones",
+    )
+    parser.add_argument("--days", type=float, default=30)
+    parser.add_argument(
+        "--spikes", type=int, help="decline spikes (default merchants/10)"
+    )
+    parser.add_argument(
+        "--clusters", type=int, help="high-risk clusters (default merchants/10)"
+    )
+    parser.add_argument("--kb-snippets", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--anchor", help="ISO timestamp of the newest data (default now)"
+    )
+    parser.add_argument("--workers", type=int, help="processes (default CPU count)")
+    parser.add_argument("--shard-size", type=int, default=250_000)
+    parser.add_argument("--format", choices=["jsonl", "json"], default="jsonl")
+    parser.add_argument(
+        "--no-demo", action="store_true", help="leave out the bundled demo transactions"
+    )
+    parser.add_argument(
+        "--validate",
+        type=int,
+        default=10_000,
+        metavar="N",
+        help="validate the first N rows against the models (0 skips)",
+    )
+    args = parser.parse_args()
+
+    manifest = generate(
+        args.out,
+        transactions=args.transactions,
+        merchants=args.merchants,
+        days=args.days,
+        spikes=args.spikes,
+        clusters=args.clusters,
+        kb_snippets=args.kb_snippets,
+        seed=args.seed,
+        anchor=datetime.fromisoformat(args.anchor) if args.anchor else None,
+        workers=args.workers,
+        shard_size=args.shard_size,
+        fmt=args.format,
+        include_demo=not args.no_demo,
+        progress=True,
+    )
+    if args.validate:
+        validate(args.out, args.validate)
+    print(
+        json.dumps(manifest["counts"]),
+        f"in {manifest['elapsed_s']}s with {manifest['workers']} workers",
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
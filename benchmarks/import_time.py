@@ -0,0 +1,108 @@
+"""Import-time budget for the agent package.
+
+Each sample imports a module in a fresh interpreter, so nothing is cached in
+sys.modules. Reports the median wall time per AGENT_TRACING mode and which
+heavy optional packages were imported, and exits 1 when a median exceeds the
+budget.
+
+    python benchmarks/import_time.py                      # src.agent.graph, off + full
+    python benchmarks/import_time.py --module src.main --budget-s 4 --runs 7
+    python benchmarks/import_time.py --modes off sampled full --json results/import_time.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# packages that should only load on first use (tracing, Slack MCP client)
+LAZY_PACKAGES = ("traceloop", "fastmcp")
+
+_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - t0
+print(json.dumps({{"seconds": elapsed, "loaded": [p for p in {lazy!r} if p in sys.modules]}}))
+"""
+
+
+def sample(module: str, mode: str) -> dict:
+    env = {**os.environ, "AGENT_TRACING": mode, "PYTHONPATH": str(ROOT)}
+    env.setdefault(
+        "TFY_API_KEY", "import-time-benchmark"
+    )  # ChatOpenAI is built at import
+    out = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(module=module, lazy=LAZY_PACKAGES)],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--module", default="src.agent.graph")
+    parser.add_argument(
+        "--modes",
+        nargs="+",
+        default=["off", "full"],
+        choices=["off", "sampled", "full"],
+    )
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--budget-s",
+        type=float,
+        default=float(os.getenv("IMPORT_TIME_BUDGET_S", "3.0")),
+    )
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    results = {}
+    for mode in args.modes:
+        samples = [sample(args.module, mode) for _ in range(args.runs)]
+        seconds = [s["seconds"] for s in samples]
+        results[mode] = {
+            "median_s": round(statistics.median(seconds), 3),
+            "min_s": round(min(seconds), 3),
+            "max_s": round(max(seconds), 3),
+            "loaded_at_import": samples[-1]["loaded"],
+            "within_budget": statistics.median(seconds) <= args.budget_s,
+        }
+        r = results[mode]
+        print(
+            f"{args.module} AGENT_TRACING={mode:<8} median {r['median_s']:.3f}s "
+            f"(min {r['min_s']:.3f}, max {r['max_s']:.3f}) loaded: {', '.join(r['loaded_at_import']) or '-'} "
+            f"{'OK' if r['within_budget'] else 'OVER BUDGET'} ({args.budget_s}s)"
+        )
+
+    if args.json:
+        Path(args.json).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.json).write_text(
+            json.dumps(
+                {
+                    "module": args.module,
+                    "budget_s": args.budget_s,
+                    "runs": args.runs,
+                    "modes": results,
+                },
+                indent=2,
+            )
+        )
+    return 0 if all(r["within_budget"] for r in results.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
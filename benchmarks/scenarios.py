@@ -0,0 +1,177 @@
+"""Benchmark scenarios: the docs/demo_prompts.md flows and the Streamlit SUGGESTED_QUESTIONS.
+
+Each scenario is the user question plus the tool calls the scripted model makes
+for it, one list per model turn (several calls in one turn run in parallel).
+Arguments are literal values, or callables taking the results seen so far
+({tool name: parsed result}) for steps such as "analyze the picked
+transaction".
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Union
+
+Results = Dict[str, Any]
+ArgValue = Union[Any, Callable[[Results], Any]]
+
+
+@dataclass(frozen=True)
+class ToolStep:
+    name: str
+    args: Dict[str, ArgValue] = field(default_factory=dict)
+
+    def resolve(self, results: Results) -> Dict[str, Any]:
+        return {k: (v(results) if callable(v) else v) for k, v in self.args.items()}
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    question: str
+    turns: List[List[ToolStep]]
+    answer: str
+
+
+def _picked(results: Results) -> str:
+    # fall back to a bundled transaction when the 48h window is empty
+    return (results.get("pick_representative_transaction") or {}).get(
+        "transaction_id"
+    ) or "T50009"
+
+
+SCENARIOS: List[Scenario] = [
+    Scenario(
+        name="A_simple_approval",
+        question="Can you check transaction T10001 and summarize what happened?",
+        turns=[[ToolStep("analyze_transaction", {"transaction_id": "T10001"})]],
+        answer="• What I checked: analyze_transaction(T10001)\n• Findings: approved, Low risk band.\n• No escalation required.",
+    ),
+    Scenario(
+        name="B_issuer_decline",
+        question="Why was T10005 declined? What should I tell the customer?",
+        turns=[
+            [ToolStep("analyze_transaction", {"transaction_id": "T10005"})],
+            [
+                ToolStep(
+                    "lookup_internal_policy",
+                    {
+                        "query": "customer messaging for issuer declines",
+                        "context": {"transaction_id": "T10005"},
+                    },
+                )
+            ],
+        ],
+        answer="• Findings: issuer decline.\n• Recommended next actions: policy-backed customer messaging.",
+    ),
+    Scenario(
+        name="C_merchant_monitoring",
+        question="Is TravelNow (M200) at risk of any monitoring criteria? What should we do?",
+        turns=[
+            [ToolStep("check_merchant_compliance", {"merchant_id": "M200"})],
+            [
+                ToolStep(
+                    "lookup_internal_policy",
+                    {
+                        "query": "chargeback remediation playbook",
+                        "context": lambda r: {
+                            "merchant_id": "M200",
+                            "verdict": (r.get("check_merchant_compliance") or {}).get(
+                                "verdict"
+                            ),
+                        },
+                    },
+                )
+            ],
+            [
+                ToolStep(
+                    "slack_send_message",
+                    {
+                        "channel": "#payments-ops-demo",
+                        "text": "M200 monitoring verdict requires remediation (benchmark).",
+                    },
+                )
+            ],
+        ],
+        answer="• Findings: monitoring verdict stated.\n• Escalation: posted to #payments-ops-demo.",
+    ),
+    Scenario(
+        name="D_decline_spike",
+        question="ElectroHub (M400) suddenly has many declines since yesterday. Investigate and escalate if needed.",
+        turns=[
+            [
+                ToolStep(
+                    "list_transactions_last_48h",
+                    {"merchant_id": "M400", "summary_only": True},
+                ),
+                ToolStep("check_merchant_compliance", {"merchant_id": "M400"}),
+                ToolStep(
+                    "pick_representative_transaction",
+                    {"merchant_id": "M400", "window_hours": 48},
+                ),
+            ],
+            [
+                ToolStep("analyze_transaction", {"transaction_id": _picked}),
+                ToolStep(
+                    "lookup_internal_policy",
+                    {
+                        "query": "decline spike 05/91",
+                        "context": {"merchant_id": "M400"},
+                    },
+                ),
+            ],
+            [
+                ToolStep(
+                    "slack_send_message",
+                    {
+                        "channel": "#payments-ops-demo",
+                        "text": "M400 decline spike (05/91) under investigation (benchmark).",
+                    },
+                )
+            ],
+        ],
+        answer="• Findings: decline spike.\n• Escalation: posted to #payments-ops-demo.",
+    ),
+    Scenario(
+        name="E_high_risk_weak_auth",
+        question=(
+            "DigitalKeys (M500) seems risky. Use the last 24h transactions, pick a representative high-risk txn, "
+            "and use internal policy/runbook to recommend next steps."
+        ),
+        turns=[
+            [
+                ToolStep(
+                    "list_transactions_last_48h",
+                    {"merchant_id": "M500", "summary_only": True},
+                ),
+                ToolStep("check_merchant_compliance", {"merchant_id": "M500"}),
+                ToolStep(
+                    "pick_representative_transaction",
+                    {"merchant_id": "M500", "window_hours": 48},
+                ),
+            ],
+            [
+                ToolStep("analyze_transaction", {"transaction_id": _picked}),
+                ToolStep(
+                    "lookup_internal_policy",
+                    {
+                        "query": "3DS step-up authentication",
+                        "context": {"merchant_id": "M500"},
+                    },
+                ),
+            ],
+            [
+                ToolStep(
+                    "slack_send_message",
+                    {
+                        "channel": "#risk-approvals-demo",
+                        "text": "M500 high-risk txn with weak auth (benchmark).",
+                    },
+                )
+            ],
+        ],
+        answer="• Findings: representative high-risk transaction.\n• Escalation: posted to #risk-approvals-demo.",
+    ),
+]
+
+BY_NAME = {s.name: s for s in SCENARIOS}
@@ -1,8 +1,8 @@
-"""Agent package initialization and configuration."""
+"""Agent package initialization and configuration.
+
+Tracing is initialized lazily on the first traced call; see tracing.py.
+"""
 
 from dotenv import load_dotenv
-from traceloop.sdk import Traceloop
 
 load_dotenv()
-
-Traceloop.init(app_name="mastercard-payment-ops-agent")
\ No newline at end of file
@@ -0,0 +1,136 @@
+"""Bounded, persistent LangGraph checkpointer for agent threads (demo).
+
+MemorySaver keeps every thread's full history (tool outputs included) in RAM
+until the process exits. AGENT_CHECKPOINTER=sqlite uses langgraph's SqliteSaver
+(langgraph-checkpoint-sqlite, imported only for this backend; see
+checkpointer_sqlite.py) on one SQLite file instead, so threads survive
+restarts and are shared by all uvicorn workers pointing at the same file (WAL
+mode + busy timeout). On top of the upstream saver:
+
+  - compression: CompressedSerializer wraps the serde and zlib-compresses blobs
+    of at least `compress_min_bytes` (in practice the message channel carrying
+    large tool outputs)
+  - async: the sync saver runs on a worker thread, so it works from any loop
+  - bounds: CheckpointRetention trims old checkpoints per thread and applies a
+    TTL and an LRU thread limit as a separate maintenance pass, every
+    AGENT_CHECKPOINT_MAINTENANCE_INTERVAL_S seconds in the API process or on
+    demand with `python -m src.agent.checkpointer`
+
+Trimming checkpoints does not bound a thread's state: the newest checkpoint
+still carries the whole message list. That is bounded for both backends by
+AGENT_MAX_THREAD_MESSAGES (history.py, applied by the router on every turn).
+
+See make_checkpointer() for the settings.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import zlib
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Optional, Tuple
+
+from langgraph.checkpoint.base import BaseCheckpointSaver, SerializerProtocol
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+if TYPE_CHECKING:
+    from src.agent.checkpointer_sqlite import CheckpointRetention
+
+_ZLIB_SUFFIX = "+zlib"
+
+
+class CompressedSerializer:
+    """Wraps a serializer and zlib-compresses payloads of at least `min_bytes` (0 disables)."""
+
+    def __init__(
+        self,
+        inner: Optional[SerializerProtocol] = None,
+        min_bytes: int = 2048,
+        level: int = 6,
+    ):
+        self.inner = inner or JsonPlusSerializer()
+        self.min_bytes = min_bytes
+        self.level = level
+
+    def dumps_typed(self, obj: Any) -> Tuple[str, bytes]:
+        type_, data = self.inner.dumps_typed(obj)
+        if self.min_bytes and len(data) >= self.min_bytes:
+            return type_ + _ZLIB_SUFFIX, zlib.compress(data, self.level)
+        return type_, data
+
+    def loads_typed(self, data: Tuple[str, bytes]) -> Any:
+        type_, payload = data
+        if type_.endswith(_ZLIB_SUFFIX):
+            type_, payload = type_[: -len(_ZLIB_SUFFIX)], zlib.decompress(payload)
+        return self.inner.loads_typed((type_, payload))
+
+
+def _env_number(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value not in (None, "") else default
+
+
+def make_checkpointer() -> BaseCheckpointSaver:
+    """
+    Checkpointer selected by AGENT_CHECKPOINTER:
+      memory (default): in-process MemorySaver, no thread limit, lost on restart
+      sqlite: SqliteCheckpointSaver at AGENT_CHECKPOINT_DB (default .agent_state/checkpoints.sqlite),
+              compressing blobs of at least AGENT_CHECKPOINT_COMPRESS_MIN_BYTES (2048; 0 disables).
+              Bounded by make_checkpoint_retention().
+    """
+    kind = os.getenv("AGENT_CHECKPOINTER", "memory").lower()
+    if kind == "memory":
+        return MemorySaver()
+    if kind == "sqlite":
+        from src.agent.checkpointer_sqlite import SqliteCheckpointSaver
+
+        return SqliteCheckpointSaver(
+            os.getenv("AGENT_CHECKPOINT_DB")
+            or Path(".agent_state") / "checkpoints.sqlite",
+            compress_min_bytes=int(
+                _env_number("AGENT_CHECKPOINT_COMPRESS_MIN_BYTES", 2048)
+            ),
+        )
+    raise ValueError(
+        f"Unknown AGENT_CHECKPOINTER '{kind}' (expected memory or sqlite)."
+    )
+
+
+def make_checkpoint_retention() -> CheckpointRetention:
+    """
+    Retention bounds: AGENT_MAX_CHECKPOINTS_PER_THREAD (20), AGENT_THREAD_TTL_S (604800)
+    and AGENT_MAX_THREADS (1000); 0 disables a bound.
+    """
+    from src.agent.checkpointer_sqlite import CheckpointRetention
+
+    return CheckpointRetention(
+        max_checkpoints=int(_env_number("AGENT_MAX_CHECKPOINTS_PER_THREAD", 20)),
+        ttl_s=_env_number("AGENT_THREAD_TTL_S", 7 * 24 * 3600),
+        max_threads=int(_env_number("AGENT_MAX_THREADS", 1000)),
+    )
+
+
+def start_checkpoint_maintenance(saver: BaseCheckpointSaver) -> Optional[asyncio.Task]:
+    """
+    Background retention task for a SqliteCheckpointSaver, every
+    AGENT_CHECKPOINT_MAINTENANCE_INTERVAL_S seconds (300; 0 disables). None otherwise.
+    """
+    interval_s = _env_number("AGENT_CHECKPOINT_MAINTENANCE_INTERVAL_S", 300)
+    if isinstance(saver, MemorySaver) or interval_s <= 0:
+        return None
+    from src.agent.checkpointer_sqlite import SqliteCheckpointSaver
+
+    if not isinstance(saver, SqliteCheckpointSaver):
+        return None
+    return asyncio.create_task(
+        make_checkpoint_retention().run_forever(saver, interval_s)
+    )
+
+
+if __name__ == "__main__":
+    saver = make_checkpointer()
+    if isinstance(saver, MemorySaver):
+        raise SystemExit("Checkpoint maintenance needs AGENT_CHECKPOINTER=sqlite.")
+    print(make_checkpoint_retention().apply(saver), saver.stats())
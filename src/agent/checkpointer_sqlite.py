@@ -0,0 +1,206 @@
+"""SQLite backend for the agent checkpointer (AGENT_CHECKPOINTER=sqlite).
+
+Imported by checkpointer.py only when the SQLite backend is selected, so the
+default in-memory checkpointer does not need langgraph-checkpoint-sqlite.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    SerializerProtocol,
+)
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+from src.agent.checkpointer import CompressedSerializer
+
+# uuid6 timestamps count 100ns intervals from the Gregorian epoch (1582-10-15)
+_UUID_EPOCH_TICKS = 0x01B21DD213814000
+
+
+class SqliteCheckpointSaver(SqliteSaver):
+    """
+    langgraph's SqliteSaver on its own connection (WAL, busy timeout) with a
+    compressing serde. The async methods run the sync ones on a worker thread, so
+    one saver can be created at import time and used from any event loop.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        *,
+        compress_min_bytes: int = 2048,
+        serde: Optional[SerializerProtocol] = None,
+    ):
+        self.path = str(path)
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        super().__init__(
+            conn, serde=serde or CompressedSerializer(min_bytes=compress_min_bytes)
+        )
+        self.setup()
+
+    def close(self) -> None:
+        with self.lock:
+            self.conn.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self.cursor(transaction=False) as cur:
+            threads = cur.execute(
+                "SELECT COUNT(DISTINCT thread_id) FROM checkpoints"
+            ).fetchone()[0]
+            checkpoints = cur.execute("SELECT COUNT(*) FROM checkpoints").fetchone()[0]
+        size = (
+            os.path.getsize(self.path)
+            if self.path != ":memory:" and os.path.exists(self.path)
+            else 0
+        )
+        return {
+            "backend": "sqlite",
+            "path": self.path,
+            "threads": threads,
+            "checkpoints": checkpoints,
+            "bytes": size,
+        }
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for item in items:
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(
+            self.put, config, checkpoint, metadata, new_versions
+        )
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+
+def _uuid6_epoch(checkpoint_id: str) -> float:
+    """Unix time embedded in a (time-ordered, uuid6) checkpoint id."""
+    h = checkpoint_id.replace("-", "")
+    ticks = int(h[0:12] + h[13:16], 16)  # 100ns intervals since 1582-10-15
+    return (ticks - _UUID_EPOCH_TICKS) / 1e7
+
+
+class CheckpointRetention:
+    """
+    Maintenance pass over a SqliteCheckpointSaver database, run apart from the write
+    path (periodically from the API lifespan, or `python -m src.agent.checkpointer`):
+
+      - per-thread trimming: only the newest `max_checkpoints` checkpoints of each
+        thread/namespace are kept, with their pending writes. Subgraph namespaces
+        (the ReAct agent runs as a subgraph, in a new namespace every turn) are
+        dropped once their run has finished, i.e. once the thread has a newer
+        root checkpoint
+      - TTL: threads whose newest checkpoint is older than `ttl_s` are deleted
+      - LRU: beyond `max_threads`, the threads with the oldest newest checkpoint are deleted
+
+    Trimming drops old checkpoints of live threads. That is safe for this agent's
+    graphs (their channels hold full values), not for graphs using DeltaChannel.
+    """
+
+    def __init__(
+        self,
+        max_checkpoints: int = 20,
+        ttl_s: Optional[float] = 7 * 24 * 3600,
+        max_threads: Optional[int] = 1000,
+    ):
+        self.max_checkpoints = max_checkpoints
+        self.ttl_s = ttl_s
+        self.max_threads = max_threads
+        self.runs = 0
+        self.last: Dict[str, int] = {}
+
+    def apply(self, saver: SqliteCheckpointSaver) -> Dict[str, int]:
+        """Apply the bounds now; returns {"trimmed_checkpoints", "deleted_threads"}."""
+        trimmed = 0
+        expired: List[str] = []
+        with saver.cursor() as cur:
+            newest = cur.execute(
+                "SELECT thread_id, MAX(checkpoint_id) AS newest FROM checkpoints GROUP BY thread_id ORDER BY newest DESC"
+            ).fetchall()
+            if self.ttl_s:
+                cutoff = time.time() - self.ttl_s
+                expired += [
+                    thread_id for thread_id, cid in newest if _uuid6_epoch(cid) < cutoff
+                ]
+            if self.max_threads:
+                expired += [thread_id for thread_id, _ in newest[self.max_threads :]]
+            expired = list(dict.fromkeys(expired))
+            for thread_id in expired:
+                cur.execute("DELETE FROM checkpoints WHERE thread_id = ?", (thread_id,))
+                cur.execute("DELETE FROM writes WHERE thread_id = ?", (thread_id,))
+            if self.max_checkpoints:
+                cur.execute(
+                    "DELETE FROM checkpoints WHERE checkpoint_ns != '' AND (thread_id, checkpoint_ns) IN"
+                    " (SELECT s.thread_id, s.checkpoint_ns FROM checkpoints s WHERE s.checkpoint_ns != ''"
+                    " GROUP BY s.thread_id, s.checkpoint_ns HAVING MAX(s.checkpoint_id) < (SELECT"
+                    " MAX(r.checkpoint_id) FROM checkpoints r WHERE r.thread_id = s.thread_id AND r.checkpoint_ns = ''))"
+                )
+                trimmed = cur.rowcount
+                cur.execute(
+                    "DELETE FROM checkpoints WHERE rowid IN (SELECT rowid FROM (SELECT rowid, ROW_NUMBER() OVER"
+                    " (PARTITION BY thread_id, checkpoint_ns ORDER BY checkpoint_id DESC) AS rn FROM checkpoints)"
+                    " WHERE rn > ?)",
+                    (self.max_checkpoints,),
+                )
+                trimmed += cur.rowcount
+                cur.execute(
+                    "DELETE FROM writes WHERE NOT EXISTS (SELECT 1 FROM checkpoints c WHERE c.thread_id ="
+                    " writes.thread_id AND c.checkpoint_ns = writes.checkpoint_ns AND c.checkpoint_id = writes.checkpoint_id)"
+                )
+        self.runs += 1
+        self.last = {"trimmed_checkpoints": trimmed, "deleted_threads": len(expired)}
+        return self.last
+
+    async def run_forever(
+        self, saver: SqliteCheckpointSaver, interval_s: float
+    ) -> None:
+        while True:
+            await asyncio.sleep(interval_s)
+            try:
+                await asyncio.to_thread(self.apply, saver)
+            except Exception as e:
+                print(f"Checkpoint retention failed: {e}")
@@ -0,0 +1,359 @@
+"""Outbound Slack escalation queue (demo).
+
+slack_send_message used to await the remote MCP sendMessage call inside the
+ReAct loop, so a slow Slack path added straight to the user's wait. With the
+queue the tool only enqueues and returns a handle; a worker thread running
+its own event loop delivers in the background:
+
+  - batching: messages queued within batch_window_s by the same agent thread
+    for the same channel and Slack thread are posted as one message (at most
+    batch_max per post) and share its result; messages from different agent
+    threads are never joined
+  - retries: a post that failed before the request was sent (an exception in
+    `retry_on`, e.g. a connect failure) is retried with exponential backoff,
+    max_retries times. Any other failure may have posted, so it is marked
+    failed at once rather than risking a duplicate in Slack
+  - dedupe: the same escalation (channel + normalized text) enqueued again in
+    the same agent thread within dedupe_ttl_s returns the original handle
+    instead of posting twice; a failed escalation may be re-enqueued
+  - rate limiting: token bucket of rate_per_s posts per second, burst `burst`
+
+Handles move queued -> sending -> delivered | failed; status() (and the
+slack_escalation_status tool) reports them. Settings: SLACK_ESCALATION_QUEUE
+(1/0), SLACK_ESCALATION_BATCH_MAX, SLACK_ESCALATION_BATCH_WINDOW_S,
+SLACK_ESCALATION_MAX_RETRIES, SLACK_ESCALATION_RATE_PER_S,
+SLACK_ESCALATION_BURST.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Type
+
+# send(channel, text, thread_ts) -> MCP result
+SendFn = Callable[[str, str, Optional[str]], Awaitable[Any]]
+
+BATCH_SEPARATOR = "\n\n———\n\n"
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _dedupe_key(thread_id: Optional[str], channel: str, text: str) -> str:
+    normalized = " ".join(text.lower().split())
+    return hashlib.sha1(
+        f"{thread_id or ''}\x1f{channel.lower()}\x1f{normalized}".encode("utf-8")
+    ).hexdigest()
+
+
+def _result_summary(result: Any) -> Any:
+    """JSON-friendly view of a fastmcp CallToolResult (or whatever `send` returned)."""
+    for attr in ("data", "structured_content"):
+        value = getattr(result, attr, None)
+        if value is not None:
+            return value
+    return (
+        result
+        if isinstance(result, (dict, list, str, int, float, bool)) or result is None
+        else str(result)
+    )
+
+
+class EscalationQueue:
+    """Background delivery of Slack messages with batching, retries, dedupe and rate limiting."""
+
+    def __init__(
+        self,
+        send: SendFn,
+        batch_max: int = 5,
+        batch_window_s: float = 0.25,
+        max_retries: int = 3,
+        backoff_base_s: float = 0.5,
+        rate_per_s: float = 1.0,
+        burst: int = 3,
+        dedupe_ttl_s: float = 3600,
+        max_records: int = 1000,
+        on_stop: Optional[Callable[[], Awaitable[None]]] = None,
+        retry_on: Tuple[Type[BaseException], ...] = (),
+    ):
+        self._send = send
+        self.batch_max = batch_max
+        self.batch_window_s = batch_window_s
+        self.max_retries = max_retries
+        self.backoff_base_s = backoff_base_s
+        self.rate_per_s = rate_per_s
+        self.burst = burst
+        self.dedupe_ttl_s = dedupe_ttl_s
+        self.max_records = max_records
+        self._on_stop = on_stop
+        self.retry_on = retry_on
+
+        self._records: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._dedupe: Dict[
+            str, Tuple[str, float]
+        ] = {}  # key -> (escalation_id, enqueued monotonic)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._ready = threading.Event()
+        self._pending = 0
+        self._idle = threading.Condition(self._lock)
+
+        self._tokens = float(burst)
+        self._tokens_at = time.monotonic()
+        self.stats = {
+            "enqueued": 0,
+            "duplicates": 0,
+            "posts": 0,
+            "delivered": 0,
+            "failed": 0,
+            "retries": 0,
+            "rate_limited": 0,
+        }
+
+    # ---------- lifecycle ----------
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="slack-escalations", daemon=True
+                )
+                self._thread.start()
+        self._ready.wait()
+
+    def _run(self) -> None:
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._queue = asyncio.Queue()
+        self._ready.set()
+        try:
+            self._loop.run_until_complete(self._worker())
+            if self._on_stop is not None:
+                self._loop.run_until_complete(self._on_stop())
+        finally:
+            self._loop.close()
+
+    def flush(self, timeout_s: float = 30.0) -> bool:
+        """Block until every queued message is delivered or failed; False on timeout."""
+        deadline = time.monotonic() + timeout_s
+        with self._idle:
+            while self._pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._idle.wait(remaining)
+        return True
+
+    def stop(self, timeout_s: float = 10.0) -> None:
+        """Deliver what is queued (up to timeout_s), then stop the worker thread."""
+        if self._thread is None:
+            return
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, None)
+        self._thread.join(timeout_s)
+        with self._lock:
+            self._thread = None
+            self._ready.clear()
+
+    # ---------- public API ----------
+
+    def enqueue(
+        self,
+        channel: str,
+        text: str,
+        thread_ts: Optional[str] = None,
+        thread_id: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Queue a message; returns its handle immediately (the original handle for a duplicate)."""
+        self._ensure_started()
+        key = _dedupe_key(thread_id, channel, text)
+        now = time.monotonic()
+        with self._lock:
+            seen = self._dedupe.get(key)
+            if seen is not None and now - seen[1] <= self.dedupe_ttl_s:
+                record = self._records.get(seen[0])
+                if record is not None and record["status"] != "failed":
+                    self.stats["duplicates"] += 1
+                    return {**self._public(record), "duplicate": True}
+
+            escalation_id = f"esc_{uuid.uuid4().hex[:12]}"
+            record = {
+                "escalation_id": escalation_id,
+                "status": "queued",
+                "channel": channel,
+                "thread_ts": thread_ts,
+                "thread_id": thread_id,
+                "text": text,
+                "attempts": 0,
+                "queued_at": _now(),
+                "delivered_at": None,
+                "error": None,
+                "result": None,
+                "batched_with": 0,
+            }
+            self._records[escalation_id] = record
+            self._dedupe[key] = (escalation_id, now)
+            self._trim()
+            self._pending += 1
+            self.stats["enqueued"] += 1
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, escalation_id)
+        return {**self._public(record), "duplicate": False}
+
+    def status(self, escalation_id: str) -> Dict[str, Any]:
+        with self._lock:
+            record = self._records.get(escalation_id)
+            if record is None:
+                raise ValueError(f"Escalation '{escalation_id}' not found.")
+            return self._public(record)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self.stats,
+                "pending": self._pending,
+                "running": self._thread is not None,
+            }
+
+    # ---------- internals (records under self._lock) ----------
+
+    @staticmethod
+    def _public(record: Dict[str, Any]) -> Dict[str, Any]:
+        return {k: v for k, v in record.items() if k not in ("text", "thread_id")}
+
+    def _trim(self) -> None:
+        now = time.monotonic()
+        for key in [
+            k for k, (_, at) in self._dedupe.items() if now - at > self.dedupe_ttl_s
+        ]:
+            del self._dedupe[key]
+        while len(self._records) > self.max_records:
+            oldest = next(iter(self._records.values()))
+            if oldest["status"] in ("queued", "sending"):
+                break
+            self._records.popitem(last=False)
+
+    def _update(self, ids: List[str], **fields: Any) -> None:
+        with self._lock:
+            for escalation_id in ids:
+                self._records[escalation_id].update(fields)
+            if fields.get("status") in ("delivered", "failed"):
+                self._pending -= len(ids)
+                self.stats[fields["status"]] += len(ids)
+                self._idle.notify_all()
+
+    async def _take_token(self) -> None:
+        while True:
+            now = time.monotonic()
+            self._tokens = min(
+                float(self.burst),
+                self._tokens + (now - self._tokens_at) * self.rate_per_s,
+            )
+            self._tokens_at = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            self.stats["rate_limited"] += 1
+            await asyncio.sleep((1 - self._tokens) / self.rate_per_s)
+
+    async def _next_batch(self) -> Tuple[List[str], bool]:
+        """(escalation ids, stop requested) — waits for one message, then batch_window_s for more."""
+        first = await self._queue.get()
+        if first is None:
+            return [], True
+        batch, stop = [first], False
+        deadline = self._loop.time() + self.batch_window_s
+        while True:
+            timeout = deadline - self._loop.time()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            if item is None:
+                stop = True
+                break
+            batch.append(item)
+        return batch, stop
+
+    async def _worker(self) -> None:
+        stop = False
+        while not stop:
+            batch, stop = await self._next_batch()
+            groups: "OrderedDict[Tuple[str, Optional[str], Optional[str]], List[Dict[str, Any]]]" = (
+                OrderedDict()
+            )
+            with self._lock:
+                for escalation_id in batch:
+                    record = self._records[escalation_id]
+                    key = (record["channel"], record["thread_ts"], record["thread_id"])
+                    groups.setdefault(key, []).append(record)
+            for (channel, thread_ts, _), records in groups.items():
+                for i in range(0, len(records), self.batch_max):
+                    await self._deliver(
+                        channel, thread_ts, records[i : i + self.batch_max]
+                    )
+        # drain anything still queued at stop
+        while not self._queue.empty():
+            escalation_id = self._queue.get_nowait()
+            if escalation_id is not None:
+                record = self._records[escalation_id]
+                await self._deliver(record["channel"], record["thread_ts"], [record])
+
+    async def _deliver(
+        self, channel: str, thread_ts: Optional[str], records: List[Dict[str, Any]]
+    ) -> None:
+        ids = [r["escalation_id"] for r in records]
+        text = BATCH_SEPARATOR.join(r["text"] for r in records)
+        for attempt in range(self.max_retries + 1):
+            await self._take_token()
+            self._update(ids, status="sending", attempts=attempt + 1)
+            try:
+                self.stats["posts"] += 1
+                result = await self._send(channel, text, thread_ts)
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                if not isinstance(e, self.retry_on) or attempt >= self.max_retries:
+                    self._update(ids, status="failed", error=error)
+                    return
+                self._update(ids, status="queued", error=error)
+                self.stats["retries"] += 1
+                await asyncio.sleep(self.backoff_base_s * (2**attempt))
+                continue
+            self._update(
+                ids,
+                status="delivered",
+                delivered_at=_now(),
+                error=None,
+                result=_result_summary(result),
+                batched_with=len(ids) - 1,
+            )
+            return
+
+
+def make_escalation_queue(
+    send: SendFn,
+    on_stop: Optional[Callable[[], Awaitable[None]]] = None,
+    retry_on: Tuple[Type[BaseException], ...] = (),
+) -> Optional[EscalationQueue]:
+    if os.getenv("SLACK_ESCALATION_QUEUE", "1").lower() in ("0", "false", "no"):
+        return None
+    return EscalationQueue(
+        send,
+        batch_max=int(os.getenv("SLACK_ESCALATION_BATCH_MAX", "5")),
+        batch_window_s=float(os.getenv("SLACK_ESCALATION_BATCH_WINDOW_S", "0.25")),
+        max_retries=int(os.getenv("SLACK_ESCALATION_MAX_RETRIES", "3")),
+        rate_per_s=float(os.getenv("SLACK_ESCALATION_RATE_PER_S", "1")),
+        burst=int(os.getenv("SLACK_ESCALATION_BURST", "3")),
+        on_stop=on_stop,
+        retry_on=retry_on,
+    )
@@ -1,19 +1,68 @@
 """Mastercard Payment Operations Agent - LangGraph implementation with ReAct agent."""
 
-from langchain_core.messages import AIMessage
-from langgraph.checkpoint.memory import MemorySaver
+import asyncio
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Tuple
+
+from langchain_core.messages import AIMessage, HumanMessage
 from langgraph.prebuilt import create_react_agent
-from traceloop.sdk.decorators import task, workflow
 
-from src.agent.payments_tools import tools
+from src.agent.checkpointer import make_checkpointer
+from src.agent.history import history_hook
+from src.agent.response_cache import (
+    entity_ids,
+    make_response_cache,
+    normalize_question,
+    turn_messages,
+)
+from src.agent.router import build_routed_agent
+from src.agent.payments_tools import PAYMENTS_STORE_HOLDER, tools
 from src.agent.llm import llm
 from src.agent.prompt import prompt_template
+from src.agent.singleflight import make_agent_coalescer
+from src.agent.tracing import task, workflow
+
+# 1. Initialize State/Memory (AGENT_CHECKPOINTER=memory|sqlite)
+memory = make_checkpointer()
+
+
+def build_agent(model: Any, checkpointer: Any = None) -> Any:
+    """
+    The ReAct agent behind the fast-path router, both driven by `model`
+    (benchmarks/ swaps in a scripted fake). Defaults to the shared checkpointer.
+    """
+    # 2. Compile the ReAct Agent (runs inside the routed graph, which owns the checkpointer)
+    react_agent = create_react_agent(
+        model=model,
+        tools=tools,
+        prompt=prompt_template,
+        pre_model_hook=history_hook,  # compacts old tool outputs in the model input only
+    )
+    # 3. Fast path for canned single-tool requests in front of the ReAct loop
+    return build_routed_agent(
+        react_agent,
+        model,
+        checkpointer=memory if checkpointer is None else checkpointer,
+    )
+
 
-# 1. Initialize State/Memory
-memory = MemorySaver()
+AGENT = build_agent(llm)
+
+# 4. Response cache for repeated questions (AGENT_RESPONSE_CACHE=0 disables); cleared on data reload
+RESPONSE_CACHE = make_response_cache(PAYMENTS_STORE_HOLDER, {t.name: t for t in tools})
+
+# 5. Identical questions on new threads share one in-flight run (AGENT_COALESCE=1 enables)
+AGENT_COALESCER = make_agent_coalescer()
+
+
+def _message_text(message) -> str:
+    content = message.content
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return " ".join([str(item) for item in content])
+    return str(content)
 
-# 2. Compile the ReAct Agent
-AGENT = create_react_agent(model=llm, tools=tools, prompt=prompt_template, checkpointer=memory)
 
 @task()
 async def get_ai_response(events):
@@ -23,12 +72,7 @@ async def get_ai_response(events):
             last_message = event["messages"][-1]
             if isinstance(last_message, AIMessage) and not last_message.tool_calls:
                 try:
-                    content = last_message.content
-                    if isinstance(content, str):
-                        return content
-                    if isinstance(content, list):
-                        return " ".join([str(item) for item in content])
-                    return str(content)
+                    return _message_text(last_message)
                 except Exception as e:
                     print(f"Error extracting response: {e}")
                     return "An error occurred while processing the response."
@@ -44,18 +88,214 @@ def print_event(event):
         message.pretty_print()
 
 
+@task()
+async def get_cached_response(config: Dict[str, Any], user_input: str) -> Optional[str]:
+    """Cached answer for this question, appended to the thread so follow-ups keep their context."""
+    if RESPONSE_CACHE is None:
+        return None
+    state = await AGENT.aget_state(config)
+    # mid-conversation questions may lean on earlier turns; only serve those that name an entity
+    if state.values.get("messages") and not entity_ids(user_input):
+        return None
+    response = await RESPONSE_CACHE.lookup(user_input)
+    if response is not None:
+        await AGENT.aupdate_state(
+            config,
+            {
+                "messages": [
+                    HumanMessage(content=user_input),
+                    AIMessage(content=response),
+                ]
+            },
+            as_node="agent",
+        )
+    return response
+
+
+async def remember_response(
+    config: Dict[str, Any], user_input: str, response: Optional[str]
+) -> None:
+    """Offer a finished first-turn answer to the response cache."""
+    if RESPONSE_CACHE is None or response is None:
+        return
+    state = await AGENT.aget_state(config)
+    run, first_turn = turn_messages(state.values.get("messages", []))
+    if first_turn:
+        await RESPONSE_CACHE.store(user_input, response, run)
+
+
 @workflow(name="mastercard-payment-ops-agent")
 async def run_agent(thread_id: str, user_input: str):
     """Run the Mastercard payment ops agent with user input and return response."""
     config = {"configurable": {"thread_id": thread_id}}
-    inputs = {"messages": [("user", user_input)]}
 
+    cached = await get_cached_response(config, user_input)
+    if cached is not None:
+        return {"response": cached, "cached": True}
+
+    response, coalesced = await run_coalesced(config, user_input)
+    if response is None:
+        response = "An internal error has occurred."
+    return {"response": response, "cached": False, "coalesced": coalesced}
+
+
+async def _run(config: Dict[str, Any], user_input: str) -> Optional[str]:
+    inputs = {"messages": [("user", user_input)]}
     events = []
     async for event in AGENT.astream(inputs, config=config, stream_mode="values"):
         print_event(event)
         events.append(event)
 
     response = await get_ai_response(events)
-    if response is None:
-        response = "An internal error has occurred."
-    return {"response": response}
\ No newline at end of file
+    await remember_response(config, user_input, response)
+    return response
+
+
+async def run_coalesced(
+    config: Dict[str, Any],
+    user_input: str,
+    run: Optional[Callable[[], Awaitable[Optional[str]]]] = None,
+) -> Tuple[Optional[str], bool]:
+    """
+    (answer, shared?). On a new thread, an identical question (same text up to case,
+    whitespace and trailing punctuation, same data version) already running, or
+    finished within AGENT_COALESCE_WINDOW_S, is answered by that run; the answer is
+    appended to this thread so follow-ups keep context. `run` performs the agent run
+    when this caller has to (default: _run; stream_agent passes its streaming run).
+    """
+    if run is None:
+        run = lambda: _run(config, user_input)  # noqa: E731
+    if AGENT_COALESCER is None:
+        return await run(), False
+    state = await AGENT.aget_state(config)
+    if state.values.get("messages"):
+        return await run(), False
+
+    key = (PAYMENTS_STORE_HOLDER.version, normalize_question(user_input))
+    response, shared = await AGENT_COALESCER.do(key, run, group="run_agent")
+    if shared and response is not None:
+        await AGENT.aupdate_state(
+            config,
+            {
+                "messages": [
+                    HumanMessage(content=user_input),
+                    AIMessage(content=response),
+                ]
+            },
+            as_node="agent",
+        )
+    return response, shared
+
+
+def _chunk_text(chunk) -> str:
+    content = getattr(chunk, "content", None)
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        # content blocks: keep the text parts only
+        return "".join(
+            item if isinstance(item, str) else item.get("text", "")
+            for item in content
+            if isinstance(item, (str, dict))
+        )
+    return ""
+
+
+async def _stream_run(
+    config: Dict[str, Any], user_input: str, emit: Callable[[Dict[str, Any]], None]
+) -> Optional[str]:
+    """_run, passing token and tool events to `emit` as they happen."""
+    inputs = {"messages": [("user", user_input)]}
+    started: Dict[str, float] = {}
+    async for event in AGENT.astream_events(inputs, config=config, version="v2"):
+        kind = event["event"]
+        if kind == "on_chat_model_stream":
+            # only the ReAct agent's model speaks for the agent; the router's phrasing call
+            # (fast path) is not streamed, its answer arrives with the final event
+            if event.get("metadata", {}).get("langgraph_node") != "agent":
+                continue
+            text = _chunk_text(event["data"].get("chunk"))
+            if text:
+                emit({"type": "token", "content": text})
+        elif kind == "on_tool_start":
+            started[event["run_id"]] = time.perf_counter()
+            emit(
+                {
+                    "type": "tool_start",
+                    "name": event["name"],
+                    "run_id": event["run_id"],
+                    "input": event["data"].get("input"),
+                }
+            )
+        elif kind == "on_tool_end":
+            t0 = started.pop(event["run_id"], None)
+            emit(
+                {
+                    "type": "tool_end",
+                    "name": event["name"],
+                    "run_id": event["run_id"],
+                    "elapsed_ms": round((time.perf_counter() - t0) * 1000, 1)
+                    if t0 is not None
+                    else None,
+                }
+            )
+
+    state = await AGENT.aget_state(config)
+    response = await get_ai_response([state.values])
+    await remember_response(config, user_input, response)
+    return response
+
+
+@workflow(name="mastercard-payment-ops-agent-stream")
+async def stream_agent(
+    thread_id: str, user_input: str
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Run the agent like run_agent (response cache, coalescing, fast path) and yield
+    events as they happen:
+      {"type": "token", "content": ...}          ReAct agent output tokens
+      {"type": "tool_start", "name", "run_id", "input"}
+      {"type": "tool_end", "name", "run_id", "elapsed_ms"}
+      {"type": "final", "response": ..., "cached": bool, "coalesced": bool}
+      {"type": "error", "message": ...}
+    Tokens of a model step that ends in tool calls are usually empty; the text of
+    the last step is the answer, repeated in the final event. Cached and coalesced
+    answers arrive as one token; fast-path answers only with the final event.
+    """
+    config = {"configurable": {"thread_id": thread_id}}
+
+    cached = await get_cached_response(config, user_input)
+    if cached is not None:
+        yield {"type": "token", "content": cached}
+        yield {"type": "final", "response": cached, "cached": True, "coalesced": False}
+        return
+
+    events: "asyncio.Queue[Optional[Dict[str, Any]]]" = asyncio.Queue()
+    run = asyncio.ensure_future(
+        run_coalesced(
+            config,
+            user_input,
+            lambda: _stream_run(config, user_input, events.put_nowait),
+        )
+    )
+    run.add_done_callback(lambda _: events.put_nowait(None))
+    try:
+        while (event := await events.get()) is not None:
+            yield event
+        response, coalesced = run.result()
+    except Exception as e:
+        print(f"Error while streaming agent run: {e}")
+        yield {"type": "error", "message": "An internal error has occurred."}
+        return
+    finally:
+        # the client went away: stop waiting (a run shared with other callers keeps going)
+        run.cancel()
+
+    if coalesced and response is not None:
+        yield {"type": "token", "content": response}
+    yield {
+        "type": "final",
+        "response": response or "An internal error has occurred.",
+        "cached": False,
+        "coalesced": coalesced,
+    }
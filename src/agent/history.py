@@ -0,0 +1,181 @@
+"""Conversation history compaction before each LLM call (demo).
+
+create_react_agent sends a thread's whole message history to the model on every
+step, so verbose tool results from earlier turns (transaction lists, policy
+snippets, ...) make every later call slower. `compact_history` runs as the
+agent's pre_model_hook: when the history is over AGENT_HISTORY_TOKEN_BUDGET
+(approximate tokens), tool outputs older than the last AGENT_HISTORY_KEEP_TURNS
+user turns are replaced, oldest first, by a short stub that keeps their scalar
+facts (IDs, counts, verdicts, reasons) until the prompt fits.
+
+Only the model input is compacted: the checkpointed thread state keeps the full
+messages, and message ids / tool_call_ids are preserved so tool calls still pair
+up. Savings are tracked in HISTORY_STATS (served at GET /admin/stats).
+
+The thread state itself is bounded by `trim_thread`: once a thread holds more
+than AGENT_MAX_THREAD_MESSAGES messages, its oldest whole user turns are
+removed from the checkpointed state (the router applies it at the start of
+every turn). Checkpoint retention alone cannot do that, because the newest
+checkpoint always carries the full message list.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from typing import Any, Dict, List, Sequence, Tuple
+
+from langchain_core.messages import (
+    BaseMessage,
+    HumanMessage,
+    RemoveMessage,
+    ToolMessage,
+)
+from langchain_core.messages.utils import count_tokens_approximately
+
+# Tool outputs at or below this many tokens are never worth eliding.
+MIN_ELIDE_TOKENS = 200
+# Per-value cap for facts kept in an elided stub.
+_MAX_FACT_CHARS = 120
+
+
+class HistoryStats:
+    """Process-wide counters for compact_history (thread-safe)."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.compacted_calls = 0
+        self.elided_messages = 0
+        self.tokens_in = 0
+        self.tokens_out = 0
+        self.thread_trims = 0
+        self.trimmed_messages = 0
+
+    def record_trim(self, removed: int) -> None:
+        with self._lock:
+            self.thread_trims += 1
+            self.trimmed_messages += removed
+
+    def record(self, before: int, after: int, elided: int) -> None:
+        with self._lock:
+            self.calls += 1
+            self.tokens_in += before
+            self.tokens_out += after
+            if elided:
+                self.compacted_calls += 1
+                self.elided_messages += elided
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "compacted_calls": self.compacted_calls,
+                "elided_messages": self.elided_messages,
+                "tokens_in": self.tokens_in,
+                "tokens_out": self.tokens_out,
+                "tokens_saved": self.tokens_in - self.tokens_out,
+                "thread_trims": self.thread_trims,
+                "trimmed_messages": self.trimmed_messages,
+            }
+
+
+HISTORY_STATS = HistoryStats()
+
+
+def _facts(content: Any) -> str:
+    """Top-level scalar fields of a JSON tool result, e.g. merchant_id / count / verdict."""
+    if not isinstance(content, str):
+        return ""
+    try:
+        data = json.loads(content)
+    except ValueError:
+        return ""
+    if not isinstance(data, dict):
+        return ""
+    facts = []
+    for key, value in data.items():
+        if isinstance(value, (str, int, float, bool)) or value is None:
+            text = json.dumps(value)
+            if len(text) > _MAX_FACT_CHARS:
+                text = text[:_MAX_FACT_CHARS] + '..."'
+            facts.append(f"{key}={text}")
+    return ", ".join(facts)
+
+
+def elide_tool_message(message: ToolMessage, tokens: int) -> ToolMessage:
+    facts = _facts(message.content)
+    stub = f"[earlier {message.name or 'tool'} output elided (~{tokens} tokens)"
+    stub += (
+        f"; key facts: {facts}]"
+        if facts
+        else "; call the tool again if the details are needed]"
+    )
+    return message.model_copy(update={"content": stub})
+
+
+def compact_history(
+    messages: Sequence[BaseMessage], budget: int, keep_turns: int
+) -> Tuple[List[BaseMessage], int, int, int]:
+    """(messages for the model, tokens before, tokens after, messages elided)."""
+    out = list(messages)
+    sizes = [count_tokens_approximately([m]) for m in out]
+    before = total = sum(sizes)
+    if budget <= 0 or total <= budget:
+        return out, before, total, 0
+
+    # index of the first message of the last `keep_turns` user turns; everything from there stays verbatim
+    human = [i for i, m in enumerate(out) if isinstance(m, HumanMessage)]
+    kept = human[-keep_turns:] if keep_turns > 0 else []
+    protected_from = kept[0] if kept else len(out)
+
+    elided = 0
+    for i in range(protected_from):
+        if total <= budget:
+            break
+        m = out[i]
+        if isinstance(m, ToolMessage) and sizes[i] > MIN_ELIDE_TOKENS:
+            stub = elide_tool_message(m, sizes[i])
+            stub_size = count_tokens_approximately([stub])
+            total -= sizes[i] - stub_size
+            out[i], sizes[i] = stub, stub_size
+            elided += 1
+    return out, before, total, elided
+
+
+def history_hook(state: Dict[str, Any]) -> Dict[str, Any]:
+    """pre_model_hook for create_react_agent: compacted model input, thread state unchanged."""
+    budget = int(os.getenv("AGENT_HISTORY_TOKEN_BUDGET", "6000"))
+    keep_turns = int(os.getenv("AGENT_HISTORY_KEEP_TURNS", "2"))
+    messages, before, after, elided = compact_history(
+        state["messages"], budget, keep_turns
+    )
+    HISTORY_STATS.record(before, after, elided)
+    return {"llm_input_messages": messages}
+
+
+def trim_thread(
+    messages: Sequence[BaseMessage], max_messages: int
+) -> List[RemoveMessage]:
+    """
+    RemoveMessage updates that drop the oldest user turns until at most `max_messages`
+    remain (0 disables). Cuts fall on HumanMessage boundaries, so tool calls and their
+    results are removed together; the latest user turn is always kept.
+    """
+    if max_messages <= 0 or len(messages) <= max_messages:
+        return []
+    starts = [i for i, m in enumerate(messages) if isinstance(m, HumanMessage)]
+    cut = next(
+        (i for i in starts if len(messages) - i <= max_messages),
+        starts[-1] if starts else 0,
+    )
+    return [RemoveMessage(id=m.id) for m in messages[:cut] if m.id]
+
+
+def thread_trim_update(messages: Sequence[BaseMessage]) -> List[RemoveMessage]:
+    """trim_thread with AGENT_MAX_THREAD_MESSAGES (default 200), counted in HISTORY_STATS."""
+    removals = trim_thread(messages, int(os.getenv("AGENT_MAX_THREAD_MESSAGES", "200")))
+    if removals:
+        HISTORY_STATS.record_trim(len(removals))
+    return removals
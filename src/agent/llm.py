@@ -3,22 +3,28 @@
 import os
 from langchain_openai import ChatOpenAI
 
+# Unset: stream only when the caller consumes tokens (stream_agent / astream_events)
+# and use plain requests otherwise. LLM_STREAMING=true/false forces one mode.
+_streaming = os.getenv("LLM_STREAMING")
+_streaming_kwargs = (
+    {} if not _streaming else {"streaming": _streaming.lower() in ("1", "true", "yes")}
+)
+
 llm = ChatOpenAI(
     model=os.getenv("LLM_MODEL", "openai-main/gpt-4o-mini"),
     temperature=0.1,
     max_tokens=768,
-    streaming=False,
     api_key=os.getenv("TFY_API_KEY"),
     base_url=os.getenv(
         "LLM_GATEWAY_URL",
         "https://gateway.truefoundry.ai",
     ),
     model_kwargs={
-      "stream": False,
-      "extra_headers":{
-        "X-TFY-METADATA": '{}',
-        "X-TFY-LOGGING-CONFIG": '{"enabled": true}',
-        # "X-TFY-GUARDRAILS": '{"llm_input_guardrails":["pii-guardrail/pii-guardrail"],"llm_output_guardrails":[]}',
-      },
+        "extra_headers": {
+            "X-TFY-METADATA": "{}",
+            "X-TFY-LOGGING-CONFIG": '{"enabled": true}',
+            # "X-TFY-GUARDRAILS": '{"llm_input_guardrails":["pii-guardrail/pii-guardrail"],"llm_output_guardrails":[]}',
+        },
     },
-)
\ No newline at end of file
+    **_streaming_kwargs,
+)
@@ -0,0 +1,329 @@
+"""Shared, long-lived MCP client for the Slack tools (demo).
+
+Opening a fastmcp Client means an HTTP connect plus the MCP initialize
+handshake. Doing that for every slack_send_message / slack_get_conversations
+call costs more than the call itself. MCPClientPool keeps one connected client
+and reuses it:
+
+  - lazy: nothing connects until the first call
+  - loop-aware: a client is bound to the event loop that opened it. When a
+    call arrives on a different loop (the standalone Streamlit app runs each
+    turn under asyncio.run), the old client is closed on its own loop (if that
+    loop is still open) and a new one is opened on the current loop. A pool
+    serves one loop at a time: code running on its own loop, like the
+    escalation worker, gets its own pool
+  - keep-alive: a client idle for more than keepalive_s is pinged before use;
+    a failed ping reconnects
+  - concurrency: at most max_concurrency calls in flight per pool
+  - failures: connection errors drop the client and reconnect with exponential
+    backoff. Calls that are not idempotent (sendMessage) are retried only when
+    the failure happened while connecting, so a message is never posted twice;
+    a connect failure that outlasts the retries raises MCPConnectError.
+    Errors the server answered with (ToolError, McpError) are raised as-is
+  - per-call timeout (call_timeout_s): raised to that caller only; the session
+    stays up for the other calls
+  - leases: a dropped client is closed only after the calls still running on
+    it have finished
+  - TTL caches for list_tools() and for read-only tools (cache_ttl_s, by
+    tool name; getConversations by default)
+
+The client factory is injectable, so tests can point the pool at a local
+stand-in server, e.g. `MCPClientPool(lambda: Client(FastMCP("stub")))`; see
+test-files/test_mcp_pool.py. Settings: SLACK_MCP_MAX_CONCURRENCY,
+SLACK_MCP_CALL_TIMEOUT_S, SLACK_MCP_MAX_RETRIES, SLACK_MCP_KEEPALIVE_S,
+SLACK_MCP_CONVERSATIONS_TTL_S, SLACK_MCP_TOOLS_TTL_S.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, Tuple
+
+import httpx
+
+try:
+    from mcp.shared.exceptions import McpError
+except ImportError:  # mcp >= 2 spells it MCPError
+    from mcp.shared.exceptions import MCPError as McpError
+
+if TYPE_CHECKING:
+    from fastmcp import Client
+
+# fastmcp (~1s to import) is loaded on the first Slack call, not at startup
+ClientFactory = Callable[[], "Client"]
+
+
+def slack_client_factory() -> Client:
+    from fastmcp import Client
+    from fastmcp.client.transports import StreamableHttpTransport
+
+    transport = StreamableHttpTransport(
+        url=os.getenv("TFY_SLACK_MCP_URL"),
+        headers={"Authorization": f"Bearer {os.getenv('TFY_API_KEY')}"},
+    )
+    return Client(transport=transport)
+
+
+class MCPConnectError(ConnectionError):
+    """Opening the client failed (cause chained), so no request reached the server and any call may be retried."""
+
+
+class MCPClientPool:
+    """Lazily connected, reconnecting MCP client shared by all tool calls."""
+
+    def __init__(
+        self,
+        client_factory: ClientFactory,
+        max_concurrency: int = 8,
+        call_timeout_s: float = 15.0,
+        max_retries: int = 2,
+        backoff_base_s: float = 0.25,
+        backoff_max_s: float = 5.0,
+        keepalive_s: float = 60.0,
+        tools_ttl_s: float = 300.0,
+        cache_ttl_s: Optional[Dict[str, float]] = None,
+    ):
+        self.client_factory = client_factory
+        self.max_concurrency = max_concurrency
+        self.call_timeout_s = call_timeout_s
+        self.max_retries = max_retries
+        self.backoff_base_s = backoff_base_s
+        self.backoff_max_s = backoff_max_s
+        self.keepalive_s = keepalive_s
+        self.tools_ttl_s = tools_ttl_s
+        self.cache_ttl_s = dict(cache_ttl_s or {})
+
+        # all per-loop state; replaced together when the running loop changes
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._client: Optional[Client] = None
+        self._last_used = 0.0
+        self._connect_lock: Optional[asyncio.Lock] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._leases: Dict[int, int] = {}  # id(client) -> calls in flight
+        self._retired: Dict[
+            int, Client
+        ] = {}  # dropped clients waiting for their calls to finish
+
+        self._cache: Dict[Tuple[str, str], Tuple[float, Any]] = {}
+        self._cache_lock = threading.Lock()
+        self._bind_lock = threading.Lock()
+        self.stats = {
+            "connects": 0,
+            "reconnects": 0,
+            "calls": 0,
+            "retries": 0,
+            "timeouts": 0,
+            "cache_hits": 0,
+            "loop_switches": 0,
+        }
+
+    # ---------- connection management ----------
+
+    def _bind_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        with self._bind_lock:
+            if loop is self._loop:
+                return
+            old_loop = self._loop
+            old_clients = [self._client, *self._retired.values()]
+            self._loop = loop
+            self._client = None
+            self._leases = {}
+            self._retired = {}
+            self._connect_lock = asyncio.Lock()
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            if old_loop is not None:
+                self.stats["loop_switches"] += 1
+        # a client can only be closed on the loop that opened it; a closed loop has already torn it down
+        if old_loop is not None and not old_loop.is_closed():
+            for client in old_clients:
+                if client is not None:
+                    asyncio.run_coroutine_threadsafe(self._close(client), old_loop)
+
+    async def _connected_client(self) -> Client:
+        async with self._connect_lock:
+            client = self._client
+            if (
+                client is not None
+                and time.monotonic() - self._last_used > self.keepalive_s
+            ):
+                try:
+                    await asyncio.wait_for(client.ping(), timeout=self.call_timeout_s)
+                except Exception:
+                    await self._discard(client)
+                    client = None
+            if client is None:
+                client = self.client_factory()
+                try:
+                    await asyncio.wait_for(
+                        client.__aenter__(), timeout=self.call_timeout_s
+                    )
+                except Exception as e:
+                    raise MCPConnectError(str(e) or type(e).__name__) from e
+                self.stats["connects"] += 1
+                self._client = client
+            self._last_used = time.monotonic()
+            self._leases[id(client)] = self._leases.get(id(client), 0) + 1
+            return client
+
+    async def _release(self, client: Client) -> None:
+        left = self._leases.get(id(client), 0) - 1
+        if left > 0:
+            self._leases[id(client)] = left
+            return
+        self._leases.pop(id(client), None)
+        retired = self._retired.pop(id(client), None)
+        if retired is not None:
+            await self._close(retired)
+
+    async def _discard(self, client: Client) -> None:
+        """Stop handing out `client`; close it now, or when its last call in flight is released."""
+        if self._client is client:
+            self._client = None
+        if self._leases.get(id(client), 0) > 0:
+            self._retired[id(client)] = client
+        else:
+            await self._close(client)
+
+    async def _close(self, client: Client) -> None:
+        try:
+            await asyncio.wait_for(client.__aexit__(None, None, None), timeout=2.0)
+        except Exception:
+            pass
+
+    async def close(self) -> None:
+        """Close the client opened on the running loop, if any."""
+        if self._client is not None and self._loop is asyncio.get_running_loop():
+            await self._discard(self._client)
+
+    def _backoff(self, attempt: int) -> float:
+        delay = min(self.backoff_max_s, self.backoff_base_s * (2**attempt))
+        return delay * (0.5 + random.random() / 2)
+
+    async def _run(self, op: Callable[[Client], Any], idempotent: bool) -> Any:
+        from fastmcp.exceptions import ClientError, FastMCPError
+
+        # the server answered (ToolError is a FastMCPError): the session is fine, and a retry gets the same answer
+        answered = (FastMCPError, ClientError, McpError)
+        self._bind_loop()
+        async with self._semaphore:
+            attempt = 0
+            while True:
+                client = None
+                try:
+                    client = await self._connected_client()
+                    try:
+                        result = await asyncio.wait_for(
+                            op(client), timeout=self.call_timeout_s
+                        )
+                    finally:
+                        await self._release(client)
+                    self._last_used = time.monotonic()
+                    return result
+                except answered:
+                    raise
+                except Exception as e:
+                    timed_out = isinstance(
+                        e, (asyncio.TimeoutError, httpx.TimeoutException)
+                    )
+                    if timed_out:
+                        self.stats["timeouts"] += 1
+                    # a timeout only gives up on this call; other calls keep the session
+                    if client is not None and not timed_out:
+                        await self._discard(client)
+                        self.stats["reconnects"] += 1
+                    retryable = idempotent or isinstance(e, MCPConnectError)
+                    if not retryable or attempt >= self.max_retries:
+                        raise
+                    await asyncio.sleep(self._backoff(attempt))
+                    attempt += 1
+                    self.stats["retries"] += 1
+
+    # ---------- TTL cache ----------
+
+    def _cached(self, key: Tuple[str, str]) -> Tuple[bool, Any]:
+        with self._cache_lock:
+            hit = self._cache.get(key)
+            if hit is None:
+                return False, None
+            expires_at, value = hit
+            if time.monotonic() >= expires_at:
+                del self._cache[key]
+                return False, None
+            self.stats["cache_hits"] += 1
+            return True, value
+
+    def _remember(self, key: Tuple[str, str], value: Any, ttl_s: float) -> None:
+        if ttl_s > 0:
+            with self._cache_lock:
+                self._cache[key] = (time.monotonic() + ttl_s, value)
+
+    def clear_cache(self) -> None:
+        with self._cache_lock:
+            self._cache.clear()
+
+    # ---------- public API ----------
+
+    async def list_tools(self) -> Any:
+        key = ("list_tools", "")
+        found, value = self._cached(key)
+        if found:
+            return value
+        value = await self._run(lambda c: c.list_tools(), idempotent=True)
+        self._remember(key, value, self.tools_ttl_s)
+        return value
+
+    async def call_tool(
+        self,
+        tool_name: str,
+        tool_args: Dict[str, Any],
+        idempotent: Optional[bool] = None,
+    ) -> Any:
+        """
+        Call an MCP tool on the shared client. Tools listed in cache_ttl_s are
+        read-only: cached per argument set and always retried; other tools are
+        retried only when `idempotent` is True.
+        """
+        ttl_s = self.cache_ttl_s.get(tool_name, 0.0)
+        key = (tool_name, json.dumps(tool_args, sort_keys=True, default=str))
+        if ttl_s > 0:
+            found, value = self._cached(key)
+            if found:
+                return value
+        self.stats["calls"] += 1
+        value = await self._run(
+            lambda c: c.call_tool(tool_name, tool_args),
+            idempotent=bool(idempotent) if idempotent is not None else ttl_s > 0,
+        )
+        self._remember(key, value, ttl_s)
+        return value
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._cache_lock:
+            cached = len(self._cache)
+        return {
+            **self.stats,
+            "connected": self._client is not None,
+            "cached_results": cached,
+        }
+
+
+def make_slack_pool(
+    client_factory: ClientFactory = slack_client_factory,
+) -> MCPClientPool:
+    return MCPClientPool(
+        client_factory,
+        max_concurrency=int(os.getenv("SLACK_MCP_MAX_CONCURRENCY", "8")),
+        call_timeout_s=float(os.getenv("SLACK_MCP_CALL_TIMEOUT_S", "15")),
+        max_retries=int(os.getenv("SLACK_MCP_MAX_RETRIES", "2")),
+        keepalive_s=float(os.getenv("SLACK_MCP_KEEPALIVE_S", "60")),
+        tools_ttl_s=float(os.getenv("SLACK_MCP_TOOLS_TTL_S", "300")),
+        cache_ttl_s={
+            "getConversations": float(os.getenv("SLACK_MCP_CONVERSATIONS_TTL_S", "60"))
+        },
+    )
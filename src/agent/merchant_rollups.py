@@ -0,0 +1,302 @@
+"""Per-merchant rolling-window aggregates for compliance and risk tools (demo).
+
+Instead of handing the LLM hundreds of raw rows, the merchant_summary tool
+serves small rollups for rolling windows (1h / 24h / 48h / 30d):
+
+  - approved / declined counts and decline rate
+  - decline-code histogram
+  - risk-score percentiles (p50/p90/p99, 0.01 resolution) and max
+  - amount totals
+  - chargeback count, amount and ratio derived from Chargeback rows
+
+Each merchant's rows are folded once into hourly buckets the first time the
+merchant is asked for. A window is exact, [as_of - window, as_of] like the
+row-scan tools: the whole hours inside it come from the buckets, and the
+partial hours at both edges are read from the transaction index (a bisect
+range of at most two hours of rows). The whole-hour part is cached per merchant
+in a small LRU keyed by (first hour, last hour), so a repeated call only
+re-reads the edge rows.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+BUCKET_S = 3600
+RISK_BINS = 101  # 0.00 .. 1.00 in steps of 0.01
+CACHE_SIZE = 64  # whole-hour aggregates kept per merchant
+
+Row = Tuple[
+    float, str, Optional[str], float, float
+]  # (epoch, status, decline_code, risk_score, amount)
+
+WINDOWS: Dict[str, int] = {
+    "1h": 3600,
+    "24h": 24 * 3600,
+    "48h": 48 * 3600,
+    "30d": 30 * 24 * 3600,
+}
+
+
+class _Bucket:
+    __slots__ = (
+        "approved",
+        "declined",
+        "amount",
+        "approved_amount",
+        "decline_codes",
+        "risk_hist",
+        "risk_max",
+        "chargebacks",
+        "chargeback_amount",
+    )
+
+    def __init__(self) -> None:
+        self.approved = 0
+        self.declined = 0
+        self.amount = 0.0
+        self.approved_amount = 0.0
+        self.decline_codes: Dict[str, int] = {}
+        self.risk_hist = [0] * RISK_BINS
+        self.risk_max: Optional[float] = None
+        self.chargebacks = 0
+        self.chargeback_amount = 0.0
+
+    def add_transaction(
+        self, status: str, decline_code: Optional[str], risk_score: float, amount: float
+    ) -> None:
+        self.amount += amount
+        if status == "declined":
+            self.declined += 1
+            code = decline_code or "UNKNOWN"
+            self.decline_codes[code] = self.decline_codes.get(code, 0) + 1
+        else:
+            self.approved += 1
+            self.approved_amount += amount
+        self.risk_hist[min(max(int(round(risk_score * 100)), 0), RISK_BINS - 1)] += 1
+        if self.risk_max is None or risk_score > self.risk_max:
+            self.risk_max = risk_score
+
+    def add_chargeback(self, amount: float) -> None:
+        self.chargebacks += 1
+        self.chargeback_amount += amount
+
+    def merge(self, other: "_Bucket") -> None:
+        self.approved += other.approved
+        self.declined += other.declined
+        self.amount += other.amount
+        self.approved_amount += other.approved_amount
+        self.chargebacks += other.chargebacks
+        self.chargeback_amount += other.chargeback_amount
+        for code, n in other.decline_codes.items():
+            self.decline_codes[code] = self.decline_codes.get(code, 0) + n
+        if other.risk_max is not None:
+            self.risk_hist = [x + y for x, y in zip(self.risk_hist, other.risk_hist)]
+            self.risk_max = (
+                other.risk_max
+                if self.risk_max is None
+                else max(self.risk_max, other.risk_max)
+            )
+
+
+def _percentile(hist: List[int], total: int, q: float) -> Optional[float]:
+    if not total:
+        return None
+    target = q * total
+    seen = 0
+    for i, n in enumerate(hist):
+        seen += n
+        if seen >= target:
+            return i / (RISK_BINS - 1)
+    return 1.0
+
+
+class MerchantRollup:
+    """Hourly buckets for one merchant plus an LRU of whole-hour range aggregates."""
+
+    def __init__(
+        self,
+        rows_between: Callable[[float, float], Iterable[Row]],
+        chargebacks_between: Callable[[float, float], Iterable[Tuple[float, float]]],
+        cache_size: int = CACHE_SIZE,
+    ) -> None:
+        self._buckets: Dict[int, _Bucket] = {}
+        self._keys: List[int] = []  # sorted bucket keys
+        self._rows_between = rows_between
+        self._chargebacks_between = chargebacks_between
+        self._cache: "OrderedDict[Tuple[int, int], _Bucket]" = OrderedDict()
+        self._cache_size = cache_size
+
+    def _bucket(self, epoch: float) -> _Bucket:
+        key = int(epoch // BUCKET_S)
+        b = self._buckets.get(key)
+        if b is None:
+            b = self._buckets[key] = _Bucket()
+            pos = bisect_left(self._keys, key)
+            self._keys.insert(pos, key)
+        self._cache.clear()
+        return b
+
+    def add_transaction(
+        self,
+        epoch: float,
+        status: str,
+        decline_code: Optional[str],
+        risk_score: float,
+        amount: float,
+    ) -> None:
+        """Fold one row into its bucket (the row must also be in the index behind `rows_between`)."""
+        self._bucket(epoch).add_transaction(status, decline_code, risk_score, amount)
+
+    def add_chargeback(self, epoch: float, amount: float) -> None:
+        self._bucket(epoch).add_chargeback(amount)
+
+    def _whole_hours(self, first_key: int, last_key: int) -> _Bucket:
+        cache_key = (first_key, last_key)
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            self._cache.move_to_end(cache_key)
+            return cached
+        total = _Bucket()
+        for key in self._keys[
+            bisect_left(self._keys, first_key) : bisect_right(self._keys, last_key)
+        ]:
+            total.merge(self._buckets[key])
+        self._cache[cache_key] = total
+        while len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+        return total
+
+    def summary(self, window_s: int, as_of: float) -> Dict[str, Any]:
+        start = as_of - window_s
+        first_key = math.ceil(
+            start / BUCKET_S
+        )  # first bucket starting inside the window
+        last_key = (
+            math.floor(as_of / BUCKET_S) - 1
+        )  # last bucket ending inside the window
+        agg = _Bucket()
+        if first_key <= last_key:
+            agg.merge(self._whole_hours(first_key, last_key))
+        # partial hours: [start, first whole hour) and [end of last whole hour, as_of]
+        edges = [
+            (start, first_key * BUCKET_S, False),
+            ((last_key + 1) * BUCKET_S, as_of, True),
+        ]
+        if first_key > last_key:
+            edges = [(start, as_of, True)]
+        for lo, hi, inclusive in edges:
+            for epoch, status, decline_code, risk_score, amount in self._rows_between(
+                lo, hi
+            ):
+                if epoch < hi or inclusive:
+                    agg.add_transaction(status, decline_code, risk_score, amount)
+            for epoch, amount in self._chargebacks_between(lo, hi):
+                if epoch < hi or inclusive:
+                    agg.add_chargeback(amount)
+
+        total = agg.approved + agg.declined
+        return {
+            "start_time": datetime.fromtimestamp(start, timezone.utc).isoformat(),
+            "end_time": datetime.fromtimestamp(as_of, timezone.utc).isoformat(),
+            "transactions": total,
+            "approved": agg.approved,
+            "declined": agg.declined,
+            "decline_rate": round(agg.declined / total, 4) if total else None,
+            "decline_codes": dict(
+                sorted(agg.decline_codes.items(), key=lambda kv: -kv[1])
+            ),
+            "risk_score": {
+                "p50": _percentile(agg.risk_hist, total, 0.50),
+                "p90": _percentile(agg.risk_hist, total, 0.90),
+                "p99": _percentile(agg.risk_hist, total, 0.99),
+                "max": agg.risk_max,
+            },
+            "amount_total": round(agg.amount, 2),
+            "approved_amount_total": round(agg.approved_amount, 2),
+            "chargebacks": {
+                "count": agg.chargebacks,
+                "amount": round(agg.chargeback_amount, 2),
+                "ratio": round(agg.chargebacks / agg.approved, 4)
+                if agg.approved
+                else None,
+            },
+        }
+
+
+class MerchantRollups:
+    """Lazily built MerchantRollup per merchant for one PaymentsData instance."""
+
+    def __init__(
+        self,
+        rows_for: Any,  # (merchant_id, start_ts=None, end_ts=None) -> iterable of Row, [start, end] inclusive
+        chargebacks: Iterable[Any],
+        parse_epoch: Any,
+    ):
+        self._rows_for = rows_for
+        self._parse_epoch = parse_epoch
+        self._chargebacks: Dict[str, List[Any]] = {}
+        for cb in chargebacks:
+            self._chargebacks.setdefault(cb.merchant_id.lower(), []).append(cb)
+        self._rollups: Dict[str, MerchantRollup] = {}
+        self._lock = threading.Lock()
+
+    def chargebacks_for(self, merchant_id: str) -> List[Any]:
+        return self._chargebacks.get(merchant_id.lower(), [])
+
+    def _chargeback_epochs(self, key: str) -> Tuple[List[float], List[float]]:
+        """(sorted epochs, amounts) of a merchant's chargebacks."""
+        pairs = sorted(
+            (self._parse_epoch(cb.received_date), cb.amount)
+            for cb in self._chargebacks.get(key, [])
+        )
+        return [e for e, _ in pairs], [a for _, a in pairs]
+
+    def get(self, merchant_id: str) -> MerchantRollup:
+        key = merchant_id.lower()
+        rollup = self._rollups.get(key)
+        if rollup is not None:
+            return rollup
+        with self._lock:
+            rollup = self._rollups.get(key)
+            if rollup is None:
+                epochs, amounts = self._chargeback_epochs(key)
+
+                def chargebacks_between(
+                    lo: float, hi: float
+                ) -> Iterable[Tuple[float, float]]:
+                    a, b = bisect_left(epochs, lo), bisect_right(epochs, hi)
+                    return zip(epochs[a:b], amounts[a:b])
+
+                rollup = MerchantRollup(
+                    rows_between=lambda lo, hi: self._rows_for(merchant_id, lo, hi),
+                    chargebacks_between=chargebacks_between,
+                )
+                for epoch, status, decline_code, risk_score, amount in self._rows_for(
+                    merchant_id
+                ):
+                    rollup.add_transaction(
+                        epoch, status, decline_code, risk_score, amount
+                    )
+                for epoch, amount in zip(epochs, amounts):
+                    rollup.add_chargeback(epoch, amount)
+                self._rollups[key] = rollup
+        return rollup
+
+    def summary(
+        self, merchant_id: str, windows: Iterable[str], as_of: float
+    ) -> Dict[str, Dict[str, Any]]:
+        rollup = self.get(merchant_id)
+        out: Dict[str, Dict[str, Any]] = {}
+        for name in windows:
+            if name not in WINDOWS:
+                raise ValueError(
+                    f"Unknown window '{name}' (expected one of {', '.join(WINDOWS)})."
+                )
+            out[name] = rollup.summary(WINDOWS[name], as_of)
+        return out
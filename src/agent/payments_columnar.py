@@ -0,0 +1,524 @@
+"""Columnar, NumPy-backed transaction store for PaymentsData (demo).
+
+Numeric fields (amount, risk_score, epoch timestamp) live in float64 arrays and
+low-cardinality strings (status, decline code, channel, merchant, ...) are
+dictionary-encoded as int32 codes. Rows are grouped by merchant and ordered
+most-recent-first inside each group, so a merchant time window is a contiguous
+slice found with searchsorted. Filters run as vectorized masks and Transaction
+models are only built for the rows that are returned.
+
+Select it with PAYMENT_STORE_BACKEND=columnar (requires numpy).
+"""
+
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError as e:  # pragma: no cover - depends on the environment
+    raise ImportError(
+        "The columnar PaymentsData backend requires numpy (pip install numpy)."
+    ) from e
+
+from src.agent.payments_data_model import (
+    SIGNAL_SAMPLE_IDS,
+    CompiledRules,
+    RiskBands,
+    Transaction,
+    _batch_result,
+    _most_common,
+    _parse_dt,
+    _summary,
+    _verdict,
+)
+
+# Dictionary-encoded Transaction fields (stored as int32 codes).
+CATEGORICAL_FIELDS = (
+    "merchant_id",
+    "currency",
+    "status",
+    "decline_code",
+    "decline_reason",
+    "avs_result",
+    "cvv_result",
+    "three_ds_result",
+    "issuer_country",
+    "channel",
+    "note",
+)
+# High-cardinality strings, kept as plain per-row values.
+STRING_FIELDS = ("transaction_id", "timestamp", "card_token", "masked_pan")
+NUMERIC_FIELDS = ("amount", "risk_score")
+
+
+class Dictionary:
+    """Value <-> int32 code mapping for one categorical column (None is a value too)."""
+
+    def __init__(self, values: Optional[Sequence[Optional[str]]] = None):
+        self.values: List[Optional[str]] = list(values or [])
+        self._codes: Dict[Optional[str], int] = {
+            v: i for i, v in enumerate(self.values)
+        }
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def encode(self, value: Optional[str]) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self._codes[value] = code
+            self.values.append(value)
+        return code
+
+    def code(self, value: Optional[str]) -> int:
+        """Code for `value`, or -1 when it never occurs (matches no row)."""
+        return self._codes.get(value, -1)
+
+
+class _SortedIds:
+    """Sequence view of lower-cased transaction IDs in sorted order (for bisect)."""
+
+    def __init__(self, ids: Sequence[str], order: np.ndarray):
+        self._ids = ids
+        self._order = order
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def __getitem__(self, k: int) -> str:
+        return self._ids[int(self._order[k])].lower()
+
+
+class ColumnarTransactions:
+    """Array-backed transaction backend with the same interface as TransactionIndex."""
+
+    def __init__(
+        self,
+        numeric: Dict[str, np.ndarray],
+        neg_epoch: np.ndarray,
+        codes: Dict[str, np.ndarray],
+        dictionaries: Dict[str, Dictionary],
+        strings: Dict[str, Sequence[Optional[str]]],
+        merchant_bounds: Dict[str, Tuple[int, int]],
+        id_order: np.ndarray,
+    ):
+        # All columns share one row order: grouped by merchant, newest first.
+        self.numeric = numeric
+        self.neg_epoch = neg_epoch
+        self.codes = codes
+        self.dictionaries = dictionaries
+        self.strings = strings
+        self.merchant_bounds = merchant_bounds
+        self.id_order = id_order
+        self._sorted_ids = _SortedIds(strings["transaction_id"], id_order)
+
+    def __len__(self) -> int:
+        return len(self.neg_epoch)
+
+    def __iter__(self) -> Iterator[Transaction]:
+        for i in range(len(self)):
+            yield self.row(i)
+
+    # ---------- Row materialization ----------
+
+    def row(self, i: int) -> Transaction:
+        fields: Dict[str, object] = {
+            name: float(col[i]) for name, col in self.numeric.items()
+        }
+        for name, col in self.codes.items():
+            fields[name] = self.dictionaries[name].values[col[i]]
+        for name, col in self.strings.items():
+            fields[name] = col[i]
+        # Rows were validated when the store was built.
+        return Transaction.model_construct(**fields)
+
+    def rows(self, positions: Iterable[int]) -> List[Transaction]:
+        return [self.row(int(i)) for i in positions]
+
+    # ---------- Queries ----------
+
+    def position(self, transaction_id: str) -> Optional[int]:
+        key = transaction_id.lower()
+        k = bisect_left(self._sorted_ids, key)
+        if k < len(self._sorted_ids) and self._sorted_ids[k] == key:
+            return int(self.id_order[k])
+        return None
+
+    def get(self, transaction_id: str) -> Optional[Transaction]:
+        pos = self.position(transaction_id)
+        return None if pos is None else self.row(pos)
+
+    def window_positions(
+        self,
+        merchant_id: str,
+        start_ts: float,
+        end_ts: float,
+        status: Optional[str] = None,
+        decline_code: Optional[str] = None,
+    ) -> np.ndarray:
+        """Row positions for a merchant time window, most recent first."""
+        bounds = self.merchant_bounds.get(merchant_id.lower())
+        if bounds is None:
+            return np.empty(0, dtype=np.int64)
+        lo, hi = bounds
+        keys = self.neg_epoch[lo:hi]
+        # keys are -epoch ascending, so [start, end] maps to [-end, -start]
+        a = lo + int(np.searchsorted(keys, -end_ts, side="left"))
+        b = lo + int(np.searchsorted(keys, -start_ts, side="right"))
+        positions = np.arange(a, b, dtype=np.int64)
+
+        mask = None
+        if status:
+            mask = self.codes["status"][a:b] == self.dictionaries["status"].code(status)
+        if decline_code:
+            dc = self.codes["decline_code"][a:b] == self.dictionaries[
+                "decline_code"
+            ].code(decline_code)
+            mask = dc if mask is None else mask & dc
+        return positions if mask is None else positions[mask]
+
+    def window(
+        self,
+        merchant_id: str,
+        start_ts: float,
+        end_ts: float,
+        status: Optional[str] = None,
+        decline_code: Optional[str] = None,
+    ) -> List[Transaction]:
+        return self.rows(
+            self.window_positions(merchant_id, start_ts, end_ts, status, decline_code)
+        )
+
+    def _top(self, positions: np.ndarray, n: int) -> np.ndarray:
+        """The n highest-risk positions, best first; ties go to the more recent row."""
+        risk = self.numeric["risk_score"][positions]
+        if positions.size > n:
+            kth = np.partition(risk, positions.size - n)[positions.size - n]
+            above = np.flatnonzero(risk > kth)
+            ties = np.flatnonzero(risk == kth)[: n - above.size]
+            keep = np.concatenate([above, ties])
+            positions, risk = positions[keep], risk[keep]
+        return positions[np.lexsort((positions, -risk))]
+
+    def top_by_risk(
+        self,
+        merchant_id: str,
+        start_ts: float,
+        end_ts: float,
+        strategy: str,
+        n: int,
+        high_min: float,
+    ) -> Tuple[List[Transaction], str]:
+        positions = self.window_positions(merchant_id, start_ts, end_ts)
+        if positions.size == 0:
+            return [], "no_transactions"
+
+        if strategy == "recent_high_risk":
+            hot = positions[self.numeric["risk_score"][positions] >= high_min]
+            if hot.size:
+                return self.rows(hot[:n]), "picked_recent_high_risk"
+        elif strategy in ("declined_highest_risk", "most_common_decline_code"):
+            declined = positions[
+                self.codes["status"][positions]
+                == self.dictionaries["status"].code("declined")
+            ]
+            if declined.size and strategy == "declined_highest_risk":
+                return self.rows(self._top(declined, n)), "picked_declined_highest_risk"
+            counts = {
+                k: v for k, v in self._counts("decline_code", declined).items() if k
+            }
+            if counts:
+                code = self.dictionaries["decline_code"].code(_most_common(counts))
+                same = declined[self.codes["decline_code"][declined] == code]
+                return self.rows(self._top(same, n)), "picked_most_common_decline_code"
+        return self.rows(self._top(positions, n)), "picked_highest_risk"
+
+    def rollup_rows(
+        self,
+        merchant_id: str,
+        start_ts: Optional[float] = None,
+        end_ts: Optional[float] = None,
+    ) -> Iterator[Tuple[float, str, Optional[str], float, float]]:
+        """(epoch, status, decline_code, risk_score, amount) for a merchant's rows, optionally in [start, end]."""
+        lo, hi = self.merchant_bounds.get(merchant_id.lower(), (0, 0))
+        if start_ts is not None and end_ts is not None:
+            keys = self.neg_epoch[lo:hi]
+            lo, hi = (
+                lo + int(np.searchsorted(keys, -end_ts, side="left")),
+                lo + int(np.searchsorted(keys, -start_ts, side="right")),
+            )
+        status_values = self.dictionaries["status"].values
+        code_values = self.dictionaries["decline_code"].values
+        yield from zip(
+            (-self.neg_epoch[lo:hi]).tolist(),
+            [status_values[c] for c in self.codes["status"][lo:hi].tolist()],
+            [code_values[c] for c in self.codes["decline_code"][lo:hi].tolist()],
+            self.numeric["risk_score"][lo:hi].tolist(),
+            self.numeric["amount"][lo:hi].tolist(),
+        )
+
+    def risk_band_codes(self, positions: np.ndarray, bands: RiskBands) -> np.ndarray:
+        """Index into bands.labels per row, same rules as RiskBands.label."""
+        thresholds = np.asarray(bands.thresholds, dtype=np.float64)
+        return np.searchsorted(
+            thresholds, self.numeric["risk_score"][positions], side="right"
+        )
+
+    def window_page(
+        self,
+        merchant_id: str,
+        start_ts: float,
+        end_ts: float,
+        status: Optional[str],
+        decline_code: Optional[str],
+        offset: int,
+        limit: int,
+    ) -> Tuple[int, List[Transaction]]:
+        positions = self.window_positions(
+            merchant_id, start_ts, end_ts, status, decline_code
+        )
+        return int(positions.size), self.rows(positions[offset : offset + limit])
+
+    def _counts(self, field: str, positions: np.ndarray) -> Dict[str, int]:
+        values = self.dictionaries[field].values
+        codes, counts = np.unique(self.codes[field][positions], return_counts=True)
+        return {
+            values[c]: int(n)
+            for c, n in zip(codes.tolist(), counts.tolist())
+            if values[c] is not None
+        }
+
+    def window_summary(
+        self,
+        merchant_id: str,
+        start_ts: float,
+        end_ts: float,
+        status: Optional[str],
+        decline_code: Optional[str],
+        bands: RiskBands,
+    ) -> Dict[str, object]:
+        positions = self.window_positions(
+            merchant_id, start_ts, end_ts, status, decline_code
+        )
+        band_counts = np.bincount(
+            self.risk_band_codes(positions, bands), minlength=len(bands.labels)
+        )
+        empty = positions.size == 0
+        return _summary(
+            count=int(positions.size),
+            by_status=self._counts("status", positions),
+            by_code=self._counts("decline_code", positions),
+            by_band={
+                label: int(n) for label, n in zip(bands.labels, band_counts.tolist())
+            },
+            amount_total=float(self.numeric["amount"][positions].sum()),
+            max_risk=None
+            if empty
+            else float(self.numeric["risk_score"][positions].max()),
+            newest=None if empty else self.strings["timestamp"][int(positions[0])],
+            oldest=None if empty else self.strings["timestamp"][int(positions[-1])],
+        )
+
+    def select_ids(self, transaction_ids: List[str]) -> Tuple[np.ndarray, List[str]]:
+        """Positions for `transaction_ids` in the given order (duplicates dropped) and the IDs not found."""
+        positions: List[int] = []
+        missing: List[str] = []
+        seen = set()
+        for tid in transaction_ids:
+            pos = self.position(tid)
+            if pos is None:
+                missing.append(tid)
+            elif pos not in seen:
+                seen.add(pos)
+                positions.append(pos)
+        return np.asarray(positions, dtype=np.int64), missing
+
+    def select_window(
+        self,
+        merchant_id: str,
+        start_ts: float,
+        end_ts: float,
+        status: Optional[str],
+        decline_code: Optional[str],
+    ) -> np.ndarray:
+        return self.window_positions(
+            merchant_id, start_ts, end_ts, status, decline_code
+        )
+
+    def _isin(
+        self, field: str, positions: np.ndarray, values: Iterable[Optional[str]]
+    ) -> np.ndarray:
+        if field in self.codes:
+            codes = [
+                self.dictionaries[field].code(v) for v in values
+            ]  # -1 for values never seen
+            return np.isin(self.codes[field][positions], codes)
+        if field in self.numeric:
+            return np.isin(
+                self.numeric[field][positions], [v for v in values if v is not None]
+            )
+        allowed = frozenset(values)
+        col = self.strings[field]
+        return np.fromiter(
+            (col[p] in allowed for p in positions.tolist()),
+            dtype=bool,
+            count=positions.size,
+        )
+
+    def signal_masks(
+        self, positions: np.ndarray, rules: CompiledRules
+    ) -> Dict[str, np.ndarray]:
+        """One boolean mask per compiled signal rule, same semantics as SignalRule.matches."""
+        masks: Dict[str, np.ndarray] = {}
+        for rule in rules.signals:
+            mask = np.ones(positions.size, dtype=bool)
+            if rule.values is not None:
+                mask &= self._isin(rule.field, positions, rule.values)
+            if rule.min_inclusive is not None or rule.max_exclusive is not None:
+                if rule.field not in self.numeric:
+                    raise ValueError(
+                        f"Signal '{rule.id}': range rules need a numeric field, not '{rule.field}'."
+                    )
+                col = self.numeric[rule.field][positions]
+                if rule.min_inclusive is not None:
+                    mask &= col >= rule.min_inclusive
+                if rule.max_exclusive is not None:
+                    mask &= col < rule.max_exclusive
+            for field, allowed in rule.when:
+                mask &= self._isin(field, positions, allowed)
+            masks[rule.id] = mask
+        return masks
+
+    def evaluate_batch(
+        self, positions: np.ndarray, rules: CompiledRules, limit: int
+    ) -> Dict[str, object]:
+        bands = rules.risk_bands
+        masks = self.signal_masks(positions, rules)
+        band_codes = self.risk_band_codes(positions, bands)
+        band_counts = np.bincount(band_codes, minlength=len(bands.labels))
+        ids = self.strings["transaction_id"]
+
+        head = positions[:limit]
+        head_masks = {key: mask[: head.size].tolist() for key, mask in masks.items()}
+        merchant_values = self.dictionaries["merchant_id"].values
+        status_values = self.dictionaries["status"].values
+        code_values = self.dictionaries["decline_code"].values
+        verdicts = [
+            _verdict(
+                ids[pos],
+                merchant_values[merchant],
+                status_values[status],
+                code_values[code],
+                risk,
+                bands.labels[band],
+                [key for key in masks if head_masks[key][k]],
+            )
+            for k, (pos, merchant, status, code, risk, band) in enumerate(
+                zip(
+                    head.tolist(),
+                    self.codes["merchant_id"][head].tolist(),
+                    self.codes["status"][head].tolist(),
+                    self.codes["decline_code"][head].tolist(),
+                    self.numeric["risk_score"][head].tolist(),
+                    band_codes[: head.size].tolist(),
+                )
+            )
+        ]
+        return _batch_result(
+            labels=rules.signal_labels,
+            count=int(positions.size),
+            verdicts=verdicts,
+            signal_counts={
+                key: int(np.count_nonzero(mask)) for key, mask in masks.items()
+            },
+            signal_samples={
+                key: [ids[p] for p in positions[mask][:SIGNAL_SAMPLE_IDS].tolist()]
+                for key, mask in masks.items()
+            },
+            by_band={
+                label: int(n) for label, n in zip(bands.labels, band_counts.tolist())
+            },
+            by_code=self._counts("decline_code", positions),
+        )
+
+
+class ColumnarTransactionsBuilder:
+    """Accumulates validated Transaction rows into compact buffers, then sorts once."""
+
+    def __init__(self) -> None:
+        self._numeric = {name: array("d") for name in NUMERIC_FIELDS}
+        self._epoch = array("d")
+        self._dictionaries = {name: Dictionary() for name in CATEGORICAL_FIELDS}
+        self._codes = {name: array("i") for name in CATEGORICAL_FIELDS}
+        self._strings: Dict[str, List[Optional[str]]] = {
+            name: [] for name in STRING_FIELDS
+        }
+        # merchant grouping is case-insensitive, like the row backend
+        self._groups = Dictionary()
+        self._group_codes = array("i")
+
+    def __len__(self) -> int:
+        return len(self._epoch)
+
+    def append(self, t: Transaction) -> None:
+        for name in NUMERIC_FIELDS:
+            self._numeric[name].append(float(getattr(t, name)))
+        self._epoch.append(_parse_dt(t.timestamp).timestamp())
+        for name in CATEGORICAL_FIELDS:
+            self._codes[name].append(self._dictionaries[name].encode(getattr(t, name)))
+        for name in STRING_FIELDS:
+            self._strings[name].append(getattr(t, name))
+        self._group_codes.append(self._groups.encode(t.merchant_id.lower()))
+
+    def extend(self, rows: Iterable[Transaction]) -> None:
+        for t in rows:
+            self.append(t)
+
+    def build(self) -> ColumnarTransactions:
+        n = len(self._epoch)
+        neg_epoch = -np.frombuffer(self._epoch, dtype=np.float64)
+        groups = np.frombuffer(self._group_codes, dtype=np.int32)
+        # primary: merchant group, then newest first, then load order
+        order = np.lexsort((np.arange(n), neg_epoch, groups))
+
+        numeric = {
+            name: np.frombuffer(buf, dtype=np.float64)[order]
+            for name, buf in self._numeric.items()
+        }
+        codes = {
+            name: np.frombuffer(buf, dtype=np.int32)[order]
+            for name, buf in self._codes.items()
+        }
+        strings = {
+            name: [col[i] for i in order.tolist()]
+            for name, col in self._strings.items()
+        }
+        sorted_groups = groups[order]
+
+        merchant_bounds: Dict[str, Tuple[int, int]] = {}
+        for code, key in enumerate(self._groups.values):
+            lo = int(np.searchsorted(sorted_groups, code, side="left"))
+            hi = int(np.searchsorted(sorted_groups, code, side="right"))
+            merchant_bounds[key] = (lo, hi)
+
+        ids = strings["transaction_id"]
+        loaded_at = order.tolist()
+        # duplicate IDs sort in load order, so position() finds the first one loaded (like the row backend)
+        id_order = np.array(
+            sorted(range(n), key=lambda i: (ids[i].lower(), loaded_at[i])),
+            dtype=np.int64,
+        )
+
+        return ColumnarTransactions(
+            numeric=numeric,
+            neg_epoch=neg_epoch[order],
+            codes=codes,
+            dictionaries=self._dictionaries,
+            strings=strings,
+            merchant_bounds=merchant_bounds,
+            id_order=id_order,
+        )
@@ -2,19 +2,32 @@
 
 from __future__ import annotations
 
+import heapq
 import json
 import os
+import threading
+import time
 import warnings
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
-from pydantic import BaseModel, Field
-from traceloop.sdk.decorators import task
+from pydantic import BaseModel, Field, PrivateAttr
 from pydantic.warnings import PydanticDeprecatedSince20
-warnings.filterwarnings(
-    "ignore",
-    category=PydanticDeprecatedSince20)
+
+warnings.filterwarnings("ignore", category=PydanticDeprecatedSince20)
+
+from src.agent.merchant_rollups import WINDOWS, MerchantRollups  # noqa: E402
+from src.agent.policy_index import PolicyIndex  # noqa: E402
+from src.agent.policy_rules import (
+    CompiledRules,
+    RiskBands,
+    compile_rules,
+)  # noqa: E402,F401
+from src.agent.result_memo import ResultMemo  # noqa: E402
+from src.agent.tracing import task  # noqa: E402
 
 
 def _parse_dt(value: str) -> datetime:
@@ -77,23 +90,449 @@ class PaymentsPolicyKB(BaseModel):
     kb_snippets: List[Dict[str, Any]]
     pci_hygiene: Dict[str, Any]
     escalation: Dict[str, Any]
+    # declarative rules compiled at load (policy_rules.py); missing sections fall back to the fields above
+    rules: Dict[str, Any] = Field(default_factory=dict)
+
+
+# Selection rules for pick_representative_transaction. Every strategy falls back to
+# highest_risk when it matches nothing in the window.
+PICK_STRATEGIES = {
+    "declined_highest_risk": "highest risk_score among declined rows",
+    "highest_risk": "highest risk_score overall",
+    "most_common_decline_code": "highest risk_score among declines with the window's most frequent decline code",
+    "recent_high_risk": "most recent rows in the High risk band",
+}
+
+HIGH_RISK_ACTION = "Recommend step-up authentication (3DS) and additional screening for similar transactions."
+NO_ACTION = "No immediate action required based on current signals."
+# Rows listed per signal in an evaluate_transactions summary.
+SIGNAL_SAMPLE_IDS = 5
+# check_merchant_compliance counts chargebacks in the 30 days up to now, rounded down to this step.
+COMPLIANCE_AS_OF_STEP_S = 60
+
+
+class TransactionIndex:
+    """Row backend: transactions kept as models, indexed once at load.
+
+    Keys are lower-cased IDs. Each merchant's rows are stored most-recent-first
+    next to their negated epoch seconds, so a time window is a bisect range.
+    """
+
+    def __init__(self, transactions: List[Transaction]):
+        by_id: Dict[str, Transaction] = {}
+        by_merchant: Dict[str, List[Tuple[float, int, Transaction]]] = {}
+        for i, t in enumerate(transactions):
+            # first occurrence wins, same as the old linear scan
+            by_id.setdefault(t.transaction_id.lower(), t)
+            ts = _parse_dt(t.timestamp).timestamp()
+            by_merchant.setdefault(t.merchant_id.lower(), []).append((-ts, i, t))
+
+        self._count = len(transactions)
+        self._by_id = by_id
+        self._by_merchant: Dict[str, Tuple[List[float], List[Transaction]]] = {}
+        for merchant_key, rows in by_merchant.items():
+            # ties keep load order (matches the previous stable sort)
+            rows.sort(key=lambda r: (r[0], r[1]))
+            self._by_merchant[merchant_key] = (
+                [r[0] for r in rows],
+                [r[2] for r in rows],
+            )
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[Transaction]:
+        for _, rows in self._by_merchant.values():
+            yield from rows
+
+    def get(self, transaction_id: str) -> Optional[Transaction]:
+        return self._by_id.get(transaction_id.lower())
+
+    def rollup_rows(
+        self,
+        merchant_id: str,
+        start_ts: Optional[float] = None,
+        end_ts: Optional[float] = None,
+    ) -> Iterator[Tuple[float, str, Optional[str], float, float]]:
+        """(epoch, status, decline_code, risk_score, amount) for a merchant's rows, optionally in [start, end]."""
+        keys, rows = self._by_merchant.get(merchant_id.lower(), ([], []))
+        lo, hi = 0, len(rows)
+        if start_ts is not None and end_ts is not None:
+            rows, lo, hi = self._bounds(merchant_id, start_ts, end_ts)
+        for key, t in zip(keys[lo:hi], rows[lo:hi]):
+            yield -key, t.status, t.decline_code, t.risk_score, t.amount
+
+    def _bounds(
+        self, merchant_id: str, start_ts: float, end_ts: float
+    ) -> Tuple[List[Transaction], int, int]:
+        entry = self._by_merchant.get(merchant_id.lower())
+        if entry is None:
+            return [], 0, 0
+        keys, rows = entry
+        # keys are -epoch ascending, so [start, end] maps to [-end, -start]
+        return rows, bisect_left(keys, -end_ts), bisect_right(keys, -start_ts)
+
+    def window(
+        self,
+        merchant_id: str,
+        start_ts: float,
+        end_ts: float,
+        status: Optional[str] = None,
+        decline_code: Optional[str] = None,
+    ) -> List[Transaction]:
+        rows, lo, hi = self._bounds(merchant_id, start_ts, end_ts)
+        out = rows[lo:hi]  # already most recent first
+
+        if not status and not decline_code:
+            return out
+        return [
+            t
+            for t in out
+            if (not status or t.status == status)
+            and (not decline_code or t.decline_code == decline_code)
+        ]
+
+    def top_by_risk(
+        self,
+        merchant_id: str,
+        start_ts: float,
+        end_ts: float,
+        strategy: str,
+        n: int,
+        high_min: float,
+    ) -> Tuple[List[Transaction], str]:
+        """One pass over the window; see PICK_STRATEGIES for the selection rules."""
+        rows, lo, hi = self._bounds(merchant_id, start_ts, end_ts)
+        if lo >= hi:
+            return [], "no_transactions"
+
+        overall, declined = _TopN(n), _TopN(n)
+        recent: List[Transaction] = []
+        code_counts: Dict[str, int] = {}
+        by_code: Dict[str, _TopN] = {}
+        for pos in range(lo, hi):
+            t = rows[pos]
+            overall.push(t.risk_score, pos, t)
+            if strategy == "recent_high_risk":
+                if t.risk_score >= high_min:
+                    recent.append(t)
+                    if len(recent) == n:
+                        break
+            elif strategy != "highest_risk" and t.status == "declined":
+                declined.push(t.risk_score, pos, t)
+                if strategy == "most_common_decline_code" and t.decline_code:
+                    code_counts[t.decline_code] = code_counts.get(t.decline_code, 0) + 1
+                    by_code.setdefault(t.decline_code, _TopN(n)).push(
+                        t.risk_score, pos, t
+                    )
+
+        if recent:
+            return recent, "picked_recent_high_risk"
+        if strategy == "declined_highest_risk" and declined:
+            return declined.items(), "picked_declined_highest_risk"
+        if code_counts:
+            return (
+                by_code[_most_common(code_counts)].items(),
+                "picked_most_common_decline_code",
+            )
+        return overall.items(), "picked_highest_risk"
+
+    def window_page(
+        self,
+        merchant_id: str,
+        start_ts: float,
+        end_ts: float,
+        status: Optional[str],
+        decline_code: Optional[str],
+        offset: int,
+        limit: int,
+    ) -> Tuple[int, List[Transaction]]:
+        txns = self.window(merchant_id, start_ts, end_ts, status, decline_code)
+        return len(txns), txns[offset : offset + limit]
+
+    def window_summary(
+        self,
+        merchant_id: str,
+        start_ts: float,
+        end_ts: float,
+        status: Optional[str],
+        decline_code: Optional[str],
+        bands: RiskBands,
+    ) -> Dict[str, Any]:
+        txns = self.window(merchant_id, start_ts, end_ts, status, decline_code)
+        by_status: Dict[str, int] = {}
+        by_code: Dict[str, int] = {}
+        by_band = bands.counts()
+        for t in txns:
+            by_status[t.status] = by_status.get(t.status, 0) + 1
+            if t.decline_code:
+                by_code[t.decline_code] = by_code.get(t.decline_code, 0) + 1
+            by_band[bands.label(t.risk_score)] += 1
+        return _summary(
+            count=len(txns),
+            by_status=by_status,
+            by_code=by_code,
+            by_band=by_band,
+            amount_total=sum(t.amount for t in txns),
+            max_risk=max((t.risk_score for t in txns), default=None),
+            newest=txns[0].timestamp if txns else None,
+            oldest=txns[-1].timestamp if txns else None,
+        )
+
+    def select_ids(
+        self, transaction_ids: List[str]
+    ) -> Tuple[List[Transaction], List[str]]:
+        """Rows for `transaction_ids` in the given order (duplicates dropped) and the IDs not found."""
+        rows: List[Transaction] = []
+        missing: List[str] = []
+        seen = set()
+        for tid in transaction_ids:
+            t = self.get(tid)
+            if t is None:
+                missing.append(tid)
+            elif t.transaction_id not in seen:
+                seen.add(t.transaction_id)
+                rows.append(t)
+        return rows, missing
+
+    def select_window(
+        self,
+        merchant_id: str,
+        start_ts: float,
+        end_ts: float,
+        status: Optional[str],
+        decline_code: Optional[str],
+    ) -> List[Transaction]:
+        return self.window(merchant_id, start_ts, end_ts, status, decline_code)
+
+    def evaluate_batch(
+        self, rows: List[Transaction], rules: CompiledRules, limit: int
+    ) -> Dict[str, Any]:
+        """Risk band and signals for every selected row; verdicts for the first `limit`."""
+        bands = rules.risk_bands
+        verdicts: List[Dict[str, Any]] = []
+        by_signal: Dict[str, List[str]] = {key: [] for key in rules.signal_labels}
+        by_code: Dict[str, int] = {}
+        by_band = bands.counts()
+        for i, t in enumerate(rows):
+            band = bands.label(t.risk_score)
+            by_band[band] += 1
+            if t.decline_code:
+                by_code[t.decline_code] = by_code.get(t.decline_code, 0) + 1
+            signals = rules.signals_for(t)
+            for key in signals:
+                by_signal[key].append(t.transaction_id)
+            if i < limit:
+                verdicts.append(
+                    _verdict(
+                        t.transaction_id,
+                        t.merchant_id,
+                        t.status,
+                        t.decline_code,
+                        t.risk_score,
+                        band,
+                        signals,
+                    )
+                )
+        return _batch_result(
+            labels=rules.signal_labels,
+            count=len(rows),
+            verdicts=verdicts,
+            signal_counts={key: len(ids) for key, ids in by_signal.items()},
+            signal_samples={
+                key: ids[:SIGNAL_SAMPLE_IDS] for key, ids in by_signal.items()
+            },
+            by_band=by_band,
+            by_code=by_code,
+        )
+
+
+class _TopN:
+    """Bounded min-heap keeping the n highest-risk rows; ties go to the lower (more recent) position."""
+
+    def __init__(self, n: int):
+        self.n = n
+        self._heap: List[Tuple[float, int, Transaction]] = []
+
+    def __bool__(self) -> bool:
+        return bool(self._heap)
+
+    def push(self, score: float, pos: int, t: Transaction) -> None:
+        entry = (score, -pos, t)  # positions are unique, so rows are never compared
+        if len(self._heap) < self.n:
+            heapq.heappush(self._heap, entry)
+        elif entry[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, entry)
+
+    def items(self) -> List[Transaction]:
+        return [t for _, _, t in sorted(self._heap, key=lambda e: e[:2], reverse=True)]
+
+
+def _most_common(counts: Dict[str, int]) -> str:
+    # highest count; ties broken by code so both backends agree
+    return min(counts, key=lambda code: (-counts[code], code))
+
+
+def _summary(
+    count: int,
+    by_status: Dict[str, int],
+    by_code: Dict[str, int],
+    by_band: Dict[str, int],
+    amount_total: float,
+    max_risk: Optional[float],
+    newest: Optional[str],
+    oldest: Optional[str],
+) -> Dict[str, Any]:
+    """Shape shared by both backends' window_summary."""
+    return {
+        "count": count,
+        "by_status": dict(sorted(by_status.items(), key=lambda kv: (-kv[1], kv[0]))),
+        "by_decline_code": dict(
+            sorted(by_code.items(), key=lambda kv: (-kv[1], kv[0]))
+        ),
+        "by_risk_band": by_band,
+        "amount_total": round(float(amount_total), 2),
+        "max_risk_score": max_risk,
+        "newest": newest,
+        "oldest": oldest,
+    }
+
+
+def _verdict(
+    transaction_id: str,
+    merchant_id: str,
+    status: str,
+    decline_code: Optional[str],
+    risk_score: float,
+    risk_band: str,
+    signals: List[str],
+) -> Dict[str, Any]:
+    """One row of an evaluate_transactions result."""
+    return {
+        "transaction_id": transaction_id,
+        "merchant_id": merchant_id,
+        "status": status,
+        "decline_code": decline_code,
+        "risk_score": risk_score,
+        "risk_band": risk_band,
+        "signals": signals,
+    }
+
+
+def _batch_result(
+    labels: Dict[str, str],
+    count: int,
+    verdicts: List[Dict[str, Any]],
+    signal_counts: Dict[str, int],
+    signal_samples: Dict[str, List[str]],
+    by_band: Dict[str, int],
+    by_code: Dict[str, int],
+) -> Dict[str, Any]:
+    """Shape shared by both backends' evaluate_batch."""
+    return {
+        "count": count,
+        "returned": len(verdicts),
+        "truncated": len(verdicts) < count,
+        "verdicts": verdicts,
+        "by_signal": {
+            key: {
+                "label": labels[key],
+                "count": signal_counts[key],
+                "transaction_ids": signal_samples[key],
+            }
+            for key in sorted(labels, key=lambda k: -signal_counts[k])
+            if signal_counts[key]
+        },
+        "by_risk_band": by_band,
+        "by_decline_code": dict(
+            sorted(by_code.items(), key=lambda kv: (-kv[1], kv[0]))
+        ),
+    }
 
 
 class PaymentsData(BaseModel):
-    """In-memory demo datastore + deterministic business logic."""
+    """In-memory demo datastore + deterministic business logic.
+
+    Transactions are served by a backend built once at load: TransactionIndex
+    (rows as models, the default) or ColumnarTransactions (NumPy columns, see
+    payments_columnar.py). With the columnar backend `transactions` is left
+    empty; use iter_transactions() to walk all rows.
+    """
 
     merchants: List[MerchantProfile]
     transactions: List[Transaction]
     chargebacks: List[Chargeback]
     policies: PaymentsPolicyKB
 
+    _merchant_index: Dict[str, MerchantProfile] = PrivateAttr(default_factory=dict)
+    _txns: Any = PrivateAttr(default=None)  # TransactionIndex | ColumnarTransactions
+    _rules: Optional[CompiledRules] = PrivateAttr(default=None)
+    _risk_bands: Optional[RiskBands] = PrivateAttr(default=None)
+    _policy_index: Optional[PolicyIndex] = PrivateAttr(default=None)
+    _semantic_index: Any = PrivateAttr(
+        default=None
+    )  # SemanticPolicyIndex, built on first use
+    _semantic_lock: Any = PrivateAttr(default_factory=threading.Lock)
+    _rollups: Optional[MerchantRollups] = PrivateAttr(default=None)
+    _dump_cache: "OrderedDict[str, Dict[str, Any]]" = PrivateAttr(
+        default_factory=OrderedDict
+    )
+    _dump_cache_size: int = PrivateAttr(
+        default_factory=lambda: int(os.getenv("TOOL_ROW_CACHE_SIZE", "10000"))
+    )
+    # deterministic tool results; lives and dies with this store, so a reload invalidates it
+    _memo: ResultMemo = PrivateAttr(
+        default_factory=lambda: ResultMemo(
+            max_entries=int(os.getenv("TOOL_MEMO_SIZE", "2048")),
+            ttl_s=float(os.getenv("TOOL_MEMO_TTL_S", "300")),
+        )
+    )
+
+    def model_post_init(self, __context: Any) -> None:
+        self._merchant_index = {m.merchant_id.lower(): m for m in self.merchants}
+        self._rules = compile_rules(
+            self.policies,
+            tuple(Transaction.model_fields),
+            tuple(MerchantProfile.model_fields),
+        )
+        self._risk_bands = self._rules.risk_bands
+        self._policy_index = PolicyIndex(self.policies.kb_snippets)
+        self._txns = TransactionIndex(self.transactions)
+
     @classmethod
-    def load_from_dir(cls, data_dir: str | Path) -> "PaymentsData":
+    def load_from_dir(
+        cls, data_dir: str | Path, backend: str = "rows"
+    ) -> "PaymentsData":
         data_dir = Path(data_dir)
-        merchants = json.loads((data_dir / "merchants.json").read_text(encoding="utf-8"))
-        transactions = json.loads((data_dir / "transactions.json").read_text(encoding="utf-8"))
-        chargebacks = json.loads((data_dir / "chargebacks.json").read_text(encoding="utf-8"))
-        policies = json.loads((data_dir / "policies_kb.json").read_text(encoding="utf-8"))
+        merchants = json.loads(
+            (data_dir / "merchants.json").read_text(encoding="utf-8")
+        )
+        transactions = json.loads(
+            (data_dir / "transactions.json").read_text(encoding="utf-8")
+        )
+        chargebacks = json.loads(
+            (data_dir / "chargebacks.json").read_text(encoding="utf-8")
+        )
+        policies = json.loads(
+            (data_dir / "policies_kb.json").read_text(encoding="utf-8")
+        )
+
+        if backend == "columnar":
+            from src.agent.payments_columnar import ColumnarTransactionsBuilder
+
+            builder = ColumnarTransactionsBuilder()
+            builder.extend(Transaction(**t) for t in transactions)
+            del transactions
+            return cls.from_backend(
+                backend=builder.build(),
+                merchants=[MerchantProfile(**m) for m in merchants],
+                chargebacks=[Chargeback(**c) for c in chargebacks],
+                policies=PaymentsPolicyKB(**policies),
+            )
+        if backend != "rows":
+            raise ValueError(
+                f"Unknown PaymentsData backend '{backend}' (expected 'rows' or 'columnar')."
+            )
 
         return cls(
             merchants=[MerchantProfile(**m) for m in merchants],
@@ -102,23 +541,73 @@ class PaymentsData(BaseModel):
             policies=PaymentsPolicyKB(**policies),
         )
 
+    @classmethod
+    def from_backend(
+        cls,
+        backend: Any,
+        merchants: List[MerchantProfile],
+        chargebacks: List[Chargeback],
+        policies: PaymentsPolicyKB,
+    ) -> "PaymentsData":
+        """Build a store whose transactions live in a prebuilt backend (e.g. ColumnarTransactions)."""
+        store = cls(
+            merchants=merchants,
+            transactions=[],
+            chargebacks=chargebacks,
+            policies=policies,
+        )
+        store._txns = backend
+        return store
+
+    @property
+    def backend(self) -> Any:
+        """The transaction backend (TransactionIndex or ColumnarTransactions)."""
+        return self._txns
+
+    @property
+    def backend_name(self) -> str:
+        return "rows" if isinstance(self._txns, TransactionIndex) else "columnar"
+
+    @property
+    def transaction_count(self) -> int:
+        return len(self._txns)
+
+    @property
+    def rules(self) -> CompiledRules:
+        """Risk bands, monitoring verdicts and signal rules compiled from `policies`."""
+        return self._rules
+
+    def iter_transactions(self) -> Iterator[Transaction]:
+        return iter(self._txns)
+
+    @property
+    def rollups(self) -> MerchantRollups:
+        """Per-merchant window aggregates; each merchant is folded in on first use."""
+        if self._rollups is None:
+            self._rollups = MerchantRollups(
+                rows_for=self._txns.rollup_rows,
+                chargebacks=self.chargebacks,
+                parse_epoch=lambda value: _parse_dt(value).timestamp(),
+            )
+        return self._rollups
+
     # ---------- Lookup helpers ----------
 
-    @task()
+    @task(detailed=True)
     async def get_merchant(self, merchant_id: str) -> MerchantProfile:
-        for m in self.merchants:
-            if m.merchant_id.lower() == merchant_id.lower():
-                return m
-        raise ValueError(f"Merchant '{merchant_id}' not found.")
+        m = self._merchant_index.get(merchant_id.lower())
+        if m is None:
+            raise ValueError(f"Merchant '{merchant_id}' not found.")
+        return m
 
-    @task()
+    @task(detailed=True)
     async def get_transaction(self, transaction_id: str) -> Transaction:
-        for t in self.transactions:
-            if t.transaction_id.lower() == transaction_id.lower():
-                return t
-        raise ValueError(f"Transaction '{transaction_id}' not found.")
+        t = self._txns.get(transaction_id)
+        if t is None:
+            raise ValueError(f"Transaction '{transaction_id}' not found.")
+        return t
 
-    @task()
+    @task(detailed=True)
     async def list_transactions(
         self,
         merchant_id: str,
@@ -127,150 +616,386 @@ class PaymentsData(BaseModel):
         status: Optional[str] = None,
         decline_code: Optional[str] = None,
     ) -> List[Transaction]:
-        start_dt = _parse_dt(start_time)
-        end_dt = _parse_dt(end_time)
-
-        out: List[Transaction] = []
-        for t in self.transactions:
-            if t.merchant_id.lower() != merchant_id.lower():
-                continue
-            ts = _parse_dt(t.timestamp)
-            if not (start_dt <= ts <= end_dt):
-                continue
-            if status and t.status != status:
-                continue
-            if decline_code and t.decline_code != decline_code:
-                continue
-            out.append(t)
-
-        # sort most recent first
-        out.sort(key=lambda x: _parse_dt(x.timestamp), reverse=True)
-        return out
+        return self._txns.window(
+            merchant_id,
+            _parse_dt(start_time).timestamp(),
+            _parse_dt(end_time).timestamp(),
+            status=status,
+            decline_code=decline_code,
+        )
+
+    @task(detailed=True)
+    async def pick_representative_transaction(
+        self,
+        merchant_id: str,
+        start_time: str,
+        end_time: str,
+        strategy: str = "declined_highest_risk",
+        top_n: int = 1,
+    ) -> Tuple[List[Transaction], str]:
+        """Top `top_n` candidates in the window under `strategy` (best first) and the reason code."""
+        if strategy not in PICK_STRATEGIES:
+            raise ValueError(
+                f"Unknown strategy '{strategy}' (expected one of {', '.join(PICK_STRATEGIES)})."
+            )
+        return self._txns.top_by_risk(
+            merchant_id,
+            _parse_dt(start_time).timestamp(),
+            _parse_dt(end_time).timestamp(),
+            strategy,
+            max(1, top_n),
+            self._risk_bands.high_min,
+        )
+
+    @task(detailed=True)
+    async def list_transactions_page(
+        self,
+        merchant_id: str,
+        start_time: str,
+        end_time: str,
+        status: Optional[str] = None,
+        decline_code: Optional[str] = None,
+        offset: int = 0,
+        limit: int = 50,
+    ) -> Tuple[int, List[Transaction]]:
+        """(total matching rows, rows[offset:offset + limit]), most recent first."""
+        return self._txns.window_page(
+            merchant_id,
+            _parse_dt(start_time).timestamp(),
+            _parse_dt(end_time).timestamp(),
+            status,
+            decline_code,
+            offset,
+            limit,
+        )
+
+    @task(detailed=True)
+    async def summarize_transactions(
+        self,
+        merchant_id: str,
+        start_time: str,
+        end_time: str,
+        status: Optional[str] = None,
+        decline_code: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Counts by status / decline code / risk band, amount total and time span for a window."""
+        return self._txns.window_summary(
+            merchant_id,
+            _parse_dt(start_time).timestamp(),
+            _parse_dt(end_time).timestamp(),
+            status,
+            decline_code,
+            self._risk_bands,
+        )
+
+    def dump_transaction(self, t: Transaction) -> Dict[str, Any]:
+        """
+        model_dump() of a transaction, cached per transaction_id (bounded LRU,
+        TOOL_ROW_CACHE_SIZE). The returned dict is shared: treat it as read-only.
+        """
+        cache = self._dump_cache
+        key = t.transaction_id
+        row = cache.get(key)
+        if row is not None:
+            cache.move_to_end(key)
+            return row
+        row = t.model_dump()
+        cache[key] = row
+        if len(cache) > self._dump_cache_size:
+            cache.popitem(last=False)
+        return row
+
+    def memo_stats(self) -> Dict[str, Any]:
+        return self._memo.snapshot()
 
     # ---------- Deterministic business logic ----------
 
     def _risk_band(self, risk_score: float) -> str:
-        bands = self.policies.fraud_risk_bands
-        if risk_score < float(bands["low"]["max_exclusive"]):
-            return bands["low"]["label"]
-        if float(bands["medium"]["min_inclusive"]) <= risk_score < float(bands["medium"]["max_exclusive"]):
-            return bands["medium"]["label"]
-        return bands["high"]["label"]
+        return self._risk_bands.label(risk_score)
 
     def _monitoring_verdict(self, chargeback_ratio: float) -> str:
-        mp = self.policies.monitoring_program
-        if chargeback_ratio >= float(mp["monitoring_threshold"]):
-            return "Monitoring"
-        if chargeback_ratio >= float(mp["approaching_threshold"]):
-            return "Approaching"
-        if chargeback_ratio >= float(mp["early_warning_threshold"]):
-            return "EarlyWarning"
-        return "Healthy"
+        return self._rules.verdict(chargeback_ratio)
 
     @task()
-    async def evaluate_transaction(self, transaction_id: str) -> Dict[str, Any]:
+    async def evaluate_transaction(
+        self, transaction_id: str, as_json: bool = False
+    ) -> Dict[str, Any] | str:
+        """Risk band, signals and next actions for a transaction (memoized; as_json: the JSON payload)."""
+        key = ResultMemo.key("evaluate_transaction", transaction_id)
+        entry = await self._memo.get_or_compute(
+            key, lambda: self._evaluate_transaction(transaction_id)
+        )
+        return entry.payload if as_json else entry.copy()
+
+    async def _evaluate_transaction(self, transaction_id: str) -> Dict[str, Any]:
         t = await self.get_transaction(transaction_id)
         band = self._risk_band(t.risk_score)
 
-        signals: List[str] = []
-        if t.status == "declined":
-            signals.append(f"Declined: {t.decline_code or 'UNKNOWN'} ({t.decline_reason or 'No reason provided'})")
-        if t.three_ds_result in ("FAILED", None) and t.channel == "ecom":
-            signals.append("Weak/absent 3DS signal for e-commerce")
-        if t.avs_result in ("N", "U", None):
-            signals.append("AVS not strong")
-        if t.cvv_result in ("N", "U", None):
-            signals.append("CVV not strong")
-        if t.risk_score >= 0.80:
-            signals.append("High risk score")
+        signals = self._rules.describe_signals(t)
 
         next_actions: List[str] = []
-        if band == "High":
-            next_actions.append("Recommend step-up authentication (3DS) and additional screening for similar transactions.")
+        if band == self._risk_bands.high_label:
+            next_actions.append(HIGH_RISK_ACTION)
         if t.status == "declined" and t.decline_code:
             guidance = self.policies.decline_code_guidance.get(t.decline_code)
             if guidance and guidance.get("general_guidance"):
                 next_actions.extend(guidance["general_guidance"])
 
         if not next_actions:
-            next_actions.append("No immediate action required based on current signals.")
+            next_actions.append(NO_ACTION)
 
         return {
-            "transaction": t.model_dump(),
+            "transaction": self.dump_transaction(t),
             "risk_band": band,
             "signals": signals,
             "next_actions": next_actions,
         }
 
     @task()
-    async def check_merchant_compliance(self, merchant_id: str) -> Dict[str, Any]:
+    async def evaluate_transactions(
+        self,
+        transaction_ids: Optional[List[str]] = None,
+        merchant_id: Optional[str] = None,
+        start_time: Optional[str] = None,
+        end_time: Optional[str] = None,
+        status: Optional[str] = None,
+        decline_code: Optional[str] = None,
+        limit: int = 50,
+    ) -> Dict[str, Any]:
+        """
+        evaluate_transaction for many rows in one pass: the given IDs, or a merchant window
+        (status / decline_code filter the window only). Verdicts for the first `limit` rows;
+        counts by signal / risk band / decline code, decline guidance and next actions over all.
+        """
+        missing: List[str] = []
+        if transaction_ids:
+            selection, missing = self._txns.select_ids(transaction_ids)
+        elif merchant_id and start_time and end_time:
+            await self.get_merchant(merchant_id)
+            selection = self._txns.select_window(
+                merchant_id,
+                _parse_dt(start_time).timestamp(),
+                _parse_dt(end_time).timestamp(),
+                status,
+                decline_code,
+            )
+        else:
+            raise ValueError(
+                "Pass transaction_ids, or merchant_id with start_time and end_time."
+            )
+
+        result = self._txns.evaluate_batch(selection, self._rules, max(0, limit))
+        guidance = {
+            code: self.policies.decline_code_guidance[code]
+            for code in result["by_decline_code"]
+            if code in self.policies.decline_code_guidance
+        }
+        next_actions: List[str] = []
+        if result["by_risk_band"][self._risk_bands.high_label]:
+            next_actions.append(HIGH_RISK_ACTION)
+        for entry in guidance.values():
+            next_actions.extend(
+                a for a in entry.get("general_guidance", []) if a not in next_actions
+            )
+        result["decline_guidance"] = guidance
+        result["next_actions"] = next_actions or [NO_ACTION]
+        if missing:
+            result["missing_ids"] = missing
+        return result
+
+    @task()
+    async def check_merchant_compliance(
+        self, merchant_id: str, as_json: bool = False
+    ) -> Dict[str, Any] | str:
+        """Monitoring-program verdict and remediation for a merchant (memoized; as_json: the JSON payload)."""
+        # last_30d is relative to now: the as-of minute is part of the key
+        as_of = time.time() // COMPLIANCE_AS_OF_STEP_S * COMPLIANCE_AS_OF_STEP_S
+        key = ResultMemo.key("check_merchant_compliance", merchant_id.lower(), as_of)
+        entry = await self._memo.get_or_compute(
+            key, lambda: self._check_merchant_compliance(merchant_id, as_of)
+        )
+        return entry.payload if as_json else entry.copy()
+
+    async def _check_merchant_compliance(
+        self, merchant_id: str, as_of: float
+    ) -> Dict[str, Any]:
         m = await self.get_merchant(merchant_id)
         verdict = self._monitoring_verdict(m.chargeback_ratio)
 
-        # Choose remediation snippet based on MCC / risk segment (demo heuristic)
-        recs: List[str] = []
+        cb_30d = self.rollups.summary(m.merchant_id, ["30d"], as_of)["30d"][
+            "chargebacks"
+        ]
+        merchant_cbs = self.rollups.chargebacks_for(m.merchant_id)
 
-        def add_snip(snip_id: str):
-            for snip in self.policies.kb_snippets:
-                if snip.get("id") == snip_id:
-                    recs.extend(snip.get("content", []))
+        return {
+            "merchant_id": m.merchant_id,
+            "chargeback_ratio": m.chargeback_ratio,
+            "thresholds": dict(self._rules.thresholds),
+            "verdict": verdict,
+            "remediation_snippet_id": self._rules.remediation_snippet(m),
+            "chargebacks": {
+                "total": len(merchant_cbs),
+                "open": sum(1 for c in merchant_cbs if c.status == "open"),
+                "last_30d": cb_30d,
+            },
+        }
 
-        # Travel MCC (4722) -> chargeback remediation playbook
-        if m.mcc == "4722":
-            add_snip("KB-CHARGEBACK-REMEDIATION")
+    @task()
+    async def merchant_summary(
+        self,
+        merchant_id: str,
+        windows: Optional[List[str]] = None,
+        as_of: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Rolling-window rollups (counts, decline codes, risk percentiles, chargebacks) for a merchant."""
+        m = await self.get_merchant(merchant_id)
+        as_of_dt = _parse_dt(as_of) if as_of else datetime.now().astimezone()
+        return {
+            "merchant_id": m.merchant_id,
+            "merchant_name": m.merchant_name,
+            "mcc": m.mcc,
+            "risk_segment": m.risk_segment,
+            "chargeback_ratio": m.chargeback_ratio,
+            "monitoring_verdict": self._monitoring_verdict(m.chargeback_ratio),
+            "as_of": as_of_dt.isoformat(),
+            "windows": self.rollups.summary(
+                m.merchant_id, windows or list(WINDOWS), as_of_dt.timestamp()
+            ),
+        }
 
-        # Digital goods / high-risk segments -> 3DS step-up guidance
-        elif m.risk_segment in ("High",) or m.mcc in ("5815", "5816"):
-            add_snip("KB-3DS-STEPUP")
+    def _semantic_policy_index(self) -> Any:
+        if self._semantic_index is None:
+            with self._semantic_lock:
+                if self._semantic_index is None:
+                    from src.agent.policy_semantic import SemanticPolicyIndex
 
-        # Default
-        else:
-            add_snip("KB-CHARGEBACK-REMEDIATION")
+                    self._semantic_index = SemanticPolicyIndex(
+                        self.policies.kb_snippets, self.policies.version
+                    )
+        return self._semantic_index
 
-        if not recs:
-            recs = ["Review fraud controls and customer support workflows."]
+    def _allowed_snippets(
+        self, context: Optional[Dict[str, Any]]
+    ) -> Optional[List[bool]]:
+        """
+        Per-snippet filter from the lookup context. Snippets may declare
+        `applies_to: {merchant_ids, mcc, regions, risk_segments}`; context keys
+        merchant_id / mcc / region / risk_segment are matched against it, with
+        missing facets filled from the merchant profile. None means no filter.
+        """
+        snippets = self.policies.kb_snippets
+        if not context or not any(s.get("applies_to") for s in snippets):
+            return None
 
-        thresholds = {
-            "early_warning_threshold": self.policies.monitoring_program["early_warning_threshold"],
-            "approaching_threshold": self.policies.monitoring_program["approaching_threshold"],
-            "monitoring_threshold": self.policies.monitoring_program["monitoring_threshold"],
+        facets = {
+            "merchant_ids": context.get("merchant_id"),
+            "mcc": context.get("mcc"),
+            "regions": context.get("region"),
+            "risk_segments": context.get("risk_segment"),
         }
+        m = self._merchant_index.get(str(context.get("merchant_id") or "").lower())
+        if m is not None:
+            facets["mcc"] = facets["mcc"] or m.mcc
+            facets["regions"] = facets["regions"] or m.region
+            facets["risk_segments"] = facets["risk_segments"] or m.risk_segment
 
-        return {
-            "merchant_id": m.merchant_id,
-            "chargeback_ratio": m.chargeback_ratio,
-            "thresholds": thresholds,
-            "verdict": verdict
-            }
+        def allowed(snip: Dict[str, Any]) -> bool:
+            for key, values in (snip.get("applies_to") or {}).items():
+                value = facets.get(key)
+                if (
+                    value is not None
+                    and values
+                    and str(value).lower() not in {str(v).lower() for v in values}
+                ):
+                    return False
+            return True
+
+        return [allowed(s) for s in snippets]
+
+    def _keyword_policy_hits(
+        self, query: str, top_k: int, allowed: Optional[List[bool]]
+    ) -> List[Tuple[int, float]]:
+        if allowed is None:
+            return self._policy_index.search(query, top_k=top_k)
+        hits = self._policy_index.search(query, top_k=len(self._policy_index))
+        return [(i, score) for i, score in hits if allowed[i]][:top_k]
 
     @task()
-    async def lookup_internal_policy(self, query: str, context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-        q = query.lower().strip()
-        hits: List[Dict[str, Any]] = []
-
-        # simple tag/title/content matching
-        for snip in self.policies.kb_snippets:
-            hay = " ".join(
-                [
-                    snip.get("id", ""),
-                    snip.get("title", ""),
-                    " ".join(snip.get("tags", []) or []),
-                    " ".join(snip.get("content", []) or []),
-                ]
-            ).lower()
-            if q in hay or any(tok in hay for tok in q.split()):
-                hits.append(snip)
+    async def lookup_internal_policy(
+        self,
+        query: str,
+        context: Optional[Dict[str, Any]] = None,
+        top_k: int = 5,
+        mode: Optional[str] = None,
+        as_json: bool = False,
+    ) -> Dict[str, Any] | str:
+        """
+        Retrieve KB snippets for `query` (memoized; as_json: the JSON payload).
+
+        mode (default from POLICY_RETRIEVAL_MODE, else "keyword"):
+          keyword  - BM25 over id/title/tags/content (index built at load)
+          semantic - embedding nearest neighbours (see policy_semantic.py);
+                     context["signals"] is appended to the query
+          hybrid   - reciprocal-rank fusion of the two
+        """
+        mode = (mode or os.getenv("POLICY_RETRIEVAL_MODE") or "keyword").lower()
+        key = ResultMemo.key(
+            "lookup_internal_policy", query, context or {}, top_k, mode
+        )
+        entry = await self._memo.get_or_compute(
+            key, lambda: self._lookup_internal_policy(query, context, top_k, mode)
+        )
+        return entry.payload if as_json else entry.copy()
+
+    async def _lookup_internal_policy(
+        self, query: str, context: Optional[Dict[str, Any]], top_k: int, mode: str
+    ) -> Dict[str, Any]:
+        allowed = self._allowed_snippets(context)
+
+        semantic_query = query
+        signals = (context or {}).get("signals")
+        if signals:
+            semantic_query = (
+                f"{query} {' '.join(signals) if isinstance(signals, list) else signals}"
+            )
+
+        if mode == "keyword":
+            hits = self._keyword_policy_hits(query, top_k, allowed)
+        elif mode == "semantic":
+            hits = self._semantic_policy_index().search(
+                semantic_query, top_k=top_k, allowed=allowed
+            )
+        elif mode == "hybrid":
+            depth = max(top_k * 4, 20)
+            fused: Dict[int, float] = {}
+            for ranked in (
+                self._keyword_policy_hits(query, depth, allowed),
+                self._semantic_policy_index().search(
+                    semantic_query, top_k=depth, allowed=allowed
+                ),
+            ):
+                for rank, (i, _) in enumerate(ranked):
+                    fused[i] = fused.get(i, 0.0) + 1.0 / (60 + rank)
+            hits = sorted(fused.items(), key=lambda kv: (-kv[1], kv[0]))[:top_k]
+        else:
+            raise ValueError(
+                f"Unknown policy retrieval mode '{mode}' (expected keyword, semantic or hybrid)."
+            )
 
         return {
-            "results": hits[:5],
+            "results": [
+                {**self.policies.kb_snippets[i], "score": round(score, 4)}
+                for i, score in hits
+            ],
             "source": f"internal-demo-kb:{self.policies.version}",
+            "retrieval_mode": mode,
             "context_used": context or {},
         }
 
 
-def load_payments_store() -> PaymentsData:
+def resolve_data_dir() -> Path:
     """
-    Load demo data from a directory.
+    Locate the demo data directory.
 
     Configure via env var:
       PAYMENT_DEMO_DATA_DIR=/path/to/mastercard_agent_demo_data
@@ -279,20 +1004,92 @@ def load_payments_store() -> PaymentsData:
     """
     env_dir = os.getenv("PAYMENT_DEMO_DATA_DIR")
     if env_dir:
-        return PaymentsData.load_from_dir(env_dir)
+        return Path(env_dir)
 
     # default: look for a sibling folder
     # If your service runs from repo root, place dataset at ./mastercard_agent_demo_data
     default_dir = Path(os.getcwd()) / "mastercard_agent_demo_data"
     if default_dir.exists():
-        return PaymentsData.load_from_dir(default_dir)
+        return default_dir
 
     # fallback: allow running from within src/ or other working dirs
     alt_dir = Path(__file__).resolve().parents[2] / "mastercard_agent_demo_data"
     if alt_dir.exists():
-        return PaymentsData.load_from_dir(alt_dir)
+        return alt_dir
 
     raise FileNotFoundError(
         "Demo data not found. Set PAYMENT_DEMO_DATA_DIR to the dataset folder "
         "containing merchants.json, transactions.json, chargebacks.json, policies_kb.json."
-    )
\ No newline at end of file
+    )
+
+
+DATA_FILES = (
+    "merchants.json",
+    "transactions.json",
+    "transactions.jsonl",
+    "chargebacks.json",
+    "chargebacks.jsonl",
+    "policies_kb.json",
+)
+
+
+def data_fingerprint(data_dir: str | Path) -> Dict[str, List[int]]:
+    """(size, mtime_ns) of each dataset file present in `data_dir`."""
+    data_dir = Path(data_dir)
+    out: Dict[str, List[int]] = {}
+    for name in DATA_FILES:
+        path = data_dir / name
+        if path.exists():
+            st = path.stat()
+            out[name] = [st.st_size, st.st_mtime_ns]
+    return out
+
+
+def load_payments_store() -> PaymentsData:
+    """
+    Load demo data from the directory found by resolve_data_dir().
+
+    Configure via env vars:
+      PAYMENT_STORE_BACKEND=rows|columnar      (columnar requires numpy)
+      PAYMENT_DEMO_LOADER=eager|streaming      (streaming also reads *.jsonl)
+      PAYMENT_DEMO_LOAD_PROGRESS=1             (print streaming load progress)
+      PAYMENT_DEMO_SNAPSHOT_DIR=/path/to/snap  (binary snapshot, see payments_snapshot.py)
+    The streaming loader is used automatically when transactions.json is absent
+    but transactions.jsonl is present.
+
+    With PAYMENT_DEMO_SNAPSHOT_DIR set the store is mmap-loaded from the
+    snapshot; a missing or stale snapshot is (re)built from the JSON first,
+    by one worker at a time.
+    """
+    data_dir = resolve_data_dir()
+
+    snapshot_dir = os.getenv("PAYMENT_DEMO_SNAPSHOT_DIR")
+    if snapshot_dir:
+        from src.agent.payments_snapshot import ensure_snapshot, load_snapshot
+
+        return load_snapshot(ensure_snapshot(data_dir, snapshot_dir))
+
+    backend = os.getenv("PAYMENT_STORE_BACKEND", "rows")
+
+    loader = os.getenv("PAYMENT_DEMO_LOADER", "eager")
+    if (
+        not (data_dir / "transactions.json").exists()
+        and (data_dir / "transactions.jsonl").exists()
+    ):
+        loader = "streaming"
+
+    if loader == "streaming":
+        from src.agent.payments_loader import load_from_dir_streaming, print_progress
+
+        show_progress = os.getenv("PAYMENT_DEMO_LOAD_PROGRESS", "").lower() in (
+            "1",
+            "true",
+            "yes",
+        )
+        return load_from_dir_streaming(
+            data_dir,
+            backend=backend,
+            progress=print_progress if show_progress else None,
+        )
+
+    return PaymentsData.load_from_dir(data_dir, backend=backend)
@@ -0,0 +1,269 @@
+"""Streaming loader for large PaymentsData directories (demo).
+
+PaymentsData.load_from_dir reads each file whole and json.loads it, so peak
+memory is a multiple of the dataset size. This loader instead walks the
+transactions/chargebacks arrays element by element (or line by line for the
+JSON-Lines variants `transactions.jsonl` / `chargebacks.jsonl`), validates rows
+in batches and hands them straight to the transaction backend, so the only
+extra memory is one read chunk plus one batch.
+
+merchants.json and policies_kb.json are small and still read in one go.
+"""
+
+from __future__ import annotations
+
+import codecs
+import json
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from pydantic import BaseModel, TypeAdapter
+
+from src.agent.payments_data_model import (
+    Chargeback,
+    MerchantProfile,
+    PaymentsData,
+    PaymentsPolicyKB,
+    Transaction,
+)
+
+DEFAULT_BATCH_SIZE = 5000
+DEFAULT_CHUNK_SIZE = 1 << 20  # 1 MiB
+# A single array element larger than this is treated as malformed input, not buffered further.
+MAX_RECORD_CHARS = 16 << 20
+# How far before the end of the buffer a decode error can be when the value was only cut off
+# by the chunk boundary: a partial literal ("fals") or \uXXXX escape.
+_TRUNCATION_SLACK = 6
+
+_TRANSACTIONS = TypeAdapter(List[Transaction])
+_CHARGEBACKS = TypeAdapter(List[Chargeback])
+_WHITESPACE = " \t\r\n"
+
+
+class LoadProgress(BaseModel):
+    file: str
+    rows: int
+    bytes_read: int
+    total_bytes: int
+    done: bool = False
+
+    @property
+    def fraction(self) -> float:
+        return self.bytes_read / self.total_bytes if self.total_bytes else 1.0
+
+
+ProgressCallback = Callable[[LoadProgress], None]
+
+
+def print_progress(p: LoadProgress) -> None:
+    state = "done" if p.done else f"{p.fraction:.0%}"
+    print(f"[payments-loader] {p.file}: {p.rows} rows ({state})")
+
+
+def _cut_off(err: json.JSONDecodeError) -> bool:
+    """Whether raw_decode failed only because the value runs past the end of the buffer."""
+    return (
+        err.msg.startswith("Unterminated string")
+        or len(err.doc) - err.pos <= _TRUNCATION_SLACK
+    )
+
+
+class _Reader:
+    """Binary file reader with incremental UTF-8 decoding and a byte counter."""
+
+    def __init__(self, path: Path, chunk_size: int):
+        self._f = path.open("rb")
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._chunk_size = chunk_size
+        self.bytes_read = 0
+        self.eof = False
+
+    def read(self) -> str:
+        chunk = self._f.read(self._chunk_size)
+        self.bytes_read += len(chunk)
+        if not chunk:
+            self.eof = True
+            return self._decoder.decode(b"", final=True)
+        return self._decoder.decode(chunk)
+
+    def offset_of(self, buf: str, index: int) -> int:
+        """Approximate file offset of buf[index], where `buf` ends with the text read so far."""
+        return self.bytes_read - len(buf[index:].encode("utf-8"))
+
+    def close(self) -> None:
+        self._f.close()
+
+
+def iter_json_array(
+    path: Path, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[tuple[Dict[str, Any], int]]:
+    """Yield (object, bytes_read) for each element of a top-level JSON array of objects."""
+    decoder = json.JSONDecoder()
+    reader = _Reader(path, chunk_size)
+    buf, pos = "", 0
+    started = False
+    try:
+        while True:
+            # skip whitespace and separators, refilling the buffer as needed
+            while pos < len(buf) and buf[pos] in _WHITESPACE:
+                pos += 1
+            if pos >= len(buf):
+                if reader.eof:
+                    raise ValueError(
+                        f"{path}: unexpected end of file (unterminated JSON array)."
+                    )
+                buf, pos = buf[pos:] + reader.read(), 0
+                continue
+
+            ch = buf[pos]
+            if not started:
+                if ch != "[":
+                    raise ValueError(f"{path}: expected a JSON array.")
+                started = True
+                pos += 1
+                continue
+            if ch == "]":
+                return
+            if ch == ",":
+                pos += 1
+                continue
+            if ch != "{":
+                raise ValueError(
+                    f"{path}: array elements must be JSON objects (offset {reader.bytes_read})."
+                )
+
+            try:
+                obj, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError as e:
+                # fail on the first bad element instead of buffering (and re-parsing) the rest of the file
+                if reader.eof or not _cut_off(e):
+                    at = reader.offset_of(buf, e.pos)
+                    raise ValueError(
+                        f"{path}: malformed JSON near byte {at}: {e.msg}."
+                    ) from e
+                if len(buf) - pos > MAX_RECORD_CHARS:
+                    at = reader.offset_of(buf, pos)
+                    raise ValueError(
+                        f"{path}: array element at byte {at} exceeds {MAX_RECORD_CHARS} characters."
+                    ) from e
+                # object spans the chunk boundary
+                buf, pos = buf[pos:] + reader.read(), 0
+                continue
+            pos = end
+            yield obj, reader.bytes_read
+    finally:
+        reader.close()
+
+
+def iter_json_lines(path: Path) -> Iterator[tuple[Dict[str, Any], int]]:
+    """Yield (object, bytes_read) for each non-blank line of a JSON-Lines file."""
+    bytes_read = 0
+    with path.open("rb") as f:
+        for line in f:
+            bytes_read += len(line)
+            if line.strip():
+                yield json.loads(line), bytes_read
+
+
+def _records_path(data_dir: Path, name: str) -> Path:
+    """Prefer `<name>.jsonl`, fall back to `<name>.json`."""
+    jsonl = data_dir / f"{name}.jsonl"
+    return jsonl if jsonl.exists() else data_dir / f"{name}.json"
+
+
+def iter_records(
+    path: Path, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[tuple[Dict[str, Any], int]]:
+    if path.suffix in (".jsonl", ".ndjson"):
+        return iter_json_lines(path)
+    return iter_json_array(path, chunk_size=chunk_size)
+
+
+def iter_validated_batches(
+    path: Path,
+    adapter: TypeAdapter,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    progress: Optional[ProgressCallback] = None,
+) -> Iterator[List[Any]]:
+    """Stream `path` and yield lists of validated models, `batch_size` rows at a time."""
+    total = path.stat().st_size
+    rows = 0
+    bytes_read = 0
+    batch: List[Dict[str, Any]] = []
+    for obj, bytes_read in iter_records(path):
+        batch.append(obj)
+        if len(batch) >= batch_size:
+            rows += len(batch)
+            yield adapter.validate_python(batch)
+            batch = []
+            if progress:
+                progress(
+                    LoadProgress(
+                        file=path.name,
+                        rows=rows,
+                        bytes_read=bytes_read,
+                        total_bytes=total,
+                    )
+                )
+    if batch:
+        rows += len(batch)
+        yield adapter.validate_python(batch)
+    if progress:
+        progress(
+            LoadProgress(
+                file=path.name,
+                rows=rows,
+                bytes_read=total,
+                total_bytes=total,
+                done=True,
+            )
+        )
+
+
+def load_from_dir_streaming(
+    data_dir: str | Path,
+    backend: str = "rows",
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    progress: Optional[ProgressCallback] = None,
+) -> PaymentsData:
+    """Streaming equivalent of PaymentsData.load_from_dir (also reads *.jsonl)."""
+    data_dir = Path(data_dir)
+    merchants = json.loads((data_dir / "merchants.json").read_text(encoding="utf-8"))
+    policies = json.loads((data_dir / "policies_kb.json").read_text(encoding="utf-8"))
+
+    chargebacks: List[Chargeback] = []
+    for batch in iter_validated_batches(
+        _records_path(data_dir, "chargebacks"), _CHARGEBACKS, batch_size, progress
+    ):
+        chargebacks.extend(batch)
+
+    txn_batches = iter_validated_batches(
+        _records_path(data_dir, "transactions"), _TRANSACTIONS, batch_size, progress
+    )
+
+    if backend == "columnar":
+        from src.agent.payments_columnar import ColumnarTransactionsBuilder
+
+        builder = ColumnarTransactionsBuilder()
+        for batch in txn_batches:
+            builder.extend(batch)
+        return PaymentsData.from_backend(
+            backend=builder.build(),
+            merchants=[MerchantProfile(**m) for m in merchants],
+            chargebacks=chargebacks,
+            policies=PaymentsPolicyKB(**policies),
+        )
+    if backend != "rows":
+        raise ValueError(
+            f"Unknown PaymentsData backend '{backend}' (expected 'rows' or 'columnar')."
+        )
+
+    transactions: List[Transaction] = []
+    for batch in txn_batches:
+        transactions.extend(batch)
+    return PaymentsData(
+        merchants=[MerchantProfile(**m) for m in merchants],
+        transactions=transactions,
+        chargebacks=chargebacks,
+        policies=PaymentsPolicyKB(**policies),
+    )
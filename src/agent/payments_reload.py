@@ -0,0 +1,159 @@
+"""Hot-reload of the PaymentsData store without restarting workers (demo).
+
+PaymentsStoreHolder owns the live store. A reload builds the new store on a
+worker thread while tool calls keep using the old one, then swaps the reference
+in one assignment: callers read `holder.current` once per call and never see a
+half-built store, and LangGraph threads held in memory are untouched.
+
+Reloads are triggered by:
+  - the watcher (PAYMENT_DEMO_RELOAD_INTERVAL_S > 0) polling file size/mtime of
+    the dataset under PAYMENT_DEMO_DATA_DIR, or
+  - POST /admin/reload_data in src/main.py.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+import traceback
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from src.agent.payments_data_model import (
+    PaymentsData,
+    data_fingerprint,
+    load_payments_store,
+    resolve_data_dir,
+)
+
+ReloadListener = Callable[[PaymentsData, int], None]
+
+
+class PaymentsStoreHolder:
+    """Atomically swappable reference to the current PaymentsData."""
+
+    def __init__(
+        self,
+        loader: Callable[[], PaymentsData] = load_payments_store,
+        data_dir: Optional[Callable[[], Path]] = resolve_data_dir,
+    ):
+        self._loader = loader
+        self._data_dir = data_dir
+        self._reload_lock = threading.Lock()
+        self._listeners: List[ReloadListener] = []
+        self._watcher: Optional[asyncio.Task] = None
+
+        self._fingerprint = self._current_fingerprint()
+        self._store = loader()
+        self.version = 1
+        self.loaded_at = time.time()
+        self.last_error: Optional[str] = None
+
+    @property
+    def current(self) -> PaymentsData:
+        return self._store
+
+    def add_listener(self, listener: ReloadListener) -> None:
+        """Call `listener(new_store, version)` after every swap (e.g. to drop caches)."""
+        self._listeners.append(listener)
+
+    def status(self) -> Dict[str, Any]:
+        store = self._store
+        return {
+            "version": self.version,
+            "loaded_at": self.loaded_at,
+            "policies_version": store.policies.version,
+            "backend": store.backend_name,
+            "transactions": store.transaction_count,
+            "merchants": len(store.merchants),
+            "reloading": self._reload_lock.locked(),
+            "last_error": self.last_error,
+        }
+
+    def _current_fingerprint(self) -> Dict[str, List[int]]:
+        if self._data_dir is None:
+            return {}
+        try:
+            return data_fingerprint(self._data_dir())
+        except FileNotFoundError:
+            return {}
+
+    def changed(self) -> bool:
+        return self._current_fingerprint() != self._fingerprint
+
+    def swap(self, store: PaymentsData) -> int:
+        self._store = store
+        self.version += 1
+        self.loaded_at = time.time()
+        for listener in list(self._listeners):
+            try:
+                listener(store, self.version)
+            except Exception:
+                traceback.print_exc()
+        return self.version
+
+    def reload(self, force: bool = False) -> Dict[str, Any]:
+        """Blocking reload. Returns a status dict; the old store stays live on failure."""
+        if not self._reload_lock.acquire(blocking=False):
+            return {"status": "in_progress", "version": self.version}
+        try:
+            fingerprint = self._current_fingerprint()
+            if not force and fingerprint == self._fingerprint:
+                return {"status": "unchanged", "version": self.version}
+
+            t0 = time.perf_counter()
+            try:
+                store = self._loader()
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                print(
+                    f"[payments-reload] reload failed, keeping version {self.version}: {self.last_error}"
+                )
+                return {
+                    "status": "error",
+                    "version": self.version,
+                    "error": self.last_error,
+                }
+
+            self._fingerprint = fingerprint
+            self.last_error = None
+            version = self.swap(store)
+            elapsed_ms = round((time.perf_counter() - t0) * 1000, 1)
+            print(
+                f"[payments-reload] loaded version {version} ({store.policies.version}) in {elapsed_ms}ms"
+            )
+            return {"status": "reloaded", "version": version, "load_ms": elapsed_ms}
+        finally:
+            self._reload_lock.release()
+
+    async def areload(self, force: bool = False) -> Dict[str, Any]:
+        """Reload on a worker thread so the event loop (and in-flight tool calls) keep running."""
+        return await asyncio.to_thread(self.reload, force)
+
+    async def watch(self, interval_s: float) -> None:
+        while True:
+            await asyncio.sleep(interval_s)
+            if self.changed():
+                await self.areload()
+
+    def start_watcher(
+        self, interval_s: Optional[float] = None
+    ) -> Optional[asyncio.Task]:
+        """Start polling the data dir (interval from PAYMENT_DEMO_RELOAD_INTERVAL_S; 0 disables)."""
+        if interval_s is None:
+            interval_s = float(os.getenv("PAYMENT_DEMO_RELOAD_INTERVAL_S", "0") or 0)
+        if interval_s <= 0 or (self._watcher is not None and not self._watcher.done()):
+            return self._watcher
+        self._watcher = asyncio.get_running_loop().create_task(self.watch(interval_s))
+        return self._watcher
+
+    async def stop_watcher(self) -> None:
+        if self._watcher is not None:
+            self._watcher.cancel()
+            try:
+                await self._watcher
+            except asyncio.CancelledError:
+                pass
+            self._watcher = None
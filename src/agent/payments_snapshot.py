@@ -0,0 +1,333 @@
+"""Binary snapshot format for fast PaymentsData cold start (demo).
+
+A snapshot is a directory written once from the JSON dataset:
+
+  header.json              format version, row count, dictionaries, merchant
+                           bounds and the source-data fingerprint
+  tables.json              merchants, chargebacks and policies (small)
+  <numeric>.npy            amount / risk_score / neg_epoch (float64)
+  <field>.codes.npy        dictionary codes for categorical fields (int32)
+  <field>.offsets.npy      string columns: int64 offsets into <field>.data.bin,
+  <field>.nulls.npy          a bool null mask
+  <field>.data.bin           and the concatenated UTF-8 bytes
+  id_order.npy             row positions sorted by lower-cased transaction_id
+
+Columns are loaded with mmap, so opening a snapshot costs milliseconds and
+worker processes on one host share the same page-cache pages instead of each
+holding its own copy. The loaded store uses the columnar backend.
+
+Build one with:
+  python -m src.agent.payments_snapshot <data_dir> <snapshot_dir>
+and point PAYMENT_DEMO_SNAPSHOT_DIR at it.
+
+<snapshot_dir> is a symlink to a versioned directory next to it
+(.<name>.gen-<ns>-<pid>). A rebuild writes a new generation and publishes it
+by replacing the symlink with one os.replace, so readers always see a
+complete generation; load_snapshot() resolves the link once and reads every
+file from that generation. Rebuilds take an exclusive file lock
+(.<name>.lock) and re-check freshness once it is held, so when several
+workers start on stale data one of them rebuilds and the others load its
+result. The previous generation is kept for readers that are still opening
+it; older ones are removed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # no flock on Windows: rebuilds are not coordinated across processes
+    fcntl = None
+
+from src.agent.payments_columnar import (
+    CATEGORICAL_FIELDS,
+    NUMERIC_FIELDS,
+    STRING_FIELDS,
+    ColumnarTransactions,
+    ColumnarTransactionsBuilder,
+    Dictionary,
+)
+from src.agent.payments_data_model import (
+    Chargeback,
+    MerchantProfile,
+    PaymentsData,
+    PaymentsPolicyKB,
+    data_fingerprint,
+)
+
+SNAPSHOT_FORMAT = "payments-snapshot"
+SNAPSHOT_VERSION = 2  # 2: id_order breaks ties between duplicate IDs by load order
+
+
+class PackedStrings:
+    """Read-only string column over (offsets, nulls, utf-8 bytes) arrays."""
+
+    def __init__(self, offsets: np.ndarray, nulls: np.ndarray, data: np.ndarray):
+        self._offsets = offsets
+        self._nulls = nulls
+        self._data = data
+
+    def __len__(self) -> int:
+        return len(self._nulls)
+
+    def __getitem__(self, i: int) -> Optional[str]:
+        if self._nulls[i]:
+            return None
+        return bytes(self._data[self._offsets[i] : self._offsets[i + 1]]).decode(
+            "utf-8"
+        )
+
+
+def _write_strings(out_dir: Path, name: str, values: Sequence[Optional[str]]) -> None:
+    offsets = np.zeros(len(values) + 1, dtype=np.int64)
+    nulls = np.zeros(len(values), dtype=np.bool_)
+    with (out_dir / f"{name}.data.bin").open("wb") as f:
+        pos = 0
+        for i, v in enumerate(values):
+            if v is None:
+                nulls[i] = True
+            else:
+                b = v.encode("utf-8")
+                f.write(b)
+                pos += len(b)
+            offsets[i + 1] = pos
+    np.save(out_dir / f"{name}.offsets.npy", offsets)
+    np.save(out_dir / f"{name}.nulls.npy", nulls)
+
+
+def _read_strings(snap_dir: Path, name: str) -> PackedStrings:
+    data_path = snap_dir / f"{name}.data.bin"
+    # np.memmap cannot map an empty file
+    data = (
+        np.memmap(data_path, dtype=np.uint8, mode="r")
+        if data_path.stat().st_size
+        else np.empty(0, np.uint8)
+    )
+    return PackedStrings(
+        offsets=np.load(snap_dir / f"{name}.offsets.npy", mmap_mode="r"),
+        nulls=np.load(snap_dir / f"{name}.nulls.npy", mmap_mode="r"),
+        data=data,
+    )
+
+
+def _columnar(store: PaymentsData) -> ColumnarTransactions:
+    if store.backend_name == "columnar":
+        return store.backend
+    builder = ColumnarTransactionsBuilder()
+    builder.extend(store.iter_transactions())
+    return builder.build()
+
+
+def _generation_dirs(out_dir: Path) -> List[Path]:
+    """Generation directories of `out_dir`, oldest first."""
+    gens = out_dir.parent.glob(f".{out_dir.name}.gen-*")
+    return sorted(
+        gens, key=lambda p: int(p.name.rsplit(".gen-", 1)[1].split("-", 1)[0])
+    )
+
+
+@contextlib.contextmanager
+def snapshot_lock(out_dir: str | Path) -> Iterator[None]:
+    """Exclusive cross-process lock for (re)building the snapshot at `out_dir`."""
+    out_dir = Path(out_dir)
+    out_dir.parent.mkdir(parents=True, exist_ok=True)
+    with (out_dir.parent / f".{out_dir.name}.lock").open("a") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def _publish(gen_dir: Path, out_dir: Path) -> None:
+    previous = out_dir.resolve() if out_dir.is_symlink() else None
+    if out_dir.exists() and not out_dir.is_symlink():
+        # snapshot written by an older version as a plain directory: move it aside once
+        legacy = out_dir.with_name(f".{out_dir.name}.gen-0-{os.getpid()}")
+        os.replace(out_dir, legacy)
+        previous = legacy
+    link = out_dir.with_name(f".{out_dir.name}.link-{os.getpid()}")
+    if link.is_symlink() or link.exists():
+        link.unlink()
+    link.symlink_to(gen_dir.name)
+    os.replace(link, out_dir)
+
+    # compare absolute paths: out_dir (and so legacy) may be relative
+    keep = {gen_dir.resolve(), previous.resolve() if previous is not None else None}
+    for old in _generation_dirs(out_dir):
+        if old.resolve() not in keep:
+            shutil.rmtree(old, ignore_errors=True)
+
+
+def write_snapshot(
+    store: PaymentsData, out_dir: str | Path, source: Optional[Dict[str, Any]] = None
+) -> Path:
+    """
+    Write `store` as a new snapshot generation and switch `out_dir` to it atomically.
+    Callers that may race other processes hold snapshot_lock(out_dir).
+    """
+    out_dir = Path(out_dir)
+    gen_dir = out_dir.with_name(f".{out_dir.name}.gen-{time.time_ns()}-{os.getpid()}")
+    gen_dir.mkdir(parents=True)
+
+    cols = _columnar(store)
+    for name, arr in cols.numeric.items():
+        np.save(gen_dir / f"{name}.npy", np.ascontiguousarray(arr, dtype=np.float64))
+    np.save(
+        gen_dir / "neg_epoch.npy",
+        np.ascontiguousarray(cols.neg_epoch, dtype=np.float64),
+    )
+    for name, arr in cols.codes.items():
+        np.save(
+            gen_dir / f"{name}.codes.npy", np.ascontiguousarray(arr, dtype=np.int32)
+        )
+    for name, values in cols.strings.items():
+        _write_strings(gen_dir, name, values)
+    np.save(
+        gen_dir / "id_order.npy", np.ascontiguousarray(cols.id_order, dtype=np.int64)
+    )
+
+    tables = {
+        "merchants": [m.model_dump() for m in store.merchants],
+        "chargebacks": [c.model_dump() for c in store.chargebacks],
+        "policies": store.policies.model_dump(),
+    }
+    (gen_dir / "tables.json").write_text(json.dumps(tables), encoding="utf-8")
+
+    header = {
+        "format": SNAPSHOT_FORMAT,
+        "version": SNAPSHOT_VERSION,
+        "created_at": time.time(),
+        "rows": len(cols),
+        "policies_version": store.policies.version,
+        "source": source or {},
+        "dictionaries": {name: d.values for name, d in cols.dictionaries.items()},
+        "merchant_bounds": {k: list(v) for k, v in cols.merchant_bounds.items()},
+    }
+    # header last: a directory without it is never treated as a snapshot
+    (gen_dir / "header.json").write_text(json.dumps(header), encoding="utf-8")
+
+    _publish(gen_dir, out_dir)
+    return out_dir
+
+
+def _build_snapshot(data_dir: str | Path, out_dir: str | Path) -> Path:
+    from src.agent.payments_loader import load_from_dir_streaming
+
+    store = load_from_dir_streaming(data_dir, backend="columnar")
+    return write_snapshot(store, out_dir, source=data_fingerprint(data_dir))
+
+
+def build_snapshot(data_dir: str | Path, out_dir: str | Path) -> Path:
+    """Load the JSON dataset in `data_dir` (streaming) and write it as a snapshot."""
+    with snapshot_lock(out_dir):
+        return _build_snapshot(data_dir, out_dir)
+
+
+def ensure_snapshot(data_dir: str | Path, out_dir: str | Path) -> Path:
+    """Rebuild the snapshot at `out_dir` unless it is fresh; concurrent callers rebuild once."""
+    if is_fresh(out_dir, data_dir):
+        return Path(out_dir)
+    with snapshot_lock(out_dir):
+        # another worker may have rebuilt it while we waited for the lock
+        if not is_fresh(out_dir, data_dir):
+            _build_snapshot(data_dir, out_dir)
+    return Path(out_dir)
+
+
+def read_header(snap_dir: str | Path) -> Optional[Dict[str, Any]]:
+    path = Path(snap_dir) / "header.json"
+    if not path.exists():
+        return None
+    header = json.loads(path.read_text(encoding="utf-8"))
+    if (
+        header.get("format") != SNAPSHOT_FORMAT
+        or header.get("version") != SNAPSHOT_VERSION
+    ):
+        return None
+    return header
+
+
+def is_fresh(snap_dir: str | Path, data_dir: str | Path) -> bool:
+    """True when the snapshot exists and was built from the current files in `data_dir`."""
+    header = read_header(snap_dir)
+    return header is not None and header.get("source") == data_fingerprint(data_dir)
+
+
+def load_snapshot(snap_dir: str | Path) -> PaymentsData:
+    # resolve the generation once: a concurrent publish cannot mix files from two builds
+    snap_dir = Path(snap_dir).resolve()
+    header = read_header(snap_dir)
+    if header is None:
+        raise FileNotFoundError(
+            f"No payments snapshot (format v{SNAPSHOT_VERSION}) at {snap_dir}."
+        )
+
+    cols = ColumnarTransactions(
+        numeric={
+            name: np.load(snap_dir / f"{name}.npy", mmap_mode="r")
+            for name in NUMERIC_FIELDS
+        },
+        neg_epoch=np.load(snap_dir / "neg_epoch.npy", mmap_mode="r"),
+        codes={
+            name: np.load(snap_dir / f"{name}.codes.npy", mmap_mode="r")
+            for name in CATEGORICAL_FIELDS
+        },
+        dictionaries={
+            name: Dictionary(header["dictionaries"][name])
+            for name in CATEGORICAL_FIELDS
+        },
+        strings={name: _read_strings(snap_dir, name) for name in STRING_FIELDS},
+        merchant_bounds={
+            k: (int(v[0]), int(v[1])) for k, v in header["merchant_bounds"].items()
+        },
+        id_order=np.load(snap_dir / "id_order.npy", mmap_mode="r"),
+    )
+
+    tables = json.loads((snap_dir / "tables.json").read_text(encoding="utf-8"))
+    return PaymentsData.from_backend(
+        backend=cols,
+        merchants=[MerchantProfile(**m) for m in tables["merchants"]],
+        chargebacks=[Chargeback(**c) for c in tables["chargebacks"]],
+        policies=PaymentsPolicyKB(**tables["policies"]),
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Build a PaymentsData binary snapshot from a JSON dataset."
+    )
+    parser.add_argument(
+        "data_dir",
+        help="Directory with merchants/transactions/chargebacks/policies_kb JSON",
+    )
+    parser.add_argument(
+        "snapshot_dir", help="Output snapshot directory (replaced if it exists)"
+    )
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    out = build_snapshot(args.data_dir, args.snapshot_dir)
+    print(f"Wrote snapshot to {out} in {time.perf_counter() - t0:.2f}s")
+
+    t0 = time.perf_counter()
+    store = load_snapshot(out)
+    print(
+        f"Loaded {store.transaction_count} transactions from snapshot in {(time.perf_counter() - t0) * 1000:.1f}ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
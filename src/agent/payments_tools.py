@@ -6,27 +6,39 @@ Slack tools are implemented as stubs that you can later replace with real MCP ca
 
 from __future__ import annotations
 
+import asyncio
+import base64
+import hashlib
+import json
 import os
 import warnings
-from fastmcp import Client
-from fastmcp.client.transports import StreamableHttpTransport
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
+from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import tool
-from traceloop.sdk.decorators import tool as traceloop_tool
 
-from src.agent.payments_data_model import load_payments_store
+from src.agent.payments_data_model import Transaction
+from src.agent.escalation_queue import make_escalation_queue
+from src.agent.mcp_pool import MCPClientPool, MCPConnectError, make_slack_pool
+from src.agent.payments_reload import PaymentsStoreHolder
+from src.agent.singleflight import coalesce_calls, make_tool_singleflight
+from src.agent.tracing import tool as traceloop_tool
 from datetime import datetime, timedelta, timezone
 
 from pydantic.warnings import PydanticDeprecatedSince20
-warnings.filterwarnings(
-    "ignore",
-    category=PydanticDeprecatedSince20)
+
+warnings.filterwarnings("ignore", category=PydanticDeprecatedSince20)
 
 IST = timezone(timedelta(hours=5, minutes=30))
 
-# Load demo dataset once at import time
-PAYMENTS_STORE = load_payments_store()
+# Load demo dataset once at import time; swapped in place on hot reload
+PAYMENTS_STORE_HOLDER = PaymentsStoreHolder()
+
+# Identical concurrent read-only tool calls against the same store version share one execution
+TOOL_SINGLEFLIGHT = make_tool_singleflight()
+coalesced = coalesce_calls(
+    TOOL_SINGLEFLIGHT, version=lambda: PAYMENTS_STORE_HOLDER.version
+)
 
 # def _mask_sensitive(text: str) -> str:
 #     # Basic safety: avoid posting full PAN/CVV/etc. (demo guardrail)
@@ -37,120 +49,459 @@ PAYMENTS_STORE = load_payments_store()
 #         return "REDACTED: message contained sensitive card data indicators."
 #     return text
 
+# One long-lived Slack MCP client shared by all calls (connects on first use)
+SLACK_MCP_POOL = make_slack_pool()
+
+
 async def _call_remote_mcp(tool_name: str, tool_args: Dict[str, Any]) -> Any:
-    transport = StreamableHttpTransport(
-        url=os.getenv("TFY_SLACK_MCP_URL"),
-        headers={"Authorization": f"Bearer {os.getenv('TFY_API_KEY')}"}
+    return await SLACK_MCP_POOL.call_tool(tool_name, tool_args)
+
+
+async def _send_slack_message(
+    channel: str,
+    text: str,
+    thread_ts: Optional[str] = None,
+    pool: MCPClientPool = SLACK_MCP_POOL,
+) -> Any:
+    args = {
+        "channel": channel,
+        "message": text,
+        # "message": _mask_sensitive(text),
+    }
+
+    if thread_ts:
+        args["threadTs"] = thread_ts
+
+    return await pool.call_tool("sendMessage", args)
+
+
+# Escalations are delivered by a background worker so the agent does not wait on Slack. The worker
+# runs its own event loop, so it gets its own Slack MCP client instead of sharing SLACK_MCP_POOL.
+ESCALATION_SLACK_POOL = make_slack_pool()
+
+
+async def _send_escalation(
+    channel: str, text: str, thread_ts: Optional[str] = None
+) -> Any:
+    return await _send_slack_message(
+        channel, text, thread_ts, pool=ESCALATION_SLACK_POOL
     )
 
-    async with Client(transport=transport) as client:
-        return await client.call_tool(tool_name, tool_args)
 
-@tool
-@traceloop_tool()
-async def list_transactions(
+ESCALATION_QUEUE = make_escalation_queue(
+    _send_escalation, on_stop=ESCALATION_SLACK_POOL.close, retry_on=(MCPConnectError,)
+)
+
+# Server-side cap on rows returned by one list call; the rest is reachable via next_cursor.
+TOOL_MAX_ROWS = int(os.getenv("TOOL_MAX_ROWS", "50"))
+TRANSACTION_FIELDS = tuple(Transaction.model_fields)
+# Memoized tools return the store's cached JSON payload instead of a dict LangChain re-serializes per call.
+TOOL_JSON_PAYLOADS = os.getenv("TOOL_JSON_PAYLOADS", "1").lower() not in (
+    "0",
+    "false",
+    "no",
+)
+
+
+def _filter_key(
+    merchant_id: str, status: Optional[str], decline_code: Optional[str]
+) -> str:
+    raw = json.dumps([merchant_id.upper(), status, decline_code])
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def _encode_cursor(offset: int, start_time: str, end_time: str, filter_key: str) -> str:
+    raw = json.dumps(
+        {"o": offset, "s": start_time, "e": end_time, "f": filter_key},
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def _decode_cursor(cursor: str, filter_key: str) -> Dict[str, Any]:
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        page = {
+            "offset": int(data["o"]),
+            "start_time": str(data["s"]),
+            "end_time": str(data["e"]),
+        }
+        issued_for = str(data["f"])
+    except Exception as e:
+        raise ValueError(f"Invalid cursor '{cursor}'.") from e
+    if page["offset"] < 0:
+        raise ValueError(f"Invalid cursor '{cursor}': negative offset.")
+    if issued_for != filter_key:
+        raise ValueError(
+            "Cursor was issued for a different merchant_id/status/decline_code; "
+            "repeat those filters or start again without a cursor."
+        )
+    return page
+
+
+async def _transactions_page(
     merchant_id: str,
     start_time: str,
     end_time: str,
-    status: Optional[str] = None,
-    decline_code: Optional[str] = None,
+    status: Optional[str],
+    decline_code: Optional[str],
+    fields: Optional[List[str]],
+    limit: Optional[int],
+    cursor: Optional[str],
+    summary_only: bool,
 ) -> Dict[str, Any]:
-    """List recent transactions for a merchant over a time range."""
-    txns = await PAYMENTS_STORE.list_transactions(
+    """Shared body of the list tools: window summary + one projected page of rows."""
+    offset = 0
+    filter_key = _filter_key(merchant_id, status, decline_code)
+    if cursor:
+        # the cursor pins the original window so relative windows (last 48h) don't drift between pages
+        page = _decode_cursor(cursor, filter_key)
+        offset, start_time, end_time = (
+            page["offset"],
+            page["start_time"],
+            page["end_time"],
+        )
+    if fields:
+        unknown = [f for f in fields if f not in TRANSACTION_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown transaction field(s): {', '.join(unknown)}.")
+    # at least one row per page, so following next_cursor always makes progress
+    limit = TOOL_MAX_ROWS if limit is None else max(1, min(limit, TOOL_MAX_ROWS))
+
+    store = PAYMENTS_STORE_HOLDER.current
+    summary = await store.summarize_transactions(
         merchant_id=merchant_id,
         start_time=start_time,
         end_time=end_time,
         status=status,
         decline_code=decline_code,
     )
-    return {"merchant_id": merchant_id, "count": len(txns), "transactions": [t.model_dump() for t in txns]}
+    out: Dict[str, Any] = {
+        "merchant_id": merchant_id,
+        "start_time": start_time,
+        "end_time": end_time,
+        "count": summary["count"],
+        "summary": summary,
+    }
+    if summary_only:
+        return out
+
+    total, txns = await store.list_transactions_page(
+        merchant_id=merchant_id,
+        start_time=start_time,
+        end_time=end_time,
+        status=status,
+        decline_code=decline_code,
+        offset=offset,
+        limit=limit,
+    )
+    rows = [store.dump_transaction(t) for t in txns]
+    if fields:
+        rows = [{f: row[f] for f in fields} for row in rows]
+    end = offset + len(rows)
+    out.update(
+        offset=offset,
+        returned=len(rows),
+        transactions=rows,
+        truncated=end < total,
+        next_cursor=_encode_cursor(end, start_time, end_time, filter_key)
+        if end < total
+        else None,
+    )
+    if end < total:
+        out[
+            "note"
+        ] = f"Showing rows {offset + 1}-{end} of {total}; pass next_cursor for more."
+    return out
+
+
+@tool
+@traceloop_tool()
+@coalesced
+async def list_transactions(
+    merchant_id: str,
+    start_time: str,
+    end_time: str,
+    status: Optional[str] = None,
+    decline_code: Optional[str] = None,
+    fields: Optional[List[str]] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    summary_only: bool = False,
+) -> Dict[str, Any]:
+    """
+    List recent transactions for a merchant over a time range (most recent first).
+    Always returns `count` (total matches) and a `summary` (counts by status / decline code / risk band).
+    Rows are capped per call: pass `next_cursor` back as `cursor` for the next page. Use `fields`
+    (e.g. ["transaction_id", "status", "decline_code", "risk_score"]) to return only those columns,
+    or summary_only=true to skip rows entirely.
+    """
+    return await _transactions_page(
+        merchant_id,
+        start_time,
+        end_time,
+        status,
+        decline_code,
+        fields,
+        limit,
+        cursor,
+        summary_only,
+    )
+
 
 @tool
 @traceloop_tool()
+@coalesced
 async def list_transactions_last_48h(
     merchant_id: str,
     status: Optional[str] = None,
+    fields: Optional[List[str]] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    summary_only: bool = False,
 ) -> Dict[str, Any]:
-    """List transactions for last 48 hours in IST."""
+    """
+    List transactions for last 48 hours in IST. Same paging / fields / summary_only options as
+    list_transactions; a cursor keeps the original 48h window.
+    """
     end_dt = datetime.now(IST)
     start_dt = end_dt - timedelta(hours=48)
 
-    txns = await PAYMENTS_STORE.list_transactions(
-        merchant_id=merchant_id,
-        start_time=start_dt.isoformat(),
-        end_time=end_dt.isoformat(),
-        status=status,
+    return await _transactions_page(
+        merchant_id,
+        start_dt.isoformat(),
+        end_dt.isoformat(),
+        status,
+        None,
+        fields,
+        limit,
+        cursor,
+        summary_only,
     )
-    
-    return {
-        "merchant_id": merchant_id,
-        "start_time": start_dt.isoformat(),
-        "end_time": end_dt.isoformat(),
-        "count": len(txns),
-        "transactions": [t.model_dump() for t in txns],
-    }
+
+
+# Columns returned per candidate by pick_representative_transaction.
+CANDIDATE_FIELDS = (
+    "transaction_id",
+    "timestamp",
+    "status",
+    "decline_code",
+    "risk_score",
+    "amount",
+)
+
 
 @tool
 @traceloop_tool()
-async def pick_representative_transaction(merchant_id: str, window_hours: int = 48) -> Dict[str, Any]:
-    """Pick a representative high-risk or declined transaction from the last N hours."""
+@coalesced
+async def pick_representative_transaction(
+    merchant_id: str,
+    window_hours: int = 48,
+    strategy: str = "declined_highest_risk",
+    top_n: int = 1,
+) -> Dict[str, Any]:
+    """
+    Pick a representative high-risk or declined transaction from the last N hours.
+    strategy: "declined_highest_risk" (default), "highest_risk", "most_common_decline_code"
+    (highest-risk decline with the window's most frequent decline code) or "recent_high_risk"
+    (most recent High-band rows). top_n > 1 also returns the next best candidates.
+    """
     end_dt = datetime.now(IST)
     start_dt = end_dt - timedelta(hours=window_hours)
 
-    txns = await PAYMENTS_STORE.list_transactions(
+    store = PAYMENTS_STORE_HOLDER.current
+    candidates, reason = await store.pick_representative_transaction(
         merchant_id=merchant_id,
         start_time=start_dt.isoformat(),
         end_time=end_dt.isoformat(),
+        strategy=strategy,
+        top_n=max(1, min(top_n, TOOL_MAX_ROWS)),
     )
 
-    if not txns:
+    if not candidates:
         return {
             "merchant_id": merchant_id,
             "transaction_id": None,
-            "reason": "no_transactions",
+            "reason": reason,
+            "strategy": strategy,
             "start_time": start_dt.isoformat(),
             "end_time": end_dt.isoformat(),
         }
 
-    # Convert to dict once, so the rest is simple
-    txns_dicts = [t.model_dump() for t in txns]
-
-    declined = [t for t in txns_dicts if t.get("status") == "declined"]
-    if declined:
-        chosen = max(declined, key=lambda t: float(t.get("risk_score", 0.0) or 0.0))
-        reason = "picked_declined_highest_risk"
-    else:
-        chosen = max(txns_dicts, key=lambda t: float(t.get("risk_score", 0.0) or 0.0))
-        reason = "picked_highest_risk"
-
+    chosen = candidates[0]
+    rows = [store.dump_transaction(t) for t in candidates]
     return {
         "merchant_id": merchant_id,
-        "transaction_id": chosen.get("transaction_id"),
-        "chosen": chosen,
+        "transaction_id": chosen.transaction_id,
+        "chosen": rows[0],
+        "candidates": [{f: row[f] for f in CANDIDATE_FIELDS} for row in rows],
         "reason": reason,
+        "strategy": strategy,
         "start_time": start_dt.isoformat(),
         "end_time": end_dt.isoformat(),
     }
 
+
 @tool
 @traceloop_tool()
-async def analyze_transaction(transaction_id: str) -> Dict[str, Any]:
+@coalesced
+async def analyze_transaction(transaction_id: str) -> Dict[str, Any] | str:
     """Fetch transaction details and return deterministic risk band + guidance."""
-    return await PAYMENTS_STORE.evaluate_transaction(transaction_id)
+    return await PAYMENTS_STORE_HOLDER.current.evaluate_transaction(
+        transaction_id, as_json=TOOL_JSON_PAYLOADS
+    )
+
+
+@tool
+@traceloop_tool()
+@coalesced
+async def analyze_transactions(
+    transaction_ids: Optional[List[str]] = None,
+    merchant_id: Optional[str] = None,
+    window_hours: int = 48,
+    status: Optional[str] = None,
+    decline_code: Optional[str] = None,
+    limit: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Analyze many transactions in one call: pass transaction_ids, or merchant_id to analyze its last
+    `window_hours` (optionally only one status / decline_code). Returns per-row verdicts (risk band +
+    signals) for up to `limit` rows and a summary over all matches: counts by signal with sample IDs,
+    by risk band and by decline code, plus decline guidance and next actions. Prefer this over
+    repeated analyze_transaction calls when triaging a decline spike or a risky merchant.
+    """
+    limit = TOOL_MAX_ROWS if limit is None else max(0, min(limit, TOOL_MAX_ROWS))
+    store = PAYMENTS_STORE_HOLDER.current
+    if transaction_ids:
+        return await store.evaluate_transactions(
+            transaction_ids=transaction_ids, limit=limit
+        )
+
+    end_dt = datetime.now(IST)
+    start_dt = end_dt - timedelta(hours=window_hours)
+    result = await store.evaluate_transactions(
+        merchant_id=merchant_id,
+        start_time=start_dt.isoformat(),
+        end_time=end_dt.isoformat(),
+        status=status,
+        decline_code=decline_code,
+        limit=limit,
+    )
+    return {
+        "merchant_id": merchant_id,
+        "start_time": start_dt.isoformat(),
+        "end_time": end_dt.isoformat(),
+        **result,
+    }
 
 
 @tool
 @traceloop_tool()
-async def check_merchant_compliance(merchant_id: str) -> Dict[str, Any]:
+@coalesced
+async def check_merchant_compliance(merchant_id: str) -> Dict[str, Any] | str:
     """Evaluate merchant chargeback_ratio against demo thresholds and return a verdict."""
-    return await PAYMENTS_STORE.check_merchant_compliance(merchant_id)
+    return await PAYMENTS_STORE_HOLDER.current.check_merchant_compliance(
+        merchant_id, as_json=TOOL_JSON_PAYLOADS
+    )
+
+
+@tool
+@traceloop_tool()
+@coalesced
+async def merchant_summary(
+    merchant_id: str,
+    windows: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Compact rolling-window summary for a merchant: approval/decline counts, decline-code histogram,
+    risk-score percentiles, amount totals and chargeback count/ratio.
+    windows: any of "1h", "24h", "48h", "30d" (default: all). Prefer this over raw transaction lists
+    when reasoning about decline spikes or risk trends.
+    """
+    return await PAYMENTS_STORE_HOLDER.current.merchant_summary(
+        merchant_id, windows=windows
+    )
+
+
+@tool
+@traceloop_tool()
+@coalesced
+async def lookup_internal_policy(
+    query: str,
+    context: Optional[Dict[str, Any]] = None,
+    top_k: int = 5,
+    mode: Optional[str] = None,
+) -> Dict[str, Any] | str:
+    """
+    Retrieve internal policy/runbook snippets based on a query (demo KB), ranked by relevance score.
+    mode: "keyword" (BM25), "semantic" (embedding search, matches paraphrases) or "hybrid";
+    defaults to the server setting. context may include merchant_id and key signals.
+    """
+    return await PAYMENTS_STORE_HOLDER.current.lookup_internal_policy(
+        query=query, context=context, top_k=top_k, mode=mode, as_json=TOOL_JSON_PAYLOADS
+    )
 
 
 @tool
 @traceloop_tool()
-async def lookup_internal_policy(query: str, context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-    """Retrieve internal policy/runbook snippets based on a query (demo KB)."""
-    return await PAYMENTS_STORE.lookup_internal_policy(query=query, context=context)
+@coalesced
+async def investigate_merchant_risk(
+    merchant_id: str,
+    window_hours: int = 48,
+    strategy: str = "declined_highest_risk",
+    policy_query: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Fraud / merchant-risk workflow in one call. Runs concurrently: the transaction window summary
+    (as list_transactions_last_48h with summary_only), pick_representative_transaction followed by
+    analyze_transaction on the chosen txn, check_merchant_compliance and lookup_internal_policy
+    (policy_query, or a default fraud / decline-spike query). Returns all results combined.
+    """
+    store = PAYMENTS_STORE_HOLDER.current
+    merchant = await store.get_merchant(merchant_id)
+    end_dt = datetime.now(IST)
+    start_dt = end_dt - timedelta(hours=window_hours)
+    start_time, end_time = start_dt.isoformat(), end_dt.isoformat()
+    query = (
+        policy_query
+        or f"fraud risk decline spike step-up authentication {merchant.risk_segment} risk merchant"
+    )
+
+    async def pick_and_analyze() -> Dict[str, Any]:
+        # the only dependent step: analysis needs the picked transaction id
+        candidates, reason = await store.pick_representative_transaction(
+            merchant_id=merchant_id,
+            start_time=start_time,
+            end_time=end_time,
+            strategy=strategy,
+        )
+        if not candidates:
+            return {"transaction_id": None, "reason": reason, "analysis": None}
+        chosen = candidates[0]
+        return {
+            "transaction_id": chosen.transaction_id,
+            "reason": reason,
+            "analysis": await store.evaluate_transaction(chosen.transaction_id),
+        }
+
+    window, representative, compliance, policy = await asyncio.gather(
+        store.summarize_transactions(
+            merchant_id=merchant_id, start_time=start_time, end_time=end_time
+        ),
+        pick_and_analyze(),
+        store.check_merchant_compliance(merchant_id),
+        store.lookup_internal_policy(query=query, context={"merchant_id": merchant_id}),
+    )
+    return {
+        "merchant_id": merchant_id,
+        "start_time": start_time,
+        "end_time": end_time,
+        "strategy": strategy,
+        "transactions_summary": window,
+        "representative": representative,
+        "compliance": compliance,
+        "policy": policy,
+    }
 
 
 # # ---------------- Slack MCP (stub) ----------------
@@ -179,6 +530,7 @@ async def lookup_internal_policy(query: str, context: Optional[Dict[str, Any]] =
 
 # ---------------- Slack MCP (Actual) ----------------
 
+
 @tool
 @traceloop_tool()
 async def slack_get_conversations(
@@ -202,23 +554,35 @@ async def slack_send_message(
     channel: str,
     text: str,
     thread_ts: Optional[str] = None,
+    config: RunnableConfig = None,
 ) -> Dict[str, Any]:
-    """Send a Slack message via MCP tool `sendMessage`."""
-
-    args = {
-        "channel": channel,
-        "message": text,
-        # "message": _mask_sensitive(text),
-    }
+    """
+    Send a Slack message via MCP tool `sendMessage`. Delivery is queued: the result is a handle
+    (escalation_id, status "queued") returned right away; a queued handle counts as sent.
+    Use slack_escalation_status only if delivery needs to be confirmed.
+    """
+    if ESCALATION_QUEUE is None:
+        return await _send_slack_message(channel, text, thread_ts)
+    thread_id = ((config or {}).get("configurable") or {}).get("thread_id")
+    return ESCALATION_QUEUE.enqueue(
+        channel, text, thread_ts=thread_ts, thread_id=thread_id
+    )
 
-    if thread_ts:
-        args["threadTs"] = thread_ts
 
-    return await _call_remote_mcp("sendMessage", args)
+@tool
+@traceloop_tool()
+async def slack_escalation_status(escalation_id: str) -> Dict[str, Any]:
+    """Delivery state of a queued slack_send_message: queued, sending, delivered (with Slack result) or failed."""
+    if ESCALATION_QUEUE is None:
+        raise ValueError(
+            "Slack escalations are sent synchronously; there is no queued delivery to check."
+        )
+    return ESCALATION_QUEUE.status(escalation_id)
 
 
 # ---------------- Web search (optional stub) ----------------
 
+
 @tool
 @traceloop_tool()
 async def web_search(query: str) -> Dict[str, Any]:
@@ -239,9 +603,13 @@ tools = [
     list_transactions_last_48h,
     pick_representative_transaction,
     analyze_transaction,
+    analyze_transactions,
     check_merchant_compliance,
+    merchant_summary,
+    investigate_merchant_risk,
     lookup_internal_policy,
     slack_get_conversations,
     slack_send_message,
+    slack_escalation_status,
     web_search,
-]
\ No newline at end of file
+]
@@ -0,0 +1,130 @@
+"""Inverted index + BM25 ranking over internal KB snippets (demo).
+
+Built once when PaymentsData loads. Each snippet's id, title, tags and content
+are tokenized into one weighted bag of words (id/title/tags count double).
+BM25 term weights do not depend on the query, so each posting stores its final
+impact score and a lookup is just a sum over the postings of the query tokens
+(vectorized with numpy when it is installed). This keeps lookups well under a
+millisecond as the KB grows to thousands of snippets.
+"""
+
+from __future__ import annotations
+
+import heapq
+import math
+import re
+from typing import AbstractSet, Any, Dict, List, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pure-Python scoring fallback
+    np = None
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset(
+    """
+    a an and are as at be by can do does for from how i if in into is it its of on or our should so that
+    the their then there these this to was we what when where which who why will with you your
+    """.split()
+)
+
+# Field -> term-frequency weight.
+FIELD_WEIGHTS = {"id": 2.0, "title": 2.0, "tags": 2.0, "content": 1.0}
+
+
+def _stem(tok: str) -> str:
+    # light plural folding only: "declines" -> "decline", "policies" -> "policy"
+    if len(tok) > 4 and tok.endswith("ies"):
+        return tok[:-3] + "y"
+    if len(tok) > 3 and tok.endswith("s") and not tok.endswith("ss"):
+        return tok[:-1]
+    return tok
+
+
+def tokenize(text: str, keep: AbstractSet[str] = frozenset()) -> List[str]:
+    """Lower-case word tokens with plurals folded; stopwords are dropped unless listed in `keep`."""
+    return [
+        _stem(t)
+        for t in _TOKEN_RE.findall(text.lower())
+        if t not in STOPWORDS or t in keep
+    ]
+
+
+def snippet_fields(snip: Dict[str, Any]) -> Dict[str, str]:
+    return {
+        "id": snip.get("id", "") or "",
+        "title": snip.get("title", "") or "",
+        "tags": " ".join(snip.get("tags", []) or []),
+        "content": " ".join(snip.get("content", []) or []),
+    }
+
+
+class PolicyIndex:
+    """BM25 (Okapi) over a fixed list of KB snippets."""
+
+    def __init__(
+        self, snippets: Sequence[Dict[str, Any]], k1: float = 1.2, b: float = 0.75
+    ):
+        self.snippets = list(snippets)
+        self.k1 = k1
+        self.b = b
+
+        postings: Dict[str, List[Tuple[int, float]]] = {}
+        doc_len: List[float] = []
+        for doc, snip in enumerate(self.snippets):
+            tf: Dict[str, float] = {}
+            for field, text in snippet_fields(snip).items():
+                weight = FIELD_WEIGHTS[field]
+                for tok in tokenize(text):
+                    tf[tok] = tf.get(tok, 0.0) + weight
+            doc_len.append(sum(tf.values()))
+            for tok, freq in tf.items():
+                postings.setdefault(tok, []).append((doc, freq))
+
+        n = len(self.snippets)
+        avgdl = (sum(doc_len) / n) if n else 0.0
+        self._impacts: Dict[str, Tuple[Any, Any]] = {}
+        for tok, plist in postings.items():
+            idf = math.log(1 + (n - len(plist) + 0.5) / (len(plist) + 0.5))
+            docs = [doc for doc, _ in plist]
+            impacts = []
+            for doc, freq in plist:
+                norm = k1 * (1 - b + b * (doc_len[doc] / avgdl if avgdl else 0.0))
+                impacts.append(idf * freq * (k1 + 1) / (freq + norm))
+            if np is not None:
+                self._impacts[tok] = (
+                    np.asarray(docs, dtype=np.int64),
+                    np.asarray(impacts, dtype=np.float64),
+                )
+            else:
+                self._impacts[tok] = (docs, impacts)
+
+    def __len__(self) -> int:
+        return len(self.snippets)
+
+    def search(self, query: str, top_k: int = 5) -> List[Tuple[int, float]]:
+        """(snippet position, score) pairs, best first (ties by KB order)."""
+        postings = [
+            self._impacts[tok] for tok in set(tokenize(query)) if tok in self._impacts
+        ]
+        if not postings or top_k <= 0:
+            return []
+
+        if np is not None:
+            scores = np.zeros(len(self.snippets), dtype=np.float64)
+            for docs, impacts in postings:
+                scores[docs] += impacts  # docs are unique within one posting list
+            hit = np.flatnonzero(scores)
+            if hit.size > top_k:
+                hit = hit[np.argpartition(-scores[hit], top_k - 1)[:top_k]]
+            return sorted(
+                ((int(d), float(scores[d])) for d in hit),
+                key=lambda kv: (-kv[1], kv[0]),
+            )
+
+        acc: Dict[int, float] = {}
+        for docs, impacts in postings:
+            for doc, impact in zip(docs, impacts):
+                acc[doc] = acc.get(doc, 0.0) + impact
+        return heapq.nlargest(top_k, acc.items(), key=lambda kv: (kv[1], -kv[0]))
@@ -0,0 +1,493 @@
+"""Declarative policy rules compiled into lookup tables (demo).
+
+Risk bands and monitoring verdicts come from the existing policies_kb.json
+sections, fraud_risk_bands and monitoring_program. The `rules` section adds the
+deterministic checks that used to be hard-coded in payments_data_model.py:
+
+    "rules": {
+      "signals": [                         # transaction signals, in report order
+        {"id": "declined", "label": "Declined", "field": "status", "in": ["declined"],
+         "message": "Declined: {decline_code} ({decline_reason})",     # optional, per-row text
+         "message_defaults": {"decline_code": "UNKNOWN", ...}},
+        {"id": "weak_3ds", "label": "...", "field": "three_ds_result", "in": ["FAILED", null],
+         "when": {"channel": ["ecom"]}},
+        {"id": "high_risk_score", "label": "...", "field": "risk_score", "min_inclusive": 0.8}, ...
+      ],
+      "weak_authentication": [             # escalation: any match means weak authentication
+        {"id": "3ds_not_verified", "field": "three_ds_result", "in": ["FAILED", "NOT_ENROLLED", null]}, ...
+      ],
+      "remediation_snippets": [            # first match on merchant profile fields wins
+        {"when": {"mcc": ["4722"]}, "snippet_id": "KB-CHARGEBACK-REMEDIATION"}, ...,
+        {"snippet_id": "KB-CHARGEBACK-REMEDIATION"}
+      ]
+    }
+
+`rules.risk_bands` ([{"label"}, {"label", "min_inclusive"}, ...]) and
+`rules.monitoring` ({"default", "levels": [{"verdict", "threshold", "min_inclusive"}]})
+are still accepted, but only as a restatement: they must match the sections
+they duplicate.
+
+Signals are what analyze_transaction reports; `weak_authentication` is the
+escalation rule from the system prompt (3DS FAILED/NOT_ENROLLED or AVS=N/U or
+CVV=N/U), used by the router. Both use the same rule schema.
+
+compile_rules() runs once per store load. Band and verdict thresholds become
+sorted lists searched with bisect, value lists become frozensets, and remediation
+matches are cached per merchant. Without `rules.signals` / `rules.remediation_snippets`
+/ `rules.weak_authentication` the built-in defaults below apply; they match the
+previous hard-coded behaviour.
+Malformed or conflicting rules raise ValueError, so a bad policy file fails the
+load (or hot reload) instead of being half-applied.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_right
+from string import Formatter
+from typing import Any, Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+from pydantic import BaseModel
+
+# Built-in rules used when policies_kb.json has no `rules.signals` / `rules.weak_authentication` /
+# `rules.remediation_snippets`.
+DEFAULT_SIGNALS: List[Dict[str, Any]] = [
+    {
+        "id": "declined",
+        "label": "Declined",
+        "field": "status",
+        "in": ["declined"],
+        "message": "Declined: {decline_code} ({decline_reason})",
+        "message_defaults": {
+            "decline_code": "UNKNOWN",
+            "decline_reason": "No reason provided",
+        },
+    },
+    {
+        "id": "weak_3ds",
+        "label": "Weak/absent 3DS signal for e-commerce",
+        "field": "three_ds_result",
+        "in": ["FAILED", None],
+        "when": {"channel": ["ecom"]},
+    },
+    {
+        "id": "avs_not_strong",
+        "label": "AVS not strong",
+        "field": "avs_result",
+        "in": ["N", "U", None],
+    },
+    {
+        "id": "cvv_not_strong",
+        "label": "CVV not strong",
+        "field": "cvv_result",
+        "in": ["N", "U", None],
+    },
+    {
+        "id": "high_risk_score",
+        "label": "High risk score",
+        "field": "risk_score",
+        "min_inclusive": 0.8,
+    },
+]
+DEFAULT_WEAK_AUTHENTICATION: List[Dict[str, Any]] = [
+    {
+        "id": "3ds_not_verified",
+        "field": "three_ds_result",
+        "in": ["FAILED", "NOT_ENROLLED", None],
+    },
+    {"id": "avs_not_verified", "field": "avs_result", "in": ["N", "U", None]},
+    {"id": "cvv_not_verified", "field": "cvv_result", "in": ["N", "U", None]},
+]
+DEFAULT_REMEDIATION: List[Dict[str, Any]] = [
+    {"when": {"mcc": ["4722"]}, "snippet_id": "KB-CHARGEBACK-REMEDIATION"},
+    {"when": {"risk_segment": ["High"]}, "snippet_id": "KB-3DS-STEPUP"},
+    {"when": {"mcc": ["5815", "5816"]}, "snippet_id": "KB-3DS-STEPUP"},
+    {"snippet_id": "KB-CHARGEBACK-REMEDIATION"},
+]
+
+Condition = Tuple[str, FrozenSet[Any]]
+
+
+class RiskBands(BaseModel):
+    """Risk-score bands as sorted lower bounds: labels[i] covers [thresholds[i-1], thresholds[i])."""
+
+    thresholds: List[float]
+    labels: List[str]
+
+    @property
+    def low_label(self) -> str:
+        return self.labels[0]
+
+    @property
+    def high_label(self) -> str:
+        return self.labels[-1]
+
+    @property
+    def high_min(self) -> float:
+        """Lowest score in the top band."""
+        return self.thresholds[-1] if self.thresholds else float("-inf")
+
+    def index(self, risk_score: float) -> int:
+        return bisect_right(self.thresholds, risk_score)
+
+    def label(self, risk_score: float) -> str:
+        return self.labels[bisect_right(self.thresholds, risk_score)]
+
+    def counts(self) -> Dict[str, int]:
+        """Zeroed {label: count}, lowest band first."""
+        return {label: 0 for label in self.labels}
+
+
+class SignalRule:
+    """One compiled signal: `field` in `values` and/or within [min_inclusive, max_exclusive), plus `when`."""
+
+    __slots__ = (
+        "id",
+        "label",
+        "field",
+        "values",
+        "min_inclusive",
+        "max_exclusive",
+        "when",
+        "message",
+        "message_defaults",
+    )
+
+    def __init__(
+        self,
+        id: str,
+        label: str,
+        field: str,
+        values: Optional[FrozenSet[Any]],
+        min_inclusive: Optional[float],
+        max_exclusive: Optional[float],
+        when: Tuple[Condition, ...],
+        message: Optional[str] = None,
+        message_defaults: Optional[Dict[str, Any]] = None,
+    ):
+        self.id = id
+        self.label = label
+        self.field = field
+        self.values = values
+        self.min_inclusive = min_inclusive
+        self.max_exclusive = max_exclusive
+        self.when = when
+        self.message = message
+        self.message_defaults = message_defaults or {}
+
+    def matches(self, row: Any) -> bool:
+        value = getattr(row, self.field)
+        if self.values is not None and value not in self.values:
+            return False
+        if self.min_inclusive is not None and (
+            value is None or value < self.min_inclusive
+        ):
+            return False
+        if self.max_exclusive is not None and (
+            value is None or value >= self.max_exclusive
+        ):
+            return False
+        return all(getattr(row, f) in allowed for f, allowed in self.when)
+
+    def describe(self, row: Any) -> str:
+        """The signal as reported for `row`: `message` filled from its fields, else `label`."""
+        if self.message is None:
+            return self.label
+        return self.message.format_map(_RowFields(row, self.message_defaults))
+
+
+class _RowFields(dict):
+    """format_map source: row attributes, with `defaults` for missing / empty values."""
+
+    def __init__(self, row: Any, defaults: Dict[str, Any]):
+        super().__init__()
+        self.row = row
+        self.defaults = defaults
+
+    def __missing__(self, key: str) -> Any:
+        value = getattr(self.row, key)
+        return self.defaults.get(key, value) if value in (None, "") else value
+
+
+class CompiledRules:
+    """Lookup tables built from PaymentsPolicyKB.rules (see the module docstring)."""
+
+    def __init__(
+        self,
+        risk_bands: RiskBands,
+        verdict_thresholds: List[float],
+        verdict_labels: List[str],
+        thresholds: Dict[str, Any],
+        signals: List[SignalRule],
+        remediation: List[Tuple[Tuple[Condition, ...], str]],
+        weak_authentication: List[SignalRule],
+    ):
+        self.risk_bands = risk_bands
+        self.verdict_thresholds = verdict_thresholds
+        self.verdict_labels = verdict_labels
+        self.thresholds = thresholds
+        self.signals = signals
+        self.signal_labels = {s.id: s.label for s in signals}
+        self.remediation = remediation
+        self.weak_authentication = weak_authentication
+        self._remediation_by_merchant: Dict[str, Optional[str]] = {}
+
+    def verdict(self, ratio: float) -> str:
+        return self.verdict_labels[bisect_right(self.verdict_thresholds, ratio)]
+
+    def signals_for(self, row: Any) -> List[str]:
+        """IDs of the signals a transaction raises, in rule order."""
+        return [s.id for s in self.signals if s.matches(row)]
+
+    def describe_signals(self, row: Any) -> List[str]:
+        """Report text of the signals a transaction raises, in rule order."""
+        return [s.describe(row) for s in self.signals if s.matches(row)]
+
+    def weak_auth(self, row: Any) -> bool:
+        """Whether a transaction meets any weak_authentication rule (escalation)."""
+        return any(rule.matches(row) for rule in self.weak_authentication)
+
+    @property
+    def weak_auth_fields(self) -> FrozenSet[str]:
+        """Transaction fields the weak_authentication rules read."""
+        return frozenset(
+            f
+            for r in self.weak_authentication
+            for f in (r.field, *(f for f, _ in r.when))
+        )
+
+    def remediation_snippet(self, merchant: Any) -> Optional[str]:
+        """KB snippet id of the first remediation rule matching the merchant profile."""
+        key = merchant.merchant_id
+        if key not in self._remediation_by_merchant:
+            self._remediation_by_merchant[key] = next(
+                (
+                    snippet_id
+                    for conditions, snippet_id in self.remediation
+                    if all(getattr(merchant, f) in allowed for f, allowed in conditions)
+                ),
+                None,
+            )
+        return self._remediation_by_merchant[key]
+
+
+def _conditions(when: Any, where: str) -> Tuple[Condition, ...]:
+    if when is None:
+        return ()
+    if not isinstance(when, dict):
+        raise ValueError(
+            f"{where}: 'when' must be an object of field -> list of values."
+        )
+    out = []
+    for field, values in when.items():
+        if not isinstance(values, list):
+            raise ValueError(f"{where}: 'when.{field}' must be a list of values.")
+        out.append((str(field), frozenset(values)))
+    return tuple(out)
+
+
+def _ascending(
+    levels: List[Tuple[float, str]], where: str
+) -> Tuple[List[float], List[str]]:
+    levels = sorted(levels)
+    bounds = [b for b, _ in levels]
+    if len(set(bounds)) != len(bounds):
+        raise ValueError(f"{where}: duplicate thresholds {bounds}.")
+    return bounds, [label for _, label in levels]
+
+
+# monitoring_program threshold name -> verdict, lowest first
+MONITORING_LEVELS = (
+    ("EarlyWarning", "early_warning_threshold"),
+    ("Approaching", "approaching_threshold"),
+    ("Monitoring", "monitoring_threshold"),
+)
+
+
+def _compile_bands(rules: Dict[str, Any], legacy: Dict[str, Any]) -> RiskBands:
+    try:
+        bands = sorted(
+            legacy.values(), key=lambda b: float(b.get("min_inclusive", float("-inf")))
+        )
+        for lower, upper in zip(bands, bands[1:]):
+            if float(lower["max_exclusive"]) != float(upper["min_inclusive"]):
+                raise ValueError(
+                    f"fraud_risk_bands: '{lower['label']}' and '{upper['label']}' are not contiguous."
+                )
+        compiled = RiskBands(
+            thresholds=[float(b["min_inclusive"]) for b in bands[1:]],
+            labels=[b["label"] for b in bands],
+        )
+    except KeyError as e:
+        raise ValueError(
+            f"fraud_risk_bands: every band needs a label and its bounds (missing {e})."
+        ) from e
+    if "risk_bands" in rules:
+        spec = rules["risk_bands"]
+        if (
+            not spec
+            or "min_inclusive" in spec[0]
+            or any("min_inclusive" not in b for b in spec[1:])
+        ):
+            raise ValueError(
+                "rules.risk_bands: only the first band may (and must) omit min_inclusive."
+            )
+        bounds, labels = _ascending(
+            [(float(b["min_inclusive"]), b["label"]) for b in spec[1:]],
+            "rules.risk_bands",
+        )
+        if (bounds, [spec[0]["label"], *labels]) != (
+            compiled.thresholds,
+            compiled.labels,
+        ):
+            raise ValueError(
+                "rules.risk_bands does not match fraud_risk_bands; drop it or make them agree."
+            )
+    return compiled
+
+
+def _compile_monitoring(
+    rules: Dict[str, Any], legacy: Dict[str, Any]
+) -> Tuple[List[float], List[str], Dict[str, Any]]:
+    try:
+        levels = [(float(legacy[name]), verdict) for verdict, name in MONITORING_LEVELS]
+    except KeyError as e:
+        raise ValueError(f"monitoring_program: missing threshold {e}.") from e
+    bounds, labels = _ascending(levels, "monitoring_program")
+    if "monitoring" in rules:
+        spec = rules["monitoring"]
+        try:
+            restated = _ascending(
+                [
+                    (float(lv["min_inclusive"]), lv["verdict"])
+                    for lv in spec.get("levels") or []
+                ],
+                "rules.monitoring",
+            )
+        except KeyError as e:
+            raise ValueError(
+                f"rules.monitoring: every level needs verdict and min_inclusive (missing {e})."
+            ) from e
+        if restated != (bounds, labels) or spec.get("default", "Healthy") != "Healthy":
+            raise ValueError(
+                "rules.monitoring does not match monitoring_program; drop it or make them agree."
+            )
+    thresholds = {name: legacy[name] for _, name in MONITORING_LEVELS}
+    return bounds, ["Healthy", *labels], thresholds
+
+
+def _compile_signals(
+    specs: Sequence[Dict[str, Any]],
+    fields: Optional[Sequence[str]],
+    section: str = "rules.signals",
+) -> List[SignalRule]:
+    out: List[SignalRule] = []
+    for spec in specs:
+        where = f"{section}[{spec.get('id', '?')}]"
+        if "id" not in spec or "field" not in spec:
+            raise ValueError(f"{where}: id and field are required.")
+        if (
+            "in" not in spec
+            and "min_inclusive" not in spec
+            and "max_exclusive" not in spec
+        ):
+            raise ValueError(
+                f"{where}: needs 'in', 'min_inclusive' or 'max_exclusive'."
+            )
+        when = _conditions(spec.get("when"), where)
+        if fields is not None:
+            used = [
+                spec["field"],
+                *(f for f, _ in when),
+                *_message_fields(spec.get("message"), where),
+            ]
+            unknown = [f for f in used if f not in fields]
+            if unknown:
+                raise ValueError(f"{where}: unknown transaction field(s) {unknown}.")
+        out.append(
+            SignalRule(
+                id=spec["id"],
+                label=spec.get("label", spec["id"]),
+                field=spec["field"],
+                values=frozenset(spec["in"]) if "in" in spec else None,
+                min_inclusive=float(spec["min_inclusive"])
+                if "min_inclusive" in spec
+                else None,
+                max_exclusive=float(spec["max_exclusive"])
+                if "max_exclusive" in spec
+                else None,
+                when=when,
+                message=spec.get("message"),
+                message_defaults=spec.get("message_defaults"),
+            )
+        )
+    return out
+
+
+def _message_fields(message: Optional[str], where: str) -> List[str]:
+    if message is None:
+        return []
+    try:
+        return [name for _, name, _, _ in Formatter().parse(message) if name]
+    except ValueError as e:
+        raise ValueError(f"{where}: bad message template: {e}.") from None
+
+
+def _compile_remediation(
+    specs: Sequence[Dict[str, Any]],
+    snippet_ids: Sequence[str],
+    merchant_fields: Optional[Sequence[str]],
+) -> List[Tuple[Tuple[Condition, ...], str]]:
+    known = set(snippet_ids)
+    out = []
+    for i, spec in enumerate(specs):
+        where = f"rules.remediation_snippets[{i}]"
+        snippet_id = spec.get("snippet_id")
+        if snippet_id not in known:
+            raise ValueError(f"{where}: unknown KB snippet '{snippet_id}'.")
+        when = _conditions(spec.get("when"), where)
+        if merchant_fields is not None:
+            unknown = [f for f, _ in when if f not in merchant_fields]
+            if unknown:
+                raise ValueError(f"{where}: unknown merchant field(s) {unknown}.")
+        out.append((when, snippet_id))
+    return out
+
+
+def compile_rules(
+    policies: Any,
+    transaction_fields: Optional[Sequence[str]] = None,
+    merchant_fields: Optional[Sequence[str]] = None,
+) -> CompiledRules:
+    """Compile a PaymentsPolicyKB; field names are checked when the model field lists are given."""
+    rules = policies.rules or {}
+    bands = _compile_bands(rules, policies.fraud_risk_bands)
+    verdict_thresholds, verdict_labels, thresholds = _compile_monitoring(
+        rules, policies.monitoring_program
+    )
+    signals = _compile_signals(
+        rules.get("signals", DEFAULT_SIGNALS), transaction_fields
+    )
+    weak_authentication = _compile_signals(
+        rules.get("weak_authentication", DEFAULT_WEAK_AUTHENTICATION),
+        transaction_fields,
+        "rules.weak_authentication",
+    )
+    if not weak_authentication:
+        raise ValueError("rules.weak_authentication: needs at least one rule.")
+    snippet_ids = [s.get("id") for s in policies.kb_snippets]
+    remediation_specs = rules.get("remediation_snippets")
+    if remediation_specs is None:
+        # the built-in mapping only applies to the KB entries that exist
+        remediation_specs = [
+            r for r in DEFAULT_REMEDIATION if r["snippet_id"] in snippet_ids
+        ]
+    remediation = _compile_remediation(remediation_specs, snippet_ids, merchant_fields)
+    return CompiledRules(
+        bands,
+        verdict_thresholds,
+        verdict_labels,
+        thresholds,
+        signals,
+        remediation,
+        weak_authentication,
+    )
@@ -0,0 +1,160 @@
+"""Embedding-based semantic retrieval over internal KB snippets (demo).
+
+Keyword/BM25 lookups miss reworded queries, which makes the agent loop and
+re-query. This module embeds snippets with a local CPU embedder and answers
+queries with a top-k cosine nearest-neighbour search.
+
+Embedders:
+  - HashingEmbedder (default): signed feature hashing of word unigrams,
+    bigrams and character 4-grams. No model download, deterministic; it
+    tolerates word-form and partial-word differences ("authenticate" vs
+    "authentication") but is not a true paraphrase model.
+  - SentenceTransformerEmbedder: set POLICY_EMBEDDING_MODEL to a local
+    sentence-transformers model name/path (requires sentence-transformers)
+    for real paraphrase matching.
+
+Vectors are stored on disk under POLICY_INDEX_DIR (default: the system temp
+dir) and only rebuilt when PaymentsPolicyKB.version, the snippet count or the
+embedder changes.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import tempfile
+import zlib
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Protocol, Sequence, Tuple
+
+import numpy as np
+
+from src.agent.policy_index import snippet_fields, tokenize
+
+_SAFE_NAME = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+class Embedder(Protocol):
+    name: str
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        ...
+
+
+class HashingEmbedder:
+    """L2-normalised signed feature hashing (stable across processes via crc32)."""
+
+    def __init__(self, dim: int = 1024):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def _features(self, text: str) -> List[str]:
+        toks = tokenize(text)
+        feats = [f"w:{t}" for t in toks]
+        feats += [f"b:{a}_{b}" for a, b in zip(toks, toks[1:])]
+        for t in toks:
+            padded = f"#{t}#"
+            feats += [f"c:{padded[i:i + 4]}" for i in range(max(1, len(padded) - 3))]
+        return feats
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feat in self._features(text):
+                h = zlib.crc32(feat.encode("utf-8"))
+                out[row, h % self.dim] += 1.0 if (h >> 31) & 1 else -1.0
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        return out / np.where(norms == 0, 1.0, norms)
+
+
+class SentenceTransformerEmbedder:
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+
+        self._model = SentenceTransformer(model_name, device="cpu")
+        self.name = f"st-{model_name}"
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        return np.asarray(
+            self._model.encode(list(texts), normalize_embeddings=True), dtype=np.float32
+        )
+
+
+def default_embedder() -> Embedder:
+    model_name = os.getenv("POLICY_EMBEDDING_MODEL")
+    return SentenceTransformerEmbedder(model_name) if model_name else HashingEmbedder()
+
+
+def default_index_dir() -> Path:
+    return Path(
+        os.getenv("POLICY_INDEX_DIR")
+        or Path(tempfile.gettempdir()) / "payments-policy-index"
+    )
+
+
+def snippet_text(snip: Dict[str, Any]) -> str:
+    return " ".join(snippet_fields(snip).values())
+
+
+class SemanticPolicyIndex:
+    """On-disk vector index over KB snippets, keyed by KB version + embedder."""
+
+    def __init__(
+        self,
+        snippets: Sequence[Dict[str, Any]],
+        kb_version: str,
+        embedder: Optional[Embedder] = None,
+        index_dir: Optional[Path] = None,
+    ):
+        self.snippets = list(snippets)
+        self.kb_version = kb_version
+        self.embedder = embedder or default_embedder()
+        self.index_dir = Path(index_dir or default_index_dir())
+        self.vectors = self._load_or_build()
+
+    def _paths(self) -> Tuple[Path, Path]:
+        stem = _SAFE_NAME.sub("_", f"{self.kb_version}-{self.embedder.name}")
+        return self.index_dir / f"{stem}.npy", self.index_dir / f"{stem}.json"
+
+    def _load_or_build(self) -> np.ndarray:
+        vec_path, meta_path = self._paths()
+        meta = {
+            "kb_version": self.kb_version,
+            "embedder": self.embedder.name,
+            "count": len(self.snippets),
+        }
+        if vec_path.exists() and meta_path.exists():
+            try:
+                if json.loads(meta_path.read_text(encoding="utf-8")) == meta:
+                    return np.load(vec_path, mmap_mode="r")
+            except (OSError, ValueError):
+                pass  # unreadable cache: rebuild below
+
+        vectors = self.embedder.embed([snippet_text(s) for s in self.snippets])
+        try:
+            self.index_dir.mkdir(parents=True, exist_ok=True)
+            tmp = vec_path.with_name(f"{vec_path.stem}.{os.getpid()}.tmp.npy")
+            np.save(tmp, vectors)
+            os.replace(tmp, vec_path)
+            meta_path.write_text(json.dumps(meta), encoding="utf-8")
+        except OSError as e:
+            print(f"[policy-semantic] could not persist index to {self.index_dir}: {e}")
+        return vectors
+
+    def search(
+        self, query: str, top_k: int = 5, allowed: Optional[Sequence[bool]] = None
+    ) -> List[Tuple[int, float]]:
+        """(snippet position, cosine similarity) pairs, best first."""
+        if not self.snippets or top_k <= 0:
+            return []
+        q = self.embedder.embed([query])[0]
+        scores = np.asarray(self.vectors @ q, dtype=np.float64)
+        if allowed is not None:
+            scores = np.where(np.asarray(allowed, dtype=bool), scores, -np.inf)
+        k = min(top_k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        ranked = sorted(
+            ((int(i), float(scores[i])) for i in top), key=lambda kv: (-kv[1], kv[0])
+        )
+        return [(i, s) for i, s in ranked if np.isfinite(s) and s > 0]
@@ -1,4 +1,8 @@
-from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder, SystemMessagePromptTemplate
+from langchain_core.prompts import (
+    ChatPromptTemplate,
+    MessagesPlaceholder,
+    SystemMessagePromptTemplate,
+)
 
 prompt_template = ChatPromptTemplate.from_messages(
     [
@@ -30,14 +34,30 @@ You MUST use tools before providing conclusions.
   → MUST call check_merchant_compliance.
 
 • If user asks about fraud-like signals or merchant risk:
-  → MUST perform ALL of the following steps IN ORDER (answer is INVALID if any step is missing):
+  → MUST perform ALL of the following steps (answer is INVALID if any step is missing):
      1) list_transactions_last_48h(merchant_id, ...)
      2) pick_representative_transaction(merchant_id, window_hours=48) to select a representative txn_id
      3) analyze_transaction(transaction_id=<selected txn_id>)
      4) lookup_internal_policy(query=<relevant playbook>, context may include merchant_id and key signals)
+  → PREFERRED: call investigate_merchant_risk(merchant_id, window_hours=48) once. It runs steps 1–4
+    concurrently and returns all results; it counts as performing every step.
+  → If you call the tools individually, request the independent ones (1, 2 and 4) together in the
+    same turn; only step 3 has to wait for step 2.
 
 Do NOT skip steps. If any required tool call in the fraud workflow is skipped, your answer is invalid and you must continue tool execution.
 
+• For decline spikes, volume or risk trends, prefer merchant_summary(merchant_id, windows=[...]) over
+  reading raw transaction lists: it returns counts, decline-code histograms, risk percentiles and
+  chargeback ratios for 1h/24h/48h/30d windows.
+
+• To analyze more than one transaction (a decline spike, a list of IDs), call
+  analyze_transactions(merchant_id=..., window_hours=..., decline_code=...) or
+  analyze_transactions(transaction_ids=[...]) once instead of analyze_transaction per ID. It returns
+  per-row verdicts plus counts by signal, risk band and decline code with guidance.
+
+• Transaction list tools return `count` plus a `summary` and at most one page of rows. Start with
+  summary_only=true or a narrow `fields` list; only follow `next_cursor` when you need more rows.
+
 Never guess transaction status, risk band, or monitoring verdict.
 
 ────────────────────────────────────────
@@ -78,6 +98,9 @@ If escalation conditions are satisfied:
 2. You MUST NOT produce a final natural language response until slack_send_message has been called.
 3. If slack_send_message fails, you must retry once.
 4. Writing an escalation message without calling slack_send_message is considered a failure.
+5. slack_send_message queues the message and returns a handle (escalation_id, status "queued"): that counts as sent.
+   Do not send the same escalation again; report the escalation_id. Call slack_escalation_status only if the
+   user asks whether it was delivered.
 
 Slack escalation must:
 - Be short and structured
@@ -148,4 +171,4 @@ Use enterprise tone.
         ),
         MessagesPlaceholder(variable_name="messages", optional=True),
     ]
-)
\ No newline at end of file
+)
@@ -0,0 +1,271 @@
+"""Response cache in front of the agent for repeated questions (demo).
+
+Ops staff ask the same questions many times a day ("Why was T10005 declined?",
+the Streamlit SUGGESTED_QUESTIONS). ResponseCache lets run_agent / stream_agent
+answer a repeat without the LLM + tool loop:
+
+  - key: the question lower-cased, whitespace collapsed and trailing punctuation
+    stripped (normalize_question), checked against the PaymentsData holder
+    version and the KB version. A reload bumps the holder version and clears
+    the cache.
+  - exact match on the normalized text, else near-duplicate match: same set of
+    entity IDs (Txxxx / Mxxx), same question words (why/when/who/...) and token
+    Jaccard similarity >= `similarity`. The token sets keep the interrogatives
+    and auxiliaries the policy tokenizer drops as stopwords, so "Why was T10005
+    declined?" and "When was T10005 declined?" never share an answer.
+  - dependencies: the deterministic tool calls the answer was built from are
+    stored with a hash of their result; on a hit they are re-run (cheap store
+    lookups) and the entry is dropped if any result changed
+  - TTL + LRU bounds
+
+Only answers whose tools are all in DETERMINISTIC_TOOLS are cached: runs that
+posted to Slack, searched the web or used "last N hours" windows are not.
+Settings: AGENT_RESPONSE_CACHE (1/0), AGENT_RESPONSE_CACHE_SIZE,
+AGENT_RESPONSE_CACHE_TTL_S, AGENT_RESPONSE_CACHE_SIMILARITY.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+
+from src.agent.payments_reload import PaymentsStoreHolder
+from src.agent.policy_index import tokenize
+
+_ENTITY_ID = re.compile(r"\b([TM]\d+[A-Z0-9]*)\b", re.IGNORECASE)
+_TRAILING_PUNCT = re.compile(r"[\s?!.]+$")
+
+# Stopwords that change what a question asks; kept in near-duplicate token sets.
+QUESTION_WORDS = frozenset({"how", "what", "when", "where", "which", "who", "why"})
+AUXILIARIES = frozenset({"are", "can", "do", "does", "is", "should", "was", "will"})
+
+# Tools whose result depends only on their arguments and the loaded dataset.
+DETERMINISTIC_TOOLS = frozenset(
+    {
+        "analyze_transaction",
+        "check_merchant_compliance",
+        "lookup_internal_policy",
+        "list_transactions",
+    }
+)
+
+Dependency = Tuple[str, str, str]  # (tool name, JSON args, result hash)
+
+
+def entity_ids(text: str) -> FrozenSet[str]:
+    return frozenset(m.upper() for m in _ENTITY_ID.findall(text))
+
+
+def normalize_question(text: str) -> str:
+    """Exact-match key: lower-case, whitespace collapsed, trailing punctuation stripped."""
+    return _TRAILING_PUNCT.sub("", " ".join(text.lower().split()))
+
+
+def question_tokens(text: str) -> FrozenSet[str]:
+    """Token set for near-duplicate matching; unlike the policy tokenizer it keeps interrogatives."""
+    return frozenset(tokenize(text, keep=QUESTION_WORDS | AUXILIARIES))
+
+
+def _result_hash(result: Any) -> str:
+    payload = (
+        result
+        if isinstance(result, str)
+        else json.dumps(result, sort_keys=True, default=str)
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class _Entry:
+    __slots__ = ("response", "tokens", "entities", "version", "deps", "created_at")
+
+    def __init__(
+        self,
+        response: str,
+        tokens: FrozenSet[str],
+        entities: FrozenSet[str],
+        version: Tuple[int, str],
+        deps: List[Dependency],
+    ):
+        self.response = response
+        self.tokens = tokens
+        self.entities = entities
+        self.version = version
+        self.deps = deps
+        self.created_at = time.time()
+
+
+class ResponseCache:
+    """Normalized-question -> final answer, bounded by TTL and LRU size."""
+
+    def __init__(
+        self,
+        holder: PaymentsStoreHolder,
+        tools: Dict[str, Any],
+        max_entries: int = 256,
+        ttl_s: float = 900,
+        similarity: float = 0.8,
+    ):
+        self._holder = holder
+        self._tools = tools
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.similarity = similarity
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.stores = 0
+        self.skipped = 0
+        holder.add_listener(lambda store, version: self.clear())
+
+    def _version(self) -> Tuple[int, str]:
+        return self._holder.version, self._holder.current.policies.version
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _find(
+        self, key: str, tokens: FrozenSet[str], entities: FrozenSet[str]
+    ) -> Tuple[Optional[str], bool]:
+        """(matching key, near-duplicate?) under the lock; expired entries are dropped on the way."""
+        now = time.time()
+        for k in [
+            k for k, e in self._entries.items() if now - e.created_at > self.ttl_s
+        ]:
+            del self._entries[k]
+        if key in self._entries:
+            return key, False
+        best, best_score = None, self.similarity
+        for k, e in self._entries.items():
+            if e.entities != entities or not (e.tokens or tokens):
+                continue
+            if e.tokens & QUESTION_WORDS != tokens & QUESTION_WORDS:
+                continue
+            score = len(e.tokens & tokens) / len(e.tokens | tokens)
+            if score >= best_score:
+                best, best_score = k, score
+        return best, best is not None
+
+    async def _still_valid(self, entry: _Entry) -> bool:
+        if entry.version != self._version():
+            return False
+        for name, args, digest in entry.deps:
+            try:
+                result = await self._tools[name].ainvoke(json.loads(args))
+            except Exception:
+                return False
+            if _result_hash(result) != digest:
+                return False
+        return True
+
+    async def lookup(self, question: str) -> Optional[str]:
+        key = normalize_question(question)
+        with self._lock:
+            match, near = self._find(
+                key, question_tokens(question), entity_ids(question)
+            )
+            entry = self._entries.get(match) if match else None
+            if entry is not None:
+                self._entries.move_to_end(match)
+        if entry is None:
+            self.misses += 1
+            return None
+        if not await self._still_valid(entry):
+            with self._lock:
+                self._entries.pop(match, None)
+            self.stale += 1
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.near_hits += int(near)
+        return entry.response
+
+    async def store(
+        self, question: str, response: str, run_messages: Sequence[BaseMessage]
+    ) -> bool:
+        """Cache `response` if every tool call in `run_messages` (this turn only) is deterministic."""
+        calls: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+        for m in run_messages:
+            if isinstance(m, AIMessage):
+                for call in m.tool_calls:
+                    calls[call["id"]] = (call["name"], call["args"])
+        if any(name not in DETERMINISTIC_TOOLS for name, _ in calls.values()):
+            self.skipped += 1
+            return False
+
+        deps: List[Dependency] = []
+        for m in run_messages:
+            if isinstance(m, ToolMessage) and m.tool_call_id in calls:
+                if m.status == "error":
+                    self.skipped += 1
+                    return False
+                name, args = calls[m.tool_call_id]
+                # hash a fresh result (not the message text) so lookups compare like with like
+                result = await self._tools[name].ainvoke(args)
+                deps.append(
+                    (name, json.dumps(args, sort_keys=True), _result_hash(result))
+                )
+
+        key = normalize_question(question)
+        entry = _Entry(
+            response,
+            question_tokens(question),
+            entity_ids(question),
+            self._version(),
+            deps,
+        )
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        self.stores += 1
+        return True
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            size = len(self._entries)
+        lookups = self.hits + self.misses
+        return {
+            "entries": size,
+            "hits": self.hits,
+            "near_duplicate_hits": self.near_hits,
+            "misses": self.misses,
+            "stale": self.stale,
+            "stores": self.stores,
+            "not_cacheable": self.skipped,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+        }
+
+
+def turn_messages(messages: Sequence[BaseMessage]) -> Tuple[List[BaseMessage], bool]:
+    """Messages of the latest user turn, and whether it was the thread's first turn."""
+    human = [i for i, m in enumerate(messages) if isinstance(m, HumanMessage)]
+    if not human:
+        return list(messages), True
+    return list(messages[human[-1] + 1 :]), len(human) == 1
+
+
+def make_response_cache(
+    holder: PaymentsStoreHolder, tools: Dict[str, Any]
+) -> Optional[ResponseCache]:
+    if os.getenv("AGENT_RESPONSE_CACHE", "1").lower() in ("0", "false", "no"):
+        return None
+    return ResponseCache(
+        holder,
+        tools,
+        max_entries=int(os.getenv("AGENT_RESPONSE_CACHE_SIZE", "256")),
+        ttl_s=float(os.getenv("AGENT_RESPONSE_CACHE_TTL_S", "900")),
+        similarity=float(os.getenv("AGENT_RESPONSE_CACHE_SIMILARITY", "0.8")),
+    )
@@ -0,0 +1,122 @@
+"""Memoized results of deterministic PaymentsData methods (demo).
+
+evaluate_transaction, check_merchant_compliance and lookup_internal_policy
+depend only on their arguments and the loaded dataset, yet the agent repeats
+the same calls within a thread (and across threads for popular merchants).
+Each PaymentsData instance owns one ResultMemo, so a reload, which swaps in a
+new store, drops every cached result with the old store; no explicit
+invalidation is needed.
+
+  - bounded LRU across all methods (TOOL_MEMO_SIZE, 0 disables)
+  - entries expire after TOOL_MEMO_TTL_S. Time-relative results put their
+    time window in the key (check_merchant_compliance: the as-of minute)
+  - the JSON payload of a result is serialized once, on first request, so
+    tool wrappers can return it as the ToolMessage content as-is
+  - per-method hit/miss counters (GET /admin/stats)
+
+Callers get their own copy of a cached value (entry.copy()), so a caller
+that edits its result cannot change what the next caller sees.
+"""
+
+from __future__ import annotations
+
+import copy
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+MemoKey = Tuple[str, str]  # (method name, JSON of the normalized arguments)
+
+
+class _MemoEntry:
+    __slots__ = ("value", "created_at", "_payload")
+
+    def __init__(self, value: Any):
+        self.value = value
+        self.created_at = time.monotonic()
+        self._payload: Optional[str] = None
+
+    @property
+    def payload(self) -> str:
+        # same encoding LangChain applies to non-string tool results
+        if self._payload is None:
+            self._payload = json.dumps(self.value, ensure_ascii=False, default=str)
+        return self._payload
+
+    def copy(self) -> Any:
+        """A deep copy of the cached value, safe for the caller to modify."""
+        return copy.deepcopy(self.value)
+
+
+class ResultMemo:
+    """Per-store result cache, bounded by LRU size and TTL (thread-safe)."""
+
+    def __init__(self, max_entries: int = 2048, ttl_s: float = 300):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self._entries: "OrderedDict[MemoKey, _MemoEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits: Dict[str, int] = {}
+        self._misses: Dict[str, int] = {}
+
+    @staticmethod
+    def key(method: str, *args: Any) -> MemoKey:
+        return method, json.dumps(args, sort_keys=True, default=str)
+
+    def _get(self, key: MemoKey) -> Optional[_MemoEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry.created_at > self.ttl_s:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self._misses[key[0]] = self._misses.get(key[0], 0) + 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits[key[0]] = self._hits.get(key[0], 0) + 1
+            return entry
+
+    def _put(self, key: MemoKey, value: Any) -> _MemoEntry:
+        entry = _MemoEntry(value)
+        if self.max_entries <= 0:
+            return entry
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    async def get_or_compute(
+        self, key: MemoKey, compute: Callable[[], Awaitable[Any]]
+    ) -> _MemoEntry:
+        """Cached entry for `key`, else await `compute()` and cache it. Exceptions are not cached."""
+        entry = self._get(key)
+        if entry is None:
+            entry = self._put(key, await compute())
+        return entry
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            methods = sorted(set(self._hits) | set(self._misses))
+            by_method = {
+                m: {"hits": self._hits.get(m, 0), "misses": self._misses.get(m, 0)}
+                for m in methods
+            }
+            size = len(self._entries)
+        hits = sum(v["hits"] for v in by_method.values())
+        lookups = hits + sum(v["misses"] for v in by_method.values())
+        return {
+            "entries": size,
+            "max_entries": self.max_entries,
+            "hits": hits,
+            "misses": lookups - hits,
+            "hit_rate": round(hits / lookups, 4) if lookups else None,
+            "by_method": by_method,
+        }
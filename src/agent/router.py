@@ -0,0 +1,274 @@
+"""Deterministic fast path in front of the ReAct agent (demo).
+
+Requests like "analyze transaction T10001" or "check merchant M200 compliance"
+always end in the same tool call, yet the ReAct loop spends several LLM round
+trips deciding to make it. The outer graph built here routes each user turn:
+
+  START -> route_request -> fast_path -> END        (canned single-tool intents)
+                         -> agent     -> END        (everything else)
+
+route_request trims the oldest turns of long threads (history.py), then
+matches rule-based intents on the latest user message (one transaction or
+merchant ID, a matching verb, and no remediation / escalation / investigation
+wording). fast_path calls the deterministic tool directly and makes a single
+LLM call to phrase the answer. It hands over to the full agent,
+with the tool result already in the thread, when the result meets an escalation
+rule from the system prompt, because those turns must call slack_send_message.
+The escalation check reads the compiled policy rules of the current store
+(policy_rules.py), so it uses the same risk bands, verdicts and signal
+definitions as the tools.
+
+The fast path writes the same AIMessage(tool_calls) / ToolMessage pair the
+agent would, so follow-up turns see a consistent history. Hit rate and latency
+are tracked in ROUTER_STATS (GET /admin/stats). Set AGENT_FAST_PATH=0 to
+disable.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from types import SimpleNamespace
+from typing import Any, Dict, Literal, Optional
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.graph import END, START, MessagesState, StateGraph
+from langgraph.types import Command
+
+from src.agent.history import thread_trim_update
+from src.agent.payments_tools import (
+    PAYMENTS_STORE_HOLDER,
+    analyze_transaction,
+    check_merchant_compliance,
+)
+
+_TXN_ID = re.compile(r"\b(T\d+[A-Z0-9]*)\b", re.IGNORECASE)
+_MERCHANT_ID = re.compile(r"\b(M\d+)\b", re.IGNORECASE)
+_TXN_VERBS = re.compile(
+    r"\b(check|analy[sz]e|summari[sz]e|what happened|look (?:at|into)|details?|status|explain|why was)\b",
+    re.IGNORECASE,
+)
+_COMPLIANCE_WORDS = re.compile(
+    r"\b(complian\w*|monitoring|chargeback ratio)\b", re.IGNORECASE
+)
+# Wording that needs policy lookups, escalation or a multi-tool investigation: always the full agent.
+_AGENT_ONLY = re.compile(
+    r"\b(should|recommend\w*|next steps?|remediat\w*|escalat\w*|slack|polic(?:y|ies)|playbook|runbook|customer"
+    r"|fraud\w*|investigat\w*|spike\w*|trend\w*|compare|last \d+|web|search)\b",
+    re.IGNORECASE,
+)
+
+PHRASE_PROMPT = """You are a Payment Operations Specialist (DEMO). Answer the user's question using ONLY the
+tool result below; do not invent facts. Structure the answer as:
+• What I checked (tools used)
+• Findings (facts only)
+• Interpretation (clearly label hypotheses)
+• Recommended next actions (only those present in the tool result)
+Never include full PAN, CVV or personal data. Be concise and use an enterprise tone."""
+
+
+class RouterStats:
+    """Fast-path hit rate and latency (thread-safe)."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.fast_path = 0
+        self.handoffs = 0  # fast path ran the tool, then escalation needed the agent
+        self.fast_ms = 0.0
+        self.agent_runs = 0
+        self.agent_ms = 0.0
+        self.by_intent: Dict[str, int] = {}
+
+    def record_route(self, intent: Optional[str]) -> None:
+        with self._lock:
+            self.requests += 1
+            if intent:
+                self.by_intent[intent] = self.by_intent.get(intent, 0) + 1
+
+    def record_fast(self, elapsed_ms: float, handed_off: bool) -> None:
+        with self._lock:
+            if handed_off:
+                self.handoffs += 1
+            else:
+                self.fast_path += 1
+                self.fast_ms += elapsed_ms
+
+    def record_agent(self, elapsed_ms: float) -> None:
+        with self._lock:
+            self.agent_runs += 1
+            self.agent_ms += elapsed_ms
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            fast_avg = self.fast_ms / self.fast_path if self.fast_path else None
+            agent_avg = self.agent_ms / self.agent_runs if self.agent_runs else None
+            saved = (
+                (agent_avg - fast_avg) * self.fast_path
+                if fast_avg is not None and agent_avg is not None
+                else None
+            )
+            return {
+                "requests": self.requests,
+                "fast_path": self.fast_path,
+                "hit_rate": round(self.fast_path / self.requests, 4)
+                if self.requests
+                else None,
+                "handoffs": self.handoffs,
+                "by_intent": dict(self.by_intent),
+                "fast_path_avg_ms": round(fast_avg, 1)
+                if fast_avg is not None
+                else None,
+                "agent_avg_ms": round(agent_avg, 1) if agent_avg is not None else None,
+                # vs. the average full-agent turn; a rough estimate, not a paired measurement
+                "est_latency_saved_ms": round(saved, 1) if saved is not None else None,
+            }
+
+
+ROUTER_STATS = RouterStats()
+
+
+class RoutedState(MessagesState):
+    intent: Optional[Dict[str, str]]
+
+
+def detect_intent(text: str) -> Optional[Dict[str, str]]:
+    """{"intent", "tool", "id"} for a canned single-tool request, else None."""
+    if _AGENT_ONLY.search(text):
+        return None
+    txn_ids = {m.upper() for m in _TXN_ID.findall(text)}
+    merchant_ids = {m.upper() for m in _MERCHANT_ID.findall(text)}
+    if len(txn_ids) == 1 and not merchant_ids and _TXN_VERBS.search(text):
+        return {
+            "intent": "analyze_transaction",
+            "tool": "analyze_transaction",
+            "id": txn_ids.pop(),
+        }
+    if len(merchant_ids) == 1 and not txn_ids and _COMPLIANCE_WORDS.search(text):
+        return {
+            "intent": "merchant_compliance",
+            "tool": "check_merchant_compliance",
+            "id": merchant_ids.pop(),
+        }
+    return None
+
+
+def needs_escalation(tool: str, result: Dict[str, Any]) -> bool:
+    """Escalation rules from the system prompt that the fast path cannot satisfy."""
+    rules = PAYMENTS_STORE_HOLDER.current.rules
+    if tool == "check_merchant_compliance":
+        return result.get("verdict") != rules.verdict_labels[0]
+    txn = result.get("transaction") or {}
+    risk_score = float(txn.get("risk_score") or 0)
+    high = (
+        result.get("risk_band") == rules.risk_bands.high_label
+        or risk_score >= rules.risk_bands.high_min
+    )
+    if not high:
+        return False
+    row = SimpleNamespace(**{f: txn.get(f) for f in rules.weak_auth_fields})
+    return rules.weak_auth(row)
+
+
+def _last_user_text(state: RoutedState) -> str:
+    for message in reversed(state["messages"]):
+        if isinstance(message, HumanMessage):
+            return (
+                message.content
+                if isinstance(message.content, str)
+                else str(message.content)
+            )
+    return ""
+
+
+def build_routed_agent(react_agent: Any, llm: Any, checkpointer: Any) -> Any:
+    """Outer graph: rule router + fast path, with `react_agent` (compiled, no checkpointer) as fallback."""
+    tools = {
+        "analyze_transaction": analyze_transaction,
+        "check_merchant_compliance": check_merchant_compliance,
+    }
+
+    def route_request(state: RoutedState) -> Dict[str, Any]:
+        enabled = os.getenv("AGENT_FAST_PATH", "1").lower() not in ("0", "false", "no")
+        intent = detect_intent(_last_user_text(state)) if enabled else None
+        ROUTER_STATS.record_route(intent["intent"] if intent else None)
+        # bound the checkpointed thread (AGENT_MAX_THREAD_MESSAGES) before this turn adds to it
+        return {"intent": intent, "messages": thread_trim_update(state["messages"])}
+
+    def pick_branch(state: RoutedState) -> Literal["fast_path", "agent"]:
+        return "fast_path" if state.get("intent") else "agent"
+
+    async def fast_path(state: RoutedState, config: RunnableConfig) -> Command:
+        t0 = time.perf_counter()
+        intent = state["intent"]
+        tool_name = intent["tool"]
+        args = (
+            {"transaction_id": intent["id"]}
+            if tool_name == "analyze_transaction"
+            else {"merchant_id": intent["id"]}
+        )
+        call_id = f"fastpath_{uuid.uuid4().hex[:12]}"
+        call = AIMessage(
+            content="", tool_calls=[{"name": tool_name, "args": args, "id": call_id}]
+        )
+
+        try:
+            output = await tools[tool_name].ainvoke(args, config)
+        except ValueError as e:
+            # unknown ID: answer directly, no LLM call needed
+            tool_msg = ToolMessage(
+                content=f"Error: {e}",
+                name=tool_name,
+                tool_call_id=call_id,
+                status="error",
+            )
+            answer = AIMessage(
+                content=f"I could not find that record: {e} Please check the ID and try again."
+            )
+            ROUTER_STATS.record_fast(
+                (time.perf_counter() - t0) * 1000, handed_off=False
+            )
+            return Command(goto=END, update={"messages": [call, tool_msg, answer]})
+
+        # memoized tools may hand back their pre-serialized JSON payload (TOOL_JSON_PAYLOADS)
+        result = json.loads(output) if isinstance(output, str) else output
+        content = output if isinstance(output, str) else json.dumps(output, default=str)
+        tool_msg = ToolMessage(content=content, name=tool_name, tool_call_id=call_id)
+        if needs_escalation(tool_name, result):
+            ROUTER_STATS.record_fast((time.perf_counter() - t0) * 1000, handed_off=True)
+            return Command(goto="agent", update={"messages": [call, tool_msg]})
+
+        answer = await llm.ainvoke(
+            [
+                SystemMessage(content=PHRASE_PROMPT),
+                HumanMessage(
+                    content=f"Question: {_last_user_text(state)}\n\nTool used: {tool_name}\nResult: {tool_msg.content}"
+                ),
+            ],
+            config,
+        )
+        ROUTER_STATS.record_fast((time.perf_counter() - t0) * 1000, handed_off=False)
+        return Command(
+            goto=END,
+            update={"messages": [call, tool_msg, AIMessage(content=answer.content)]},
+        )
+
+    async def agent(state: RoutedState, config: RunnableConfig) -> Dict[str, Any]:
+        t0 = time.perf_counter()
+        result = await react_agent.ainvoke({"messages": state["messages"]}, config)
+        ROUTER_STATS.record_agent((time.perf_counter() - t0) * 1000)
+        return {"messages": result["messages"]}
+
+    builder = StateGraph(RoutedState)
+    builder.add_node("route_request", route_request)
+    builder.add_node("fast_path", fast_path, destinations=("agent", END))
+    builder.add_node("agent", agent)
+    builder.add_edge(START, "route_request")
+    builder.add_conditional_edges("route_request", pick_branch)
+    builder.add_edge("agent", END)
+    return builder.compile(checkpointer=checkpointer)
@@ -0,0 +1,172 @@
+"""Single-flight coalescing of identical concurrent calls (demo).
+
+During an incident many operators ask about the same merchant at once, and
+every run repeats the same store reads. SingleFlight gives concurrent callers
+with the same key one shared execution: the first caller starts it, the others
+await the same future and get the same result (or exception).
+
+  - tools: the read-only payments tools are wrapped with coalesce_calls(), keyed
+    by tool name, arguments and the PaymentsData holder version, so calls that
+    straddle a reload never share a result (TOOL_SINGLEFLIGHT=0 disables)
+  - agent runs: run_agent can share one run between identical questions on new
+    threads that arrive while it is in flight, or up to `linger_s` after it
+    finished (AGENT_COALESCE=1, AGENT_COALESCE_WINDOW_S; off by default)
+  - the shared work runs in its own task: a caller that is cancelled stops
+    waiting without cancelling it for the others
+  - per-group counters for GET /admin/stats
+
+Futures belong to the event loop that created them, so keys are scoped per
+loop. Results are shared between callers: treat them as read-only.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import json
+import os
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+
+class _Counters:
+    __slots__ = ("leaders", "shared", "window_hits", "errors")
+
+    def __init__(self) -> None:
+        self.leaders = 0
+        self.shared = 0
+        self.window_hits = 0
+        self.errors = 0
+
+
+class SingleFlight:
+    """One in-flight execution per key; results optionally served for `linger_s` after completion."""
+
+    def __init__(self, linger_s: float = 0.0, max_lingering: int = 1024):
+        self.linger_s = linger_s
+        self.max_lingering = max_lingering
+        self._lock = threading.Lock()
+        self._in_flight: Dict[Tuple[int, Hashable], "asyncio.Future[Any]"] = {}
+        self._recent: Dict[Tuple[int, Hashable], Tuple[float, Any]] = {}
+        self._counters: Dict[str, _Counters] = {}
+
+    def _count(self, group: str) -> _Counters:
+        counters = self._counters.get(group)
+        if counters is None:
+            counters = self._counters[group] = _Counters()
+        return counters
+
+    def _recent_value(self, key: Tuple[int, Hashable]) -> Tuple[bool, Any]:
+        now = time.monotonic()
+        for k in [
+            k
+            for k, (done_at, _) in self._recent.items()
+            if now - done_at > self.linger_s
+        ]:
+            del self._recent[k]
+        if key in self._recent:
+            return True, self._recent[key][1]
+        return False, None
+
+    async def do(
+        self, key: Hashable, fn: Callable[[], Awaitable[Any]], group: str = "default"
+    ) -> Tuple[Any, bool]:
+        """(result of `fn()`, whether it was shared with another caller). Exceptions are not kept."""
+        scoped = (id(asyncio.get_running_loop()), key)
+        with self._lock:
+            counters = self._count(group)
+            if self.linger_s > 0:
+                found, value = self._recent_value(scoped)
+                if found:
+                    counters.window_hits += 1
+                    return value, True
+            task = self._in_flight.get(scoped)
+            if task is not None:
+                counters.shared += 1
+                shared = True
+            else:
+                counters.leaders += 1
+                shared = False
+                task = asyncio.ensure_future(fn())
+                self._in_flight[scoped] = task
+                task.add_done_callback(functools.partial(self._finish, scoped, group))
+        # shield: a cancelled caller stops waiting, the shared task keeps running for the others
+        return await asyncio.shield(task), shared
+
+    def _finish(
+        self, scoped: Tuple[int, Hashable], group: str, task: "asyncio.Future[Any]"
+    ) -> None:
+        with self._lock:
+            self._in_flight.pop(scoped, None)
+            if task.cancelled() or task.exception() is not None:
+                # also marks the exception as retrieved when every caller has gone away
+                self._count(group).errors += 1
+                return
+            if self.linger_s > 0:
+                self._recent[scoped] = (time.monotonic(), task.result())
+                while len(self._recent) > self.max_lingering:
+                    self._recent.pop(next(iter(self._recent)))
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            groups = {
+                name: {
+                    "leaders": c.leaders,
+                    "shared": c.shared,
+                    "window_hits": c.window_hits,
+                    "errors": c.errors,
+                }
+                for name, c in sorted(self._counters.items())
+            }
+            in_flight = len(self._in_flight)
+        leaders = sum(g["leaders"] for g in groups.values())
+        joined = sum(g["shared"] + g["window_hits"] for g in groups.values())
+        return {
+            "in_flight": in_flight,
+            "linger_s": self.linger_s,
+            "executions": leaders,
+            "coalesced": joined,
+            "coalesce_rate": round(joined / (leaders + joined), 4)
+            if leaders + joined
+            else None,
+            "by_group": groups,
+        }
+
+
+def coalesce_calls(
+    flight: Optional[SingleFlight], version: Callable[[], Any] = lambda: None
+):
+    """Decorator for async functions: identical concurrent calls (same args, same version()) run once."""
+
+    def decorate(fn: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+        if flight is None:
+            return fn
+
+        @functools.wraps(fn)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            key = (
+                fn.__name__,
+                version(),
+                json.dumps([args, kwargs], sort_keys=True, default=str),
+            )
+            value, _ = await flight.do(
+                key, lambda: fn(*args, **kwargs), group=fn.__name__
+            )
+            return value
+
+        return wrapper
+
+    return decorate
+
+
+def make_tool_singleflight() -> Optional[SingleFlight]:
+    if os.getenv("TOOL_SINGLEFLIGHT", "1").lower() in ("0", "false", "no"):
+        return None
+    return SingleFlight()
+
+
+def make_agent_coalescer() -> Optional[SingleFlight]:
+    if os.getenv("AGENT_COALESCE", "0").lower() in ("0", "false", "no"):
+        return None
+    return SingleFlight(linger_s=float(os.getenv("AGENT_COALESCE_WINDOW_S", "2.0")))
@@ -0,0 +1,140 @@
+"""Lazy, configurable Traceloop tracing (demo).
+
+Importing traceloop.sdk and running Traceloop.init used to happen when
+src.agent was imported, adding most of a second to every cold start, and every
+store method opened a span even for a dict lookup. This module wraps the
+Traceloop decorators so that:
+
+  - AGENT_TRACING=off never imports traceloop; decorated functions are
+    returned unchanged (no wrapper, no per-call cost)
+  - AGENT_TRACING=sampled keeps AGENT_TRACE_SAMPLE_RATE of traces (default
+    0.1), via OpenTelemetry's parent-based trace-id ratio sampler, so a
+    sampled-out agent run drops its tool and LLM spans as well
+  - AGENT_TRACING=full traces everything
+  - default: full, as before (Traceloop.init always ran); set AGENT_TRACING=off
+    to opt out
+  - traceloop is imported and Traceloop.init runs on the first traced call,
+    not at import time
+  - task(detailed=True) marks inner PaymentsData helpers (lookups, window
+    scans); they are traced only with AGENT_TRACING_DETAILED=1
+
+task / workflow / tool take the same arguments as the traceloop.sdk.decorators
+they stand in for.
+"""
+
+from __future__ import annotations
+
+import functools
+import inspect
+import os
+import threading
+from contextlib import aclosing
+from typing import Any, Callable, Optional
+
+APP_NAME = "mastercard-payment-ops-agent"
+MODES = ("off", "sampled", "full")
+
+
+def tracing_mode() -> str:
+    mode = (os.getenv("AGENT_TRACING") or "full").lower()
+    if mode not in MODES:
+        raise ValueError(
+            f"Unknown AGENT_TRACING '{mode}' (expected one of {', '.join(MODES)})."
+        )
+    return mode
+
+
+TRACING_MODE = tracing_mode()
+TRACING_DETAILED = os.getenv("AGENT_TRACING_DETAILED", "0").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+
+_init_lock = threading.Lock()
+_initialized = False
+
+
+def init_tracing() -> bool:
+    """Run Traceloop.init once (thread-safe); False when tracing is off."""
+    global _initialized
+    if TRACING_MODE == "off":
+        return False
+    if not _initialized:
+        with _init_lock:
+            if not _initialized:
+                if TRACING_MODE == "sampled":
+                    # read by the TracerProvider Traceloop creates
+                    os.environ.setdefault(
+                        "OTEL_TRACES_SAMPLER", "parentbased_traceidratio"
+                    )
+                    os.environ.setdefault(
+                        "OTEL_TRACES_SAMPLER_ARG",
+                        os.getenv("AGENT_TRACE_SAMPLE_RATE", "0.1"),
+                    )
+                from traceloop.sdk import Traceloop
+
+                Traceloop.init(app_name=APP_NAME)
+                _initialized = True
+    return True
+
+
+def _lazy(
+    decorator: str, detailed: bool, **kwargs: Any
+) -> Callable[[Callable], Callable]:
+    """Apply traceloop.sdk.decorators.<decorator>(**kwargs) on first call, or not at all when disabled."""
+
+    def decorate(fn: Callable) -> Callable:
+        if TRACING_MODE == "off" or (detailed and not TRACING_DETAILED):
+            return fn
+
+        traced: Optional[Callable] = None
+
+        def resolve() -> Callable:
+            nonlocal traced
+            if traced is None:
+                init_tracing()
+                from traceloop.sdk import decorators
+
+                traced = getattr(decorators, decorator)(**kwargs)(fn)
+            return traced
+
+        if inspect.isasyncgenfunction(fn):
+
+            @functools.wraps(fn)
+            async def async_gen_wrapper(*args: Any, **kw: Any) -> Any:
+                async with aclosing(resolve()(*args, **kw)) as gen:
+                    async for item in gen:
+                        yield item
+
+            return async_gen_wrapper
+
+        if inspect.iscoroutinefunction(fn):
+
+            @functools.wraps(fn)
+            async def async_wrapper(*args: Any, **kw: Any) -> Any:
+                return await resolve()(*args, **kw)
+
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kw: Any) -> Any:
+            return resolve()(*args, **kw)
+
+        return wrapper
+
+    return decorate
+
+
+def task(
+    name: Optional[str] = None, version: Optional[int] = None, detailed: bool = False
+):
+    return _lazy("task", detailed, name=name, version=version)
+
+
+def workflow(name: Optional[str] = None, version: Optional[int] = None):
+    return _lazy("workflow", False, name=name, version=version)
+
+
+def tool(name: Optional[str] = None, version: Optional[int] = None):
+    return _lazy("tool", False, name=name, version=version)
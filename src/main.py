@@ -1,25 +1,64 @@
 """FastAPI backend for Mastercard Payment Operations Agent (demo)."""
 
+import asyncio
+import json
 import os
+import secrets
 import sys
 import warnings
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from fastapi import FastAPI, Header, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 from pydantic.warnings import PydanticDeprecatedSince20
-warnings.filterwarnings(
-    "ignore",
-    category=PydanticDeprecatedSince20)
+
+warnings.filterwarnings("ignore", category=PydanticDeprecatedSince20)
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from src.agent.graph import run_agent  # noqa: E402
+from src.agent.checkpointer import start_checkpoint_maintenance  # noqa: E402
+from src.agent.graph import (
+    AGENT_COALESCER,
+    RESPONSE_CACHE,
+    memory,
+    run_agent,
+    stream_agent,
+)  # noqa: E402
+from src.agent.history import HISTORY_STATS  # noqa: E402
+from src.agent.payments_tools import (  # noqa: E402
+    ESCALATION_QUEUE,
+    ESCALATION_SLACK_POOL,
+    PAYMENTS_STORE_HOLDER,
+    SLACK_MCP_POOL,
+    TOOL_SINGLEFLIGHT,
+)
+from src.agent.router import ROUTER_STATS  # noqa: E402
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Poll PAYMENT_DEMO_DATA_DIR when PAYMENT_DEMO_RELOAD_INTERVAL_S > 0
+    PAYMENTS_STORE_HOLDER.start_watcher()
+    # Trim / expire SQLite checkpoints (AGENT_CHECKPOINTER=sqlite) off the request path
+    maintenance = start_checkpoint_maintenance(memory)
+    yield
+    if maintenance is not None:
+        maintenance.cancel()
+    await PAYMENTS_STORE_HOLDER.stop_watcher()
+    if ESCALATION_QUEUE is not None:
+        # delivers what is still queued; the worker closes its own Slack MCP client
+        await asyncio.to_thread(ESCALATION_QUEUE.stop)
+    await SLACK_MCP_POOL.close()
+
 
 app = FastAPI(
     title="Mastercard Payment Operations Agent (demo)",
     root_path=os.getenv("TFY_SERVICE_ROOT_PATH", ""),
     docs_url="/",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -46,4 +85,124 @@ async def run_agent_endpoint(user_input: UserInput):
     """
     Receives user input and executes the payment ops agent to provide a response.
     """
-    return await run_agent(user_input.thread_id, user_input.user_input)
\ No newline at end of file
+    return await run_agent(user_input.thread_id, user_input.user_input)
+
+
+@app.post("/run_agent/stream")
+async def run_agent_stream_endpoint(user_input: UserInput):
+    """
+    Same as /run_agent, streamed as Server-Sent Events: `token`, `tool_start`, `tool_end`
+    and a closing `final` (or `error`) event, each with a JSON payload.
+    """
+
+    async def events():
+        async for event in stream_agent(user_input.thread_id, user_input.user_input):
+            yield f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.websocket("/ws/run_agent")
+async def run_agent_websocket(websocket: WebSocket):
+    """
+    WebSocket variant of /run_agent/stream: send {"thread_id", "user_input"} messages and
+    receive the same events as JSON; the socket stays open for follow-up questions.
+    """
+    await websocket.accept()
+    try:
+        while True:
+            try:
+                user_input = UserInput.model_validate(await websocket.receive_json())
+            except ValueError as e:
+                await websocket.send_json(
+                    {"type": "error", "message": f"Invalid request: {e}"}
+                )
+                continue
+            async for event in stream_agent(
+                user_input.thread_id, user_input.user_input
+            ):
+                await websocket.send_text(json.dumps(event, default=str))
+    except WebSocketDisconnect:
+        pass
+
+
+def _check_admin_token(token: Optional[str]) -> None:
+    """
+    Admin endpoints require X-Admin-Token == ADMIN_API_TOKEN. Without a configured
+    token they are closed (503) unless ADMIN_API_OPEN=1 opts into open access for local dev.
+    """
+    expected = os.getenv("ADMIN_API_TOKEN")
+    if not expected:
+        if os.getenv("ADMIN_API_OPEN", "0").lower() in ("1", "true", "yes"):
+            return
+        raise HTTPException(
+            status_code=503,
+            detail="Admin endpoints are disabled: ADMIN_API_TOKEN is not set",
+        )
+    if token is None or not secrets.compare_digest(token, expected):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+class ReloadRequest(BaseModel):
+    force: bool = False
+
+
+@app.post("/admin/reload_data")
+async def reload_data_endpoint(
+    request: ReloadRequest = ReloadRequest(),
+    x_admin_token: Optional[str] = Header(default=None),
+):
+    """
+    Rebuilds the payments dataset in the background and swaps it in atomically.
+    Without `force`, the reload is skipped when the data files are unchanged.
+    """
+    _check_admin_token(x_admin_token)
+    result = await PAYMENTS_STORE_HOLDER.areload(force=request.force)
+    return {**result, "data": PAYMENTS_STORE_HOLDER.status()}
+
+
+@app.get("/admin/data_status")
+def data_status_endpoint(x_admin_token: Optional[str] = Header(default=None)):
+    _check_admin_token(x_admin_token)
+    return PAYMENTS_STORE_HOLDER.status()
+
+
+@app.get("/admin/stats")
+def stats_endpoint(x_admin_token: Optional[str] = Header(default=None)):
+    """
+    Runtime counters: history compaction, fast-path routing, response cache, tool-result memo,
+    single-flight coalescing, Slack MCP client and escalation queue.
+    """
+    _check_admin_token(x_admin_token)
+    return {
+        "history": HISTORY_STATS.snapshot(),
+        "router": ROUTER_STATS.snapshot(),
+        "response_cache": RESPONSE_CACHE.snapshot()
+        if RESPONSE_CACHE is not None
+        else None,
+        "tool_memo": {
+            "store_version": PAYMENTS_STORE_HOLDER.version,
+            **PAYMENTS_STORE_HOLDER.current.memo_stats(),
+        },
+        "singleflight": {
+            "tools": TOOL_SINGLEFLIGHT.snapshot()
+            if TOOL_SINGLEFLIGHT is not None
+            else None,
+            "agent_runs": AGENT_COALESCER.snapshot()
+            if AGENT_COALESCER is not None
+            else None,
+        },
+        "slack_mcp": SLACK_MCP_POOL.snapshot(),
+        "slack_escalations": (
+            {
+                **ESCALATION_QUEUE.snapshot(),
+                "slack_mcp": ESCALATION_SLACK_POOL.snapshot(),
+            }
+            if ESCALATION_QUEUE is not None
+            else None
+        ),
+    }
@@ -2,6 +2,7 @@
 
 from dotenv import load_dotenv
 import asyncio
+import json
 import uuid
 import os
 import streamlit as st
@@ -49,48 +50,74 @@ def initialize_session_state():
         ]
 
 
+async def _stream_events(user_input: str):
+    """Yield (event_type, payload) pairs from the agent's SSE endpoint."""
+    async with httpx.AsyncClient(timeout=httpx.Timeout(30.0, read=120.0)) as client:
+        async with client.stream(
+            "POST",
+            f"{API_URL}/run_agent/stream",
+            json={
+                "thread_id": st.session_state.thread_id,
+                "user_input": user_input,
+            },
+        ) as http_response:
+            if http_response.is_error:
+                # read the body so the error handler can show its detail
+                await http_response.aread()
+            http_response.raise_for_status()
+            event_type = "message"
+            async for line in http_response.aiter_lines():
+                if line.startswith("event:"):
+                    event_type = line[len("event:") :].strip()
+                elif line.startswith("data:"):
+                    yield event_type, json.loads(line[len("data:") :].strip())
+
+
 async def process_input(user_input: str):
-    """Handles user input, calls the async agent, and updates the chat UI."""
+    """Handles user input, streams the agent's answer into the chat UI as it is generated."""
     # Add user message to the chat history
     st.session_state.messages.append({"role": "user", "content": user_input})
 
     with st.chat_message("assistant"):
-        with st.spinner("Analyzing transactions, compliance thresholds, and playbooks..."):
-            try:
-                async with httpx.AsyncClient(timeout=30.0) as client:
-                    http_response = await client.post(
-                        f"{API_URL}/run_agent",
-                        json={
-                            "thread_id": st.session_state.thread_id,
-                            "user_input": user_input,
-                        },
+        status = st.status(
+            "Analyzing transactions, compliance thresholds, and playbooks..."
+        )
+        placeholder = st.empty()
+        streamed = ""
+        assistant_response = None
+        try:
+            async for event_type, event in _stream_events(user_input):
+                if event_type == "token":
+                    streamed += event["content"]
+                    placeholder.markdown(streamed + "▌")
+                elif event_type == "tool_start":
+                    # text streamed before a tool call was the model thinking aloud
+                    streamed = ""
+                    placeholder.empty()
+                    status.write(f"Running `{event['name']}`...")
+                elif event_type == "tool_end":
+                    status.write(
+                        f"`{event['name']}` done ({event.get('elapsed_ms')} ms)"
                     )
-                    http_response.raise_for_status()
-                    response_data = http_response.json()
-
-            except httpx.HTTPStatusError as e:
-                error_detail = e.response.json().get("detail", "Unknown error")
-                response_data = {
-                    "response": f"API Error: {e.response.status_code} - {error_detail}"
-                }
-            except Exception:
-                response_data = {
-                    "response": f"Network Error: Could not connect to agent at {API_URL}"
-                }
-
-            assistant_response = response_data.get("response") if response_data else None
-
-            if assistant_response:
-                st.write(assistant_response)
-                st.session_state.messages.append(
-                    {"role": "assistant", "content": assistant_response}
-                )
-            else:
-                fallback = "I'm sorry, I couldn't process that request."
-                st.write(fallback)
-                st.session_state.messages.append(
-                    {"role": "assistant", "content": fallback}
-                )
+                elif event_type == "final":
+                    assistant_response = event.get("response")
+                elif event_type == "error":
+                    assistant_response = event.get("message")
+        except httpx.HTTPStatusError as e:
+            error_detail = e.response.json().get("detail", "Unknown error")
+            assistant_response = f"API Error: {e.response.status_code} - {error_detail}"
+        except Exception:
+            assistant_response = (
+                f"Network Error: Could not connect to agent at {API_URL}"
+            )
+        status.update(label="Done", state="complete", expanded=False)
+
+        if not assistant_response:
+            assistant_response = "I'm sorry, I couldn't process that request."
+        placeholder.markdown(assistant_response)
+        st.session_state.messages.append(
+            {"role": "assistant", "content": assistant_response}
+        )
 
 
 # --- UI Setup ---
@@ -112,6 +139,8 @@ for message in st.session_state["messages"]:
         st.write(message["content"])
 
 # Chat input
-if prompt := st.chat_input("Ask about a transaction, merchant monitoring, fraud signals, or remediation..."):
+if prompt := st.chat_input(
+    "Ask about a transaction, merchant monitoring, fraud signals, or remediation..."
+):
     asyncio.run(process_input(prompt))
-    st.rerun()
\ No newline at end of file
+    st.rerun()
@@ -3,8 +3,8 @@ import asyncio
 import uuid
 import streamlit as st
 
-# Import the run_agent function from the project structure
-from src.agent.graph import run_agent
+# Import the streaming agent entry point from the project structure
+from src.agent.graph import stream_agent
 
 # Note: The location of this function might change in future Streamlit versions.
 # We keep it here to detect direct run vs. 'streamlit run'
@@ -48,26 +48,40 @@ def initialize_session_state():
 
 
 async def process_input(user_input: str):
-    """Handles user input, calls the async agent, and updates the chat UI."""
+    """Handles user input, streams the agent's answer into the chat UI as it is generated."""
     # Add user message to the chat history
     st.session_state.messages.append({"role": "user", "content": user_input})
 
     # Get assistant response
     with st.chat_message("assistant"):
-        with st.spinner("Analyzing transactions, compliance signals, and internal playbooks..."):
-            response = await run_agent(st.session_state.thread_id, user_input)
-
-            # Extract and display the final response
-            if response and response.get("response"):
-                assistant_response = response["response"]
-                st.write(assistant_response)
-                st.session_state.messages.append(
-                    {"role": "assistant", "content": assistant_response}
-                )
-            else:
-                fallback = "I'm sorry, I couldn't process that request."
-                st.write(fallback)
-                st.session_state.messages.append({"role": "assistant", "content": fallback})
+        status = st.status(
+            "Analyzing transactions, compliance signals, and internal playbooks..."
+        )
+        placeholder = st.empty()
+        streamed = ""
+        assistant_response = None
+        async for event in stream_agent(st.session_state.thread_id, user_input):
+            if event["type"] == "token":
+                streamed += event["content"]
+                placeholder.markdown(streamed + "▌")
+            elif event["type"] == "tool_start":
+                # text streamed before a tool call was the model thinking aloud
+                streamed = ""
+                placeholder.empty()
+                status.write(f"Running `{event['name']}`...")
+            elif event["type"] == "tool_end":
+                status.write(f"`{event['name']}` done ({event['elapsed_ms']} ms)")
+            elif event["type"] in ("final", "error"):
+                assistant_response = event.get("response") or event.get("message")
+        status.update(label="Done", state="complete", expanded=False)
+
+        # Display the final response
+        if not assistant_response:
+            assistant_response = "I'm sorry, I couldn't process that request."
+        placeholder.markdown(assistant_response)
+        st.session_state.messages.append(
+            {"role": "assistant", "content": assistant_response}
+        )
 
 
 # --- Application Setup (UI Rendering) ---
@@ -91,6 +105,8 @@ for message in st.session_state["messages"]:
         st.write(message["content"])
 
 # Prompt for user input and save
-if prompt := st.chat_input("Ask about a transaction, merchant monitoring, fraud signals, or remediation..."):
+if prompt := st.chat_input(
+    "Ask about a transaction, merchant monitoring, fraud signals, or remediation..."
+):
     asyncio.run(process_input(prompt))
-    st.rerun()
\ No newline at end of file
+    st.rerun()
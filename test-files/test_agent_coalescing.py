@@ -0,0 +1,53 @@
+# test_agent_coalescing.py
+# run_coalesced must only share a run between identical questions, never between
+# different questions about the same entity. The agent run itself is replaced by a stub.
+# Run from the project root:  python -m pytest -q test-files/test_agent_coalescing.py
+import asyncio
+import os
+import sys
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("TFY_API_KEY", "test")
+os.environ["AGENT_COALESCE"] = "1"
+os.environ["AGENT_CHECKPOINTER"] = "memory"
+
+from src.agent import graph  # noqa: E402
+
+
+def run_concurrently(questions, monkeypatch):
+    started = []
+
+    async def fake_run(config, user_input):
+        started.append(user_input)
+        await asyncio.sleep(0.05)
+        return f"answer to: {user_input}"
+
+    monkeypatch.setattr(graph, "_run", fake_run)
+
+    async def scenario():
+        configs = [
+            {"configurable": {"thread_id": str(uuid.uuid4())}} for _ in questions
+        ]
+        return await asyncio.gather(
+            *(graph.run_coalesced(c, q) for c, q in zip(configs, questions))
+        )
+
+    return asyncio.run(scenario()), started
+
+
+def test_different_questions_about_one_transaction_are_not_merged(monkeypatch):
+    questions = ["Why was T10005 declined?", "When was T10005 declined?"]
+    results, started = run_concurrently(questions, monkeypatch)
+    assert sorted(started) == sorted(questions)
+    assert results == [(f"answer to: {q}", False) for q in questions]
+
+
+def test_identical_questions_share_one_run(monkeypatch):
+    results, started = run_concurrently(
+        ["Why was T10005 declined?", "why was T10005  declined"], monkeypatch
+    )
+    assert len(started) == 1
+    assert [shared for _, shared in results].count(True) == 1
+    assert results[0][0] == results[1][0]
@@ -0,0 +1,121 @@
+# test_checkpointer.py
+# Thread state bounds: message trimming (both backends) and the SQLite saver's retention pass.
+# Run from the project root:  python -m pytest -q test-files/test_checkpointer.py
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("TFY_API_KEY", "test")
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage  # noqa: E402
+from langgraph.checkpoint.memory import MemorySaver  # noqa: E402
+from langgraph.graph import END, START, MessagesState, StateGraph  # noqa: E402
+
+from src.agent.checkpointer import CompressedSerializer  # noqa: E402
+from src.agent.checkpointer_sqlite import (  # noqa: E402
+    CheckpointRetention,
+    SqliteCheckpointSaver,
+)
+from src.agent.history import trim_thread  # noqa: E402
+from src.agent.router import build_routed_agent  # noqa: E402
+
+
+def turn(i, with_tool=False):
+    messages = [HumanMessage(content=f"question {i}", id=f"h{i}")]
+    if with_tool:
+        call = {"name": "lookup", "args": {}, "id": f"call{i}"}
+        messages += [
+            AIMessage(content="", tool_calls=[call], id=f"c{i}"),
+            ToolMessage(content="{}", tool_call_id=f"call{i}", id=f"t{i}"),
+        ]
+    return messages + [AIMessage(content=f"answer {i}", id=f"a{i}")]
+
+
+def echo_agent():
+    """Stand-in for the ReAct agent: answers every question with one AIMessage."""
+
+    def answer(state):
+        return {
+            "messages": [
+                AIMessage(content=f"answer to {state['messages'][-1].content}")
+            ]
+        }
+
+    builder = StateGraph(MessagesState)
+    builder.add_node("answer", answer)
+    builder.add_edge(START, "answer")
+    builder.add_edge("answer", END)
+    return builder.compile()
+
+
+def test_trim_thread_removes_whole_oldest_turns():
+    messages = turn(0, with_tool=True) + turn(1) + turn(2, with_tool=True) + turn(3)
+    removed = {m.id for m in trim_thread(messages, 7)}
+    # turn 0 (4 messages) goes; turns 1-3 (2 + 4 + 2) still exceed 7, so turn 1 goes too
+    assert removed == {"h0", "c0", "t0", "a0", "h1", "a1"}
+    assert trim_thread(messages, 0) == []
+    assert trim_thread(messages, len(messages)) == []
+
+
+def test_trim_thread_keeps_the_latest_turn():
+    messages = turn(0) + turn(1, with_tool=True)
+    assert {m.id for m in trim_thread(messages, 2)} == {"h0", "a0"}
+
+
+def test_routed_thread_state_is_bounded(monkeypatch):
+    monkeypatch.setenv("AGENT_MAX_THREAD_MESSAGES", "6")
+    monkeypatch.setenv("AGENT_FAST_PATH", "0")
+    app = build_routed_agent(echo_agent(), llm=None, checkpointer=MemorySaver())
+    config = {"configurable": {"thread_id": "bounded"}}
+
+    async def scenario():
+        for i in range(10):
+            await app.ainvoke({"messages": [("user", f"question {i}")]}, config)
+        return (await app.aget_state(config)).values["messages"]
+
+    messages = asyncio.run(scenario())
+    assert len(messages) <= 7
+    assert messages[-1].content == "answer to question 9"
+    assert "question 0" not in [m.content for m in messages]
+
+
+def test_compressed_serializer_round_trip():
+    serde = CompressedSerializer(min_bytes=64)
+    value = {"messages": ["x" * 1000]}
+    type_, data = serde.dumps_typed(value)
+    assert type_.endswith("+zlib") and len(data) < 1000
+    assert serde.loads_typed((type_, data)) == value
+
+
+def test_sqlite_retention_trims_and_evicts(tmp_path):
+    saver = SqliteCheckpointSaver(
+        tmp_path / "checkpoints.sqlite", compress_min_bytes=64
+    )
+    app = build_routed_agent(echo_agent(), llm=None, checkpointer=saver)
+
+    async def scenario():
+        for thread in ("old", "new"):
+            for i in range(5):
+                await app.ainvoke(
+                    {"messages": [("user", f"{thread} {i}")]},
+                    {"configurable": {"thread_id": thread}},
+                )
+
+    asyncio.run(scenario())
+    result = CheckpointRetention(max_checkpoints=3, ttl_s=None, max_threads=1).apply(
+        saver
+    )
+    assert result["deleted_threads"] == 1
+    assert result["trimmed_checkpoints"] > 0
+    assert saver.stats()["threads"] == 1
+    assert saver.stats()["checkpoints"] == 3
+
+    # the kept thread still resumes from its newest checkpoint
+    state = asyncio.run(app.aget_state({"configurable": {"thread_id": "new"}}))
+    assert state.values["messages"][-1].content == "answer to new 4"
+    assert (
+        asyncio.run(app.aget_state({"configurable": {"thread_id": "old"}})).values == {}
+    )
+    saver.close()
@@ -0,0 +1,93 @@
+# test_escalation_queue.py
+# EscalationQueue delivery rules: no duplicate posts on ambiguous failures, batches stay per agent thread.
+# Run from the project root:  python -m pytest -q test-files/test_escalation_queue.py
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("TFY_API_KEY", "test")
+
+from src.agent.escalation_queue import EscalationQueue  # noqa: E402
+from src.agent.mcp_pool import MCPConnectError  # noqa: E402
+
+
+class FakeSlack:
+    """send() for the queue: records posts and raises the queued errors first."""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.posts = []
+
+    async def __call__(self, channel, text, thread_ts=None):
+        if self.errors:
+            raise self.errors.pop(0)
+        self.posts.append((channel, text, thread_ts))
+        return {"ok": True, "ts": str(len(self.posts))}
+
+
+def make_queue(slack, **kwargs):
+    options = dict(batch_window_s=0.05, backoff_base_s=0.01, rate_per_s=100, burst=100)
+    options.update(kwargs)
+    return EscalationQueue(slack, retry_on=(MCPConnectError,), **options)
+
+
+def test_connect_failures_are_retried():
+    slack = FakeSlack(MCPConnectError("refused"), MCPConnectError("refused"))
+    queue = make_queue(slack)
+    handle = queue.enqueue("#risk-approvals-demo", "M200 high risk", thread_id="t1")
+    assert queue.flush(5)
+    status = queue.status(handle["escalation_id"])
+    queue.stop()
+    assert status["status"] == "delivered"
+    assert status["attempts"] == 3
+    assert len(slack.posts) == 1
+
+
+def test_failures_after_sending_are_not_retried():
+    slack = FakeSlack(TimeoutError("no reply from sendMessage"))
+    queue = make_queue(slack)
+    handle = queue.enqueue("#risk-approvals-demo", "M200 high risk", thread_id="t1")
+    assert queue.flush(5)
+    status = queue.status(handle["escalation_id"])
+    queue.stop()
+    assert status["status"] == "failed"
+    assert status["attempts"] == 1
+    assert "TimeoutError" in status["error"]
+    assert queue.stats["retries"] == 0
+
+
+def test_batches_never_join_agent_threads():
+    slack = FakeSlack()
+    queue = make_queue(slack, batch_window_s=0.2)
+    first = queue.enqueue("#payments-ops-demo", "M200 decline spike", thread_id="t1")
+    second = queue.enqueue("#payments-ops-demo", "M200 issuer errors", thread_id="t1")
+    other = queue.enqueue("#payments-ops-demo", "M300 decline spike", thread_id="t2")
+    assert queue.flush(5)
+    statuses = [queue.status(h["escalation_id"]) for h in (first, second, other)]
+    queue.stop()
+    assert len(slack.posts) == 2
+    assert [s["batched_with"] for s in statuses] == [1, 1, 0]
+    assert statuses[0]["result"] == statuses[1]["result"] != statuses[2]["result"]
+    texts = sorted(text for _, text, _ in slack.posts)
+    assert (
+        texts[0].startswith("M200 decline spike") and "M200 issuer errors" in texts[0]
+    )
+    assert texts[1] == "M300 decline spike"
+
+
+def test_duplicate_in_one_thread_returns_the_original_handle():
+    slack = FakeSlack()
+    queue = make_queue(slack)
+    first = queue.enqueue("#payments-ops-demo", "M200 decline spike", thread_id="t1")
+    again = queue.enqueue("#payments-ops-demo", "m200  decline spike", thread_id="t1")
+    assert queue.flush(5)
+    queue.stop()
+    assert again["duplicate"] and again["escalation_id"] == first["escalation_id"]
+    assert len(slack.posts) == 1
+
+
+def test_worker_has_its_own_slack_client():
+    from src.agent import payments_tools
+
+    assert payments_tools.ESCALATION_SLACK_POOL is not payments_tools.SLACK_MCP_POOL
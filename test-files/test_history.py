@@ -0,0 +1,139 @@
+# test_history.py
+# compact_history: old verbose tool outputs are stubbed (oldest first, only until the budget fits),
+# recent turns and message pairing stay intact, and the hook never touches the thread state.
+# Run from the project root:  python -m pytest -q test-files/test_history.py
+import json
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("TFY_API_KEY", "test")
+
+from langchain_core.messages import (  # noqa: E402
+    AIMessage,
+    HumanMessage,
+    ToolMessage,
+)
+from langchain_core.messages.utils import count_tokens_approximately  # noqa: E402
+
+from src.agent import history  # noqa: E402
+from src.agent.history import (  # noqa: E402
+    MIN_ELIDE_TOKENS,
+    HistoryStats,
+    compact_history,
+    history_hook,
+)
+
+
+def tool_result(i, rows):
+    return json.dumps(
+        {
+            "merchant_id": f"M{i}00",
+            "count": rows,
+            "verdict": "Healthy",
+            "note": "x" * 500,
+            "transactions": [{"transaction_id": f"T{i}{n:04d}"} for n in range(rows)],
+        }
+    )
+
+
+def thread(turns, rows=60):
+    """`turns` user turns, each with one tool call whose result is ~rows * 10 tokens."""
+    messages = []
+    for i in range(turns):
+        call_id = f"call{i}"
+        messages += [
+            HumanMessage(content=f"question {i}", id=f"h{i}"),
+            AIMessage(
+                content="",
+                id=f"a{i}",
+                tool_calls=[{"name": "list_transactions", "args": {}, "id": call_id}],
+            ),
+            ToolMessage(
+                content=tool_result(i + 1, rows),
+                name="list_transactions",
+                tool_call_id=call_id,
+                id=f"t{i}",
+            ),
+            AIMessage(content=f"answer {i}", id=f"r{i}"),
+        ]
+    return messages
+
+
+def tokens(messages):
+    return sum(count_tokens_approximately([m]) for m in messages)
+
+
+def test_under_budget_is_unchanged():
+    messages = thread(3)
+    out, before, after, elided = compact_history(messages, 10**6, 2)
+    assert out == messages and before == after and elided == 0
+    assert compact_history(messages, 0, 2)[3] == 0  # budget 0 disables
+
+
+def test_oldest_outputs_are_elided_until_the_budget_fits():
+    messages = thread(5)
+    full = tokens(messages)
+    one_result = count_tokens_approximately([messages[2]])
+    out, before, after, elided = compact_history(messages, full - one_result, 1)
+    assert before == full and after == tokens(out) and after <= full - one_result
+    assert elided == 2  # one stub is not quite enough, the next one is
+    assert [m.content.startswith("[earlier") for m in out if m.type == "tool"] == [
+        True,
+        True,
+        False,
+        False,
+        False,
+    ]
+
+
+def test_recent_turns_and_pairing_are_kept():
+    messages = thread(5)
+    out, _, after, elided = compact_history(messages, 1, 2)
+    assert elided == 3 and after > 1  # the last two turns stay verbatim over budget
+    assert out[12:] == messages[12:]
+    assert [m.id for m in out] == [m.id for m in messages]
+    for old, new in zip(messages, out):
+        if new.type == "tool":
+            assert new.tool_call_id == old.tool_call_id and new.name == old.name
+
+
+def test_stub_keeps_scalar_facts():
+    messages = thread(2)
+    out = compact_history(messages, 1, 1)[0]
+    stub = out[2].content
+    assert stub.startswith("[earlier list_transactions output elided (~")
+    assert 'merchant_id="M100"' in stub and "count=60" in stub
+    assert 'verdict="Healthy"' in stub and "transactions=" not in stub
+    assert '"xxx' in stub and len(stub) < 300  # long strings are cut
+
+
+def test_small_and_non_json_outputs():
+    messages = thread(3, rows=1)
+    assert all(
+        count_tokens_approximately([m]) <= MIN_ELIDE_TOKENS
+        for m in messages
+        if m.type == "tool"
+    )
+    assert compact_history(messages, 1, 0)[3] == 0
+
+    text = ToolMessage(content="plain text " * 200, tool_call_id="c", name="web")
+    out = compact_history([HumanMessage(content="q"), text], 1, 0)[0]
+    assert out[1].content.endswith("call the tool again if the details are needed]")
+
+
+def test_hook_returns_model_input_only(monkeypatch):
+    monkeypatch.setattr(history, "HISTORY_STATS", HistoryStats())
+    monkeypatch.setenv("AGENT_HISTORY_TOKEN_BUDGET", "500")
+    monkeypatch.setenv("AGENT_HISTORY_KEEP_TURNS", "1")
+    state = {"messages": thread(3)}
+    snapshot = [m.model_copy() for m in state["messages"]]
+    update = history_hook(state)
+    assert set(update) == {"llm_input_messages"}
+    assert state["messages"] == snapshot
+    stats = history.HISTORY_STATS.snapshot()
+    assert stats["calls"] == 1 and stats["elided_messages"] == 2
+    assert stats["tokens_saved"] == tokens(snapshot) - tokens(
+        update["llm_input_messages"]
+    )
@@ -0,0 +1,138 @@
+# test_list_pagination.py
+# list_transactions paging: following next_cursor returns every matching row exactly once, in order,
+# and cursors that are malformed or issued for other filters are rejected.
+# Run from the project root:  python -m pytest -q test-files/test_list_pagination.py
+import asyncio
+import base64
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("TFY_API_KEY", "test")
+
+from src.agent import payments_tools  # noqa: E402
+from src.agent.payments_tools import (  # noqa: E402
+    list_transactions,
+    list_transactions_last_48h,
+)
+
+START, END = "2026-02-01T00:00:00+05:30", "2026-03-01T00:00:00+05:30"
+
+
+def call(tool, **args):
+    return asyncio.run(tool.ainvoke(args))
+
+
+def all_pages(**args):
+    pages = [call(list_transactions, **args)]
+    while pages[-1]["next_cursor"]:
+        pages.append(
+            call(list_transactions, **dict(args, cursor=pages[-1]["next_cursor"]))
+        )
+    return pages
+
+
+def unpaged(merchant_id, status=None, decline_code=None):
+    store = payments_tools.PAYMENTS_STORE_HOLDER.current
+    txns = asyncio.run(
+        store.list_transactions(
+            merchant_id=merchant_id,
+            start_time=START,
+            end_time=END,
+            status=status,
+            decline_code=decline_code,
+        )
+    )
+    return [t.transaction_id for t in txns]
+
+
+@pytest.mark.parametrize("merchant_id", ["M100", "M400", "m200"])
+@pytest.mark.parametrize("limit", [1, 3, 7, None])
+@pytest.mark.parametrize("filters", [{}, {"status": "declined"}])
+def test_cursor_walk_returns_every_row_once(merchant_id, limit, filters):
+    expected = unpaged(merchant_id, **filters)
+    pages = all_pages(
+        merchant_id=merchant_id, start_time=START, end_time=END, limit=limit, **filters
+    )
+    ids = [row["transaction_id"] for page in pages for row in page["transactions"]]
+    assert ids == expected
+    for i, page in enumerate(pages):
+        assert page["count"] == len(expected)
+        assert page["truncated"] == (i < len(pages) - 1)
+        assert page["returned"] <= (limit or payments_tools.TOOL_MAX_ROWS)
+
+
+def test_limit_is_capped_and_never_zero(monkeypatch):
+    monkeypatch.setattr(payments_tools, "TOOL_MAX_ROWS", 2)
+    args = dict(merchant_id="M400", start_time=START, end_time=END)
+    assert call(list_transactions, **args, limit=500)["returned"] == 2
+    assert call(list_transactions, **args, limit=0)["returned"] == 1
+    assert call(list_transactions, **args)["returned"] == 2
+
+
+def test_fields_and_summary_only():
+    args = dict(merchant_id="M400", start_time=START, end_time=END)
+    page = call(list_transactions, **args, fields=["transaction_id", "status"])
+    assert all(set(row) == {"transaction_id", "status"} for row in page["transactions"])
+    summary = call(list_transactions, **args, summary_only=True)
+    assert "transactions" not in summary
+    assert summary["count"] == page["count"]
+    with pytest.raises(ValueError, match="Unknown transaction field"):
+        call(list_transactions, **args, fields=["transaction_id", "pan"])
+
+
+def encoded(data):
+    return base64.urlsafe_b64encode(json.dumps(data).encode("utf-8")).decode("ascii")
+
+
+@pytest.mark.parametrize(
+    "cursor, message",
+    [
+        ("not a cursor", "Invalid cursor"),
+        (encoded({"o": 1, "s": START}), "Invalid cursor"),
+        (encoded({"o": "x", "s": START, "e": END, "f": ""}), "Invalid cursor"),
+        (encoded({"o": -3, "s": START, "e": END, "f": ""}), "negative offset"),
+    ],
+)
+def test_malformed_cursors_are_rejected(cursor, message):
+    with pytest.raises(ValueError, match=message):
+        call(
+            list_transactions,
+            merchant_id="M400",
+            start_time=START,
+            end_time=END,
+            cursor=cursor,
+        )
+
+
+def test_cursor_is_bound_to_its_filters():
+    args = dict(merchant_id="M400", start_time=START, end_time=END, limit=1)
+    cursor = call(list_transactions, **args)["next_cursor"]
+    for other in ({"merchant_id": "M100"}, {"status": "declined"}):
+        with pytest.raises(ValueError, match="different merchant_id"):
+            call(list_transactions, **dict(args, cursor=cursor, **other))
+    # the merchant ID is matched case-insensitively
+    page = call(list_transactions, **dict(args, merchant_id="m400", cursor=cursor))
+    assert page["offset"] == 1
+
+
+def test_cursor_pins_the_original_window():
+    args = dict(merchant_id="M400", start_time=START, end_time=END, limit=1)
+    cursor = call(list_transactions, **args)["next_cursor"]
+    # later pages keep the first call's window whatever the caller passes now
+    page = call(
+        list_transactions,
+        **dict(args, start_time="2030-01-01T00:00:00+05:30", cursor=cursor),
+    )
+    assert (page["start_time"], page["end_time"]) == (START, END)
+    assert page["transactions"][0]["transaction_id"] == unpaged("M400")[1]
+
+    cursor_48h = payments_tools._encode_cursor(
+        1, START, END, payments_tools._filter_key("M400", None, None)
+    )
+    page = call(list_transactions_last_48h, merchant_id="M400", cursor=cursor_48h)
+    assert (page["start_time"], page["end_time"]) == (START, END)
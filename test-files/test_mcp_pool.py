@@ -0,0 +1,249 @@
+# test_mcp_pool.py
+# MCPClientPool against a local stand-in Slack MCP server (no network, no Slack token).
+# Run from the project root:  python -m pytest -q test-files/test_mcp_pool.py
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from fastmcp import Client, FastMCP  # noqa: E402
+
+from src.agent.mcp_pool import MCPClientPool, McpError  # noqa: E402
+
+server = FastMCP("slack-stand-in")
+calls = {"getConversations": 0, "sendMessage": 0}
+
+
+@server.tool
+def getConversations(types: str = "public_channel", limit: int = 50) -> list:
+    calls["getConversations"] += 1
+    channels = [
+        {"id": "C001", "name": "payments-ops-demo"},
+        {"id": "C002", "name": "fraud-alerts"},
+    ]
+    return channels[:limit]
+
+
+@server.tool
+async def sendMessage(channel: str, message: str, threadTs: str | None = None) -> dict:
+    calls["sendMessage"] += 1
+    if channel == "#slow":
+        await asyncio.sleep(1)
+    return {"ok": True, "channel": channel, "ts": str(time.time())}
+
+
+class FlakyFactory:
+    """Client factory whose first `failures` connects fail, like a gateway that is still starting."""
+
+    def __init__(self, failures: int):
+        self.failures = failures
+        self.created = 0
+
+    def __call__(self) -> Client:
+        self.created += 1
+        if self.created <= self.failures:
+            # nothing listens on the discard port
+            return Client("http://127.0.0.1:9/mcp")
+        return Client(server)
+
+
+class ServerAnswered(McpError):
+    """An error response from the server (McpError's constructor differs between mcp versions)."""
+
+    def __init__(self) -> None:
+        Exception.__init__(self, "Invalid params")
+
+
+class FakeClient:
+    """Connected client stand-in whose calls raise `error` (when set)."""
+
+    def __init__(self, error: Exception = None):
+        self.error = error
+        self.calls = 0
+        self.closed = False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.closed = True
+
+    async def ping(self):
+        return True
+
+    async def call_tool(self, tool_name, tool_args):
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+        return {"ok": True, "tool": tool_name}
+
+
+def send(pool, channel="#c", message="x"):
+    return pool.call_tool("sendMessage", {"channel": channel, "message": message})
+
+
+def test_calls_share_one_client():
+    async def scenario():
+        pool = MCPClientPool(lambda: Client(server))
+        for i in range(5):
+            await send(pool, message=f"msg {i}")
+        await asyncio.gather(*(send(pool) for _ in range(20)))
+        await pool.close()
+        return pool
+
+    pool = asyncio.run(scenario())
+    assert pool.stats["connects"] == 1
+    assert pool.stats["calls"] == 25
+
+
+def test_read_only_results_and_tool_list_are_cached():
+    async def scenario():
+        pool = MCPClientPool(
+            lambda: Client(server), cache_ttl_s={"getConversations": 60}
+        )
+        before = calls["getConversations"]
+        for _ in range(5):
+            await pool.call_tool(
+                "getConversations", {"types": "public_channel", "limit": 5}
+            )
+        tools = [t.name for t in await pool.list_tools()]
+        await pool.list_tools()
+        await pool.close()
+        return pool, calls["getConversations"] - before, tools
+
+    pool, server_calls, tools = asyncio.run(scenario())
+    assert server_calls == 1
+    assert sorted(tools) == ["getConversations", "sendMessage"]
+    assert pool.stats["cache_hits"] == 5
+
+
+def test_timeout_fails_only_that_call():
+    async def scenario():
+        pool = MCPClientPool(lambda: Client(server), call_timeout_s=0.5)
+        await send(pool)
+        slow = asyncio.ensure_future(send(pool, channel="#slow"))
+        fast = await asyncio.gather(
+            *(send(pool, message=f"fast {i}") for i in range(10))
+        )
+        with pytest.raises(asyncio.TimeoutError):
+            await slow
+        await send(pool, message="after timeout")
+        await pool.close()
+        return pool, fast
+
+    pool, fast = asyncio.run(scenario())
+    assert all(result.data["ok"] for result in fast)
+    assert pool.stats["timeouts"] == 1
+    assert pool.stats["retries"] == 0  # sendMessage is not idempotent
+    assert pool.stats["connects"] == 1  # the session outlived the timeout
+    assert pool.stats["reconnects"] == 0
+
+
+def test_connect_failures_are_retried_with_backoff():
+    flaky = FlakyFactory(failures=2)
+
+    async def scenario():
+        pool = MCPClientPool(flaky, backoff_base_s=0.05, call_timeout_s=2.0)
+        result = await send(pool, message="hello")
+        await pool.close()
+        return pool, result
+
+    pool, result = asyncio.run(scenario())
+    assert result.data["ok"]
+    assert flaky.created == 3
+    assert pool.stats["retries"] == 2
+    assert pool.stats["connects"] == 1
+
+
+def test_broken_connection_is_dropped_and_reconnected():
+    clients = [
+        FakeClient(RuntimeError("Server session was closed unexpectedly")),
+        FakeClient(),
+        FakeClient(),
+    ]
+    created = iter(clients)
+
+    async def scenario():
+        pool = MCPClientPool(lambda: next(created), backoff_base_s=0.01)
+        with pytest.raises(RuntimeError, match="session was closed"):
+            await send(pool)  # not idempotent: raised, never retried
+        after_send = await send(pool)
+        clients[1].error = ConnectionResetError("connection reset")
+        conversations = await pool.call_tool("getConversations", {}, idempotent=True)
+        return pool, after_send, conversations
+
+    pool, after_send, conversations = asyncio.run(scenario())
+    assert clients[0].closed and clients[0].calls == 1
+    assert clients[1].closed and not clients[2].closed
+    assert after_send["ok"] and conversations["ok"]
+    assert pool.stats["reconnects"] == 2
+    assert pool.stats["retries"] == 1
+
+
+def test_server_errors_keep_the_client():
+    client = FakeClient(ServerAnswered())
+
+    async def scenario():
+        pool = MCPClientPool(lambda: client)
+        with pytest.raises(McpError):
+            await pool.call_tool("getConversations", {}, idempotent=True)
+        return pool
+
+    pool = asyncio.run(scenario())
+    assert client.calls == 1  # an answer is not retried
+    assert not client.closed
+    assert pool.stats["reconnects"] == 0
+
+
+def test_dropped_client_closes_after_its_calls_finish():
+    async def scenario():
+        pool = MCPClientPool(lambda: Client(server), call_timeout_s=5)
+        await send(pool)
+        old = pool._client
+        slow = asyncio.ensure_future(send(pool, channel="#slow"))
+        await asyncio.sleep(0.3)
+        await pool._discard(old)
+        still_open = old.is_connected()
+        await send(pool, message="on a new client")
+        result = await slow
+        await pool.close()
+        return still_open, result, old.is_connected(), pool
+
+    still_open, result, old_connected, pool = asyncio.run(scenario())
+    assert still_open
+    assert result.data["ok"]
+    assert not old_connected
+    assert pool.stats["connects"] == 2
+
+
+def test_each_event_loop_gets_its_own_client():
+    # standalone Streamlit runs each turn under its own asyncio.run()
+    pool = MCPClientPool(lambda: Client(server))
+    asyncio.run(send(pool, message="first loop"))
+    asyncio.run(send(pool, message="second loop"))
+    assert pool.stats["connects"] == 2
+
+
+def test_switching_loops_closes_the_client_on_its_own_loop():
+    import threading
+
+    clients = [FakeClient(), FakeClient()]
+    created = iter(clients)
+    pool = MCPClientPool(lambda: next(created))
+
+    worker = asyncio.new_event_loop()
+    thread = threading.Thread(target=worker.run_forever, daemon=True)
+    thread.start()
+    asyncio.run_coroutine_threadsafe(send(pool), worker).result(5)
+    asyncio.run(send(pool))  # a different loop takes the pool over
+    asyncio.run_coroutine_threadsafe(asyncio.sleep(0), worker).result(5)
+    worker.call_soon_threadsafe(worker.stop)
+    thread.join(5)
+    worker.close()
+    assert clients[0].closed
+    assert not clients[1].closed
+    assert pool.stats["loop_switches"] == 1
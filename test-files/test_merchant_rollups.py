@@ -0,0 +1,155 @@
+# test_merchant_rollups.py
+# Rolling-window rollups against a plain scan of the rows, with as_of on, just before and just after
+# row timestamps and hour boundaries (windows are [as_of - window, as_of], both ends inclusive).
+# Run from the project root:  python -m pytest -q test-files/test_merchant_rollups.py
+import math
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("TFY_API_KEY", "test")
+
+from src.agent.merchant_rollups import (  # noqa: E402
+    BUCKET_S,
+    WINDOWS,
+    MerchantRollup,
+)
+from src.agent.payments_data_model import PaymentsData  # noqa: E402
+
+DATA_DIR = Path(__file__).resolve().parents[1] / "mastercard_agent_demo_data"
+MERCHANTS = ["M100", "M200", "M300", "M400", "M500", "m200"]
+
+
+def epoch(iso):
+    return datetime.fromisoformat(iso).timestamp()
+
+
+@pytest.fixture(scope="module", params=["rows", "columnar"])
+def store(request):
+    return PaymentsData.load_from_dir(DATA_DIR, backend=request.param)
+
+
+def percentile(scores, q):
+    ranked = sorted(min(max(int(round(s * 100)), 0), 100) for s in scores)
+    return ranked[math.ceil(q * len(ranked)) - 1] / 100 if ranked else None
+
+
+def scan(store, merchant_id, window_s, as_of):
+    start = as_of - window_s
+    rows = [
+        t
+        for t in store.iter_transactions()
+        if t.merchant_id.lower() == merchant_id.lower()
+        and start <= epoch(t.timestamp) <= as_of
+    ]
+    cbs = [
+        cb
+        for cb in store.chargebacks
+        if cb.merchant_id.lower() == merchant_id.lower()
+        and start <= epoch(cb.received_date) <= as_of
+    ]
+    approved = [t for t in rows if t.status != "declined"]
+    codes = {}
+    for t in rows:
+        if t.status == "declined":
+            codes[t.decline_code or "UNKNOWN"] = (
+                codes.get(t.decline_code or "UNKNOWN", 0) + 1
+            )
+    scores = [t.risk_score for t in rows]
+    return {
+        "transactions": len(rows),
+        "approved": len(approved),
+        "declined": len(rows) - len(approved),
+        "decline_codes": codes,
+        "risk_score": {
+            "p50": percentile(scores, 0.50),
+            "p90": percentile(scores, 0.90),
+            "p99": percentile(scores, 0.99),
+            "max": max(scores) if scores else None,
+        },
+        "amount_total": round(sum(t.amount for t in rows), 2),
+        "approved_amount_total": round(sum(t.amount for t in approved), 2),
+        "chargebacks": {
+            "count": len(cbs),
+            "amount": round(sum(cb.amount for cb in cbs), 2),
+        },
+    }
+
+
+def as_of_edges(store):
+    """Row and chargeback times, one second either side, the hours around them, and the window-start edges."""
+    times = sorted(
+        {epoch(t.timestamp) for t in store.iter_transactions()}
+        | {epoch(cb.received_date) for cb in store.chargebacks}
+    )
+    picks = times[:: max(len(times) // 12, 1)] + [times[-1]]
+    out = set()
+    for t in picks:
+        hour = t // BUCKET_S * BUCKET_S
+        out.update({t - 1, t, t + 1, hour, hour + BUCKET_S})
+        # the row sits exactly on, just inside or just outside each window's start
+        for window_s in WINDOWS.values():
+            out.update({t + window_s - 1, t + window_s, t + window_s + 1})
+    return sorted(out)
+
+
+@pytest.mark.parametrize("merchant_id", MERCHANTS)
+def test_windows_match_a_scan(store, merchant_id):
+    for as_of in as_of_edges(store):
+        got = store.rollups.summary(merchant_id, list(WINDOWS), as_of)
+        for name, window_s in WINDOWS.items():
+            summary = got[name]
+            expected = scan(store, merchant_id, window_s, as_of)
+            assert {k: summary[k] for k in expected if k != "chargebacks"} == {
+                k: v for k, v in expected.items() if k != "chargebacks"
+            }, (name, as_of)
+            assert summary["decline_rate"] == (
+                round(expected["declined"] / expected["transactions"], 4)
+                if expected["transactions"]
+                else None
+            )
+            chargebacks = summary["chargebacks"]
+            assert {k: chargebacks[k] for k in ("count", "amount")} == expected[
+                "chargebacks"
+            ], (name, as_of)
+
+
+def test_repeated_and_reordered_calls_agree(store):
+    as_ofs = as_of_edges(store)
+    first = [store.rollups.summary("M400", ["24h", "30d"], a) for a in as_ofs]
+    again = [store.rollups.summary("M400", ["24h", "30d"], a) for a in reversed(as_ofs)]
+    assert first == list(reversed(again))
+
+
+def test_new_rows_invalidate_cached_hours():
+    rows = []
+
+    def rows_between(lo=None, hi=None):
+        return [
+            r for r in rows if (lo is None or r[0] >= lo) and (hi is None or r[0] <= hi)
+        ]
+
+    rollup = MerchantRollup(rows_between, lambda lo, hi: [])
+
+    def add(epoch_s, status, risk):
+        row = (epoch_s, status, "05" if status == "declined" else None, risk, 10.0)
+        rows.append(row)
+        rollup.add_transaction(*row)
+
+    as_of = 100 * BUCKET_S + 30
+    add(90 * BUCKET_S + 5, "approved", 0.1)
+    assert rollup.summary(WINDOWS["24h"], as_of)["transactions"] == 1
+    add(95 * BUCKET_S, "declined", 0.9)
+    summary = rollup.summary(WINDOWS["24h"], as_of)
+    assert (summary["approved"], summary["declined"]) == (1, 1)
+    assert summary["decline_codes"] == {"05": 1}
+    assert summary["risk_score"]["max"] == 0.9
+
+
+def test_unknown_window_is_rejected(store):
+    with pytest.raises(ValueError, match="Unknown window '2h'"):
+        store.rollups.summary("M100", ["24h", "2h"], epoch("2026-02-21T00:00:00+05:30"))
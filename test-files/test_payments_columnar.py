@@ -0,0 +1,141 @@
+# test_payments_columnar.py
+# Rows vs columnar backend: every store query returns the same result on the same data.
+# Run from the project root:  python -m pytest -q test-files/test_payments_columnar.py
+import asyncio
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("TFY_API_KEY", "test")
+
+from src.agent.payments_data_model import PaymentsData  # noqa: E402
+
+DATA_DIR = Path(__file__).resolve().parents[1] / "mastercard_agent_demo_data"
+START, END = "2026-02-14T00:00:00+05:30", "2026-02-22T00:00:00+05:30"
+MERCHANTS = ["M100", "M200", "M300", "M400", "M500", "m400"]
+
+
+@pytest.fixture(scope="module")
+def data_dir(tmp_path_factory):
+    """The demo data plus a later duplicate of T10001 that sorts before it (same merchant, newer)."""
+    out = tmp_path_factory.mktemp("data")
+    for f in DATA_DIR.glob("*.json"):
+        (out / f.name).write_bytes(f.read_bytes())
+    rows = json.loads((DATA_DIR / "transactions.json").read_text(encoding="utf-8"))
+    duplicate = dict(
+        rows[0], transaction_id="t10001", timestamp="2026-02-21T23:00:00+05:30"
+    )
+    duplicate.update(amount=1.0, status="declined", decline_code="05")
+    (out / "transactions.json").write_text(
+        json.dumps(rows + [duplicate]), encoding="utf-8"
+    )
+    return out
+
+
+@pytest.fixture(scope="module")
+def stores(data_dir):
+    return (
+        PaymentsData.load_from_dir(data_dir, backend="rows"),
+        PaymentsData.load_from_dir(data_dir, backend="columnar"),
+    )
+
+
+def both(stores, call):
+    rows, columnar = stores
+    return asyncio.run(call(rows)), asyncio.run(call(columnar))
+
+
+def same(stores, call):
+    a, b = both(stores, call)
+    return a == b
+
+
+def test_backends_hold_the_same_rows(stores):
+    rows, columnar = stores
+    assert columnar.backend_name == "columnar"
+    assert columnar.transaction_count == rows.transaction_count
+    key = lambda t: (t.merchant_id.lower(), t.timestamp, t.transaction_id)  # noqa: E731
+    assert sorted(columnar.iter_transactions(), key=key) == sorted(
+        rows.iter_transactions(), key=key
+    )
+
+
+@pytest.mark.parametrize(
+    "transaction_id", ["T10001", "t10001", "T20009", "t400s09", "T50012"]
+)
+def test_lookup_by_id_returns_the_first_loaded_row(stores, transaction_id):
+    first, second = both(stores, lambda s: s.get_transaction(transaction_id))
+    assert first == second
+    if transaction_id.lower() == "t10001":
+        assert first.amount != 1.0  # the duplicate appended last is never returned
+
+
+def test_unknown_id_fails_the_same_way(stores):
+    for store in stores:
+        with pytest.raises(ValueError, match="not found"):
+            asyncio.run(store.get_transaction("T99999"))
+
+
+@pytest.mark.parametrize("merchant_id", MERCHANTS)
+@pytest.mark.parametrize(
+    "filters",
+    [{}, {"status": "declined"}, {"status": "approved"}, {"decline_code": "05"}],
+)
+def test_window_queries_match(stores, merchant_id, filters):
+    args = dict(merchant_id=merchant_id, start_time=START, end_time=END, **filters)
+    narrow = dict(args, start_time="2026-02-19T00:00:00+05:30")
+    assert same(stores, lambda s: s.list_transactions(**args))
+    assert same(stores, lambda s: s.list_transactions(**narrow))
+    assert same(stores, lambda s: s.summarize_transactions(**args))
+    assert same(stores, lambda s: s.list_transactions_page(offset=1, limit=3, **args))
+
+
+@pytest.mark.parametrize(
+    "strategy",
+    [
+        "declined_highest_risk",
+        "highest_risk",
+        "most_common_decline_code",
+        "recent_high_risk",
+    ],
+)
+@pytest.mark.parametrize("merchant_id", MERCHANTS[:5])
+def test_representative_pick_matches(stores, strategy, merchant_id):
+    assert same(
+        stores,
+        lambda s: s.pick_representative_transaction(
+            merchant_id, START, END, strategy=strategy, top_n=3
+        ),
+    )
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        {"merchant_id": "M200", "start_time": START, "end_time": END},
+        {"merchant_id": "M400", "start_time": START, "end_time": END, "limit": 2},
+        {
+            "merchant_id": "M100",
+            "start_time": START,
+            "end_time": END,
+            "status": "declined",
+        },
+        {"transaction_ids": ["T10001", "T20009", "T99999", "t20009"]},
+    ],
+)
+def test_batch_evaluation_matches(stores, query):
+    assert same(stores, lambda s: s.evaluate_transactions(**query))
+
+
+@pytest.mark.parametrize("merchant_id", MERCHANTS[:5])
+def test_rollups_match(stores, merchant_id):
+    assert same(
+        stores,
+        lambda s: s.merchant_summary(
+            merchant_id, ["1h", "24h", "48h", "30d"], as_of="2026-02-21T18:00:00+05:30"
+        ),
+    )
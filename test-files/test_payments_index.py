@@ -0,0 +1,102 @@
+# test_payments_index.py
+# Row backend (TransactionIndex) against the linear scans it replaced: same rows, same order.
+# Run from the project root:  python -m pytest -q test-files/test_payments_index.py
+import asyncio
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("TFY_API_KEY", "test")
+
+from src.agent.payments_data_model import (  # noqa: E402
+    PaymentsData,
+    Transaction,
+    TransactionIndex,
+)
+
+DATA_DIR = Path(__file__).resolve().parents[1] / "mastercard_agent_demo_data"
+ROWS = json.loads((DATA_DIR / "transactions.json").read_text(encoding="utf-8"))
+
+
+def with_edge_cases(rows):
+    """Demo rows plus same-timestamp ties, a mixed-case merchant ID and a duplicate ID."""
+    first = rows[0]
+    extra = [
+        dict(first, transaction_id="TIE1", timestamp=first["timestamp"]),
+        dict(first, transaction_id="TIE2", timestamp=first["timestamp"]),
+        dict(first, transaction_id="CASE1", merchant_id=first["merchant_id"].lower()),
+        dict(first, transaction_id=first["transaction_id"].lower(), amount=1.0),
+    ]
+    return [Transaction(**r) for r in rows + extra]
+
+
+TXNS = with_edge_cases(ROWS)
+INDEX = TransactionIndex(TXNS)
+
+
+def scan_get(transaction_id):
+    for t in TXNS:
+        if t.transaction_id.lower() == transaction_id.lower():
+            return t
+    return None
+
+
+def scan_window(merchant_id, start, end, status=None, decline_code=None):
+    out = []
+    for t in TXNS:
+        if t.merchant_id.lower() != merchant_id.lower():
+            continue
+        if not (start <= datetime.fromisoformat(t.timestamp) <= end):
+            continue
+        if status and t.status != status:
+            continue
+        if decline_code and t.decline_code != decline_code:
+            continue
+        out.append(t)
+    out.sort(key=lambda t: datetime.fromisoformat(t.timestamp), reverse=True)
+    return out
+
+
+@pytest.mark.parametrize(
+    "transaction_id", [r["transaction_id"] for r in ROWS] + ["t10001", "TIE2", "nope"]
+)
+def test_lookup_matches_the_scan(transaction_id):
+    assert INDEX.get(transaction_id) is scan_get(transaction_id)
+
+
+def test_every_row_is_indexed_once():
+    assert len(INDEX) == len(TXNS)
+    assert sorted(map(id, INDEX)) == sorted(map(id, TXNS))
+
+
+@pytest.mark.parametrize("merchant_id", ["M100", "m100", "M400", "M999"])
+@pytest.mark.parametrize(
+    "filters", [{}, {"status": "declined"}, {"decline_code": "05"}]
+)
+def test_windows_match_the_scan(merchant_id, filters):
+    times = sorted({datetime.fromisoformat(r["timestamp"]) for r in ROWS})
+    # bounds on, just inside and just outside row timestamps (both ends are inclusive)
+    one_s = timedelta(seconds=1)
+    bounds = [
+        (times[0], times[-1]),
+        (times[3], times[3]),
+        (times[3] + one_s, times[-4] - one_s),
+        (times[-1] + one_s, times[-1] + 2 * one_s),
+    ]
+    for start, end in bounds:
+        got = INDEX.window(merchant_id, start.timestamp(), end.timestamp(), **filters)
+        assert got == scan_window(merchant_id, start, end, **filters)
+
+
+def test_store_uses_the_index():
+    store = PaymentsData.load_from_dir(DATA_DIR)
+    assert store.backend_name == "rows"
+    found = asyncio.run(store.get_transaction("t10001"))
+    assert found.transaction_id == "T10001"
+    merchant = asyncio.run(store.get_merchant("m200"))
+    assert merchant.merchant_id == "M200"
@@ -0,0 +1,118 @@
+# test_payments_loader.py
+# Streaming loader vs PaymentsData.load_from_dir: same store at any chunk size, fast failure on bad JSON.
+# Run from the project root:  python -m pytest -q test-files/test_payments_loader.py
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("TFY_API_KEY", "test")
+
+from src.agent import payments_loader  # noqa: E402
+from src.agent.payments_data_model import PaymentsData  # noqa: E402
+from src.agent.payments_loader import (  # noqa: E402
+    iter_json_array,
+    load_from_dir_streaming,
+)
+
+DATA_DIR = Path(__file__).resolve().parents[1] / "mastercard_agent_demo_data"
+RECORDS = [
+    {"id": 1, "note": "café – \U0001f600", "ok": True, "score": -1.5e-3},
+    {"id": 2, "note": 'quote " and \\u escape', "ok": False, "score": None},
+    {"id": 3, "nested": {"list": [1, 2, {"x": "y"}]}, "ok": True},
+]
+
+
+def write_array(path, records, ensure_ascii):
+    items = [json.dumps(r, ensure_ascii=ensure_ascii) for r in records]
+    path.write_text("[\n  " + ",\n  ".join(items) + "\n]\n", encoding="utf-8")
+    return path
+
+
+def stores_equal(a, b):
+    return (
+        list(a.iter_transactions()) == list(b.iter_transactions())
+        and a.merchants == b.merchants
+        and a.chargebacks == b.chargebacks
+        and a.policies == b.policies
+    )
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 5, 7, 64, 1 << 20])
+@pytest.mark.parametrize("ensure_ascii", [True, False])
+def test_array_elements_survive_every_chunk_boundary(
+    tmp_path, chunk_size, ensure_ascii
+):
+    path = write_array(tmp_path / "rows.json", RECORDS, ensure_ascii)
+    items = list(iter_json_array(path, chunk_size=chunk_size))
+    assert [obj for obj, _ in items] == RECORDS
+    assert items[-1][1] <= path.stat().st_size
+    assert [n for _, n in items] == sorted(n for _, n in items)
+
+
+@pytest.mark.parametrize("backend", ["rows", "columnar"])
+def test_streaming_matches_the_eager_loader(backend):
+    eager = PaymentsData.load_from_dir(DATA_DIR, backend=backend)
+    streamed = load_from_dir_streaming(DATA_DIR, backend=backend, batch_size=7)
+    assert streamed.backend_name == backend
+    assert stores_equal(eager, streamed)
+
+
+def test_json_lines_files_are_preferred(tmp_path):
+    for name in ("merchants", "policies_kb"):
+        (tmp_path / f"{name}.json").write_bytes(
+            (DATA_DIR / f"{name}.json").read_bytes()
+        )
+    for name in ("transactions", "chargebacks"):
+        rows = json.loads((DATA_DIR / f"{name}.json").read_text(encoding="utf-8"))
+        lines = "\n".join(json.dumps(r) for r in rows) + "\n\n"
+        (tmp_path / f"{name}.jsonl").write_text(lines, encoding="utf-8")
+    progress = []
+    streamed = load_from_dir_streaming(tmp_path, progress=progress.append)
+    assert stores_equal(PaymentsData.load_from_dir(DATA_DIR), streamed)
+    assert {p.file for p in progress if p.done} == {
+        "transactions.jsonl",
+        "chargebacks.jsonl",
+    }
+
+
+@pytest.mark.parametrize(
+    "text, error",
+    [
+        ('{"id": 1}', "expected a JSON array"),
+        ("[1, 2]", "must be JSON objects"),
+        ('[{"id": 1}, {"id": 2}', "unterminated JSON array"),
+        ('[{"id": 1}, {"id": ', "malformed JSON"),
+        ('[{"id": 1}, {"id": x}, {"id": 3}]', "malformed JSON near byte 19"),
+    ],
+)
+def test_malformed_input_raises_value_error(tmp_path, text, error):
+    path = tmp_path / "bad.json"
+    path.write_text(text, encoding="utf-8")
+    with pytest.raises(ValueError, match=error):
+        list(iter_json_array(path, chunk_size=4))
+
+
+def test_malformed_element_fails_without_reading_the_rest(tmp_path, monkeypatch):
+    path = tmp_path / "bad.json"
+    tail = ", ".join(json.dumps(r) for r in RECORDS * 2000)
+    path.write_text('[{"id": 1}, {"id": tru, "x": 1}, ' + tail + "]", encoding="utf-8")
+    reads = []
+    read = payments_loader._Reader.read
+    monkeypatch.setattr(
+        payments_loader._Reader, "read", lambda self: reads.append(1) or read(self)
+    )
+    with pytest.raises(ValueError, match="malformed JSON"):
+        list(iter_json_array(path, chunk_size=64))
+    assert len(reads) < 5
+
+
+def test_oversized_element_is_rejected(tmp_path, monkeypatch):
+    monkeypatch.setattr(payments_loader, "MAX_RECORD_CHARS", 100)
+    path = tmp_path / "big.json"
+    path.write_text('[{"note": "' + "x" * 1000 + '"}]', encoding="utf-8")
+    with pytest.raises(ValueError, match="exceeds 100 characters"):
+        list(iter_json_array(path, chunk_size=16))
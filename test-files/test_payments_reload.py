@@ -0,0 +1,121 @@
+# test_payments_reload.py
+# PaymentsStoreHolder: swaps only on changed data, keeps the old store on failure, notifies listeners.
+# Run from the project root:  python -m pytest -q test-files/test_payments_reload.py
+import asyncio
+import json
+import os
+import sys
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("TFY_API_KEY", "test")
+
+from src.agent.payments_data_model import PaymentsData  # noqa: E402
+from src.agent.payments_reload import PaymentsStoreHolder  # noqa: E402
+
+DATA_DIR = Path(__file__).resolve().parents[1] / "mastercard_agent_demo_data"
+
+
+def copy_data(tmp_path):
+    for f in DATA_DIR.glob("*.json"):
+        (tmp_path / f.name).write_bytes(f.read_bytes())
+    return tmp_path
+
+
+def set_policies_version(data_dir, version):
+    path = data_dir / "policies_kb.json"
+    policies = json.loads(path.read_text(encoding="utf-8"))
+    policies["version"] = version
+    path.write_text(json.dumps(policies), encoding="utf-8")
+
+
+def make_holder(data_dir):
+    return PaymentsStoreHolder(
+        loader=lambda: PaymentsData.load_from_dir(data_dir), data_dir=lambda: data_dir
+    )
+
+
+def test_reload_swaps_only_when_the_data_changed(tmp_path):
+    data_dir = copy_data(tmp_path)
+    holder = make_holder(data_dir)
+    seen = []
+    holder.add_listener(lambda store, version: seen.append((store, version)))
+    old = holder.current
+
+    assert holder.reload() == {"status": "unchanged", "version": 1}
+    assert not holder.changed()
+
+    set_policies_version(data_dir, "reloaded")
+    assert holder.changed()
+    result = holder.reload()
+    assert result["status"] == "reloaded" and result["version"] == 2
+    assert holder.current is not old
+    assert holder.current.policies.version == "reloaded"
+    assert seen == [(holder.current, 2)]
+    assert holder.status()["version"] == 2
+
+    assert holder.reload(force=True)["version"] == 3
+
+
+def test_failed_reload_keeps_the_old_store(tmp_path):
+    data_dir = copy_data(tmp_path)
+    holder = make_holder(data_dir)
+    old = holder.current
+    (data_dir / "transactions.json").write_text("[{", encoding="utf-8")
+
+    result = holder.reload()
+    assert result["status"] == "error" and result["version"] == 1
+    assert holder.current is old
+    assert holder.status()["last_error"]
+
+    # the failed fingerprint was not recorded: fixing the file reloads
+    (data_dir / "transactions.json").write_bytes(
+        (DATA_DIR / "transactions.json").read_bytes()
+    )
+    set_policies_version(data_dir, "fixed")
+    assert holder.reload()["status"] == "reloaded"
+    assert holder.status()["last_error"] is None
+
+
+def test_concurrent_reload_is_reported_in_progress(tmp_path):
+    data_dir = copy_data(tmp_path)
+    release = threading.Event()
+    release.set()
+
+    def slow_loader():
+        release.wait(5)
+        return PaymentsData.load_from_dir(data_dir)
+
+    holder = PaymentsStoreHolder(loader=slow_loader, data_dir=lambda: data_dir)
+    release.clear()
+    first = threading.Thread(target=holder.reload, kwargs={"force": True})
+    first.start()
+    while not holder.status()["reloading"]:
+        pass
+    assert holder.reload(force=True)["status"] == "in_progress"
+    release.set()
+    first.join(5)
+    assert holder.version == 2
+
+
+def test_watcher_reloads_changed_data(tmp_path):
+    data_dir = copy_data(tmp_path)
+    holder = make_holder(data_dir)
+
+    async def scenario():
+        holder.start_watcher(interval_s=0.02)
+        # calls in flight keep the store they started with
+        before = holder.current
+        set_policies_version(data_dir, "watched")
+        for _ in range(200):
+            if holder.version == 2:
+                break
+            await asyncio.sleep(0.01)
+        await holder.stop_watcher()
+        return before
+
+    before = asyncio.run(scenario())
+    assert holder.version == 2
+    assert before.policies.version != "watched"
+    assert holder.current.policies.version == "watched"
@@ -0,0 +1,86 @@
+# test_payments_snapshot.py
+# Binary snapshot: round trip against the JSON loader, atomic publish and generation cleanup.
+# Run from the project root:  python -m pytest -q test-files/test_payments_snapshot.py
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("TFY_API_KEY", "test")
+
+from src.agent.payments_data_model import PaymentsData  # noqa: E402
+from src.agent.payments_snapshot import (  # noqa: E402
+    build_snapshot,
+    ensure_snapshot,
+    is_fresh,
+    load_snapshot,
+    write_snapshot,
+)
+
+DATA_DIR = Path(__file__).resolve().parents[1] / "mastercard_agent_demo_data"
+
+
+def generations(snap):
+    return sorted(p.name for p in snap.parent.glob(f".{snap.name}.gen-*"))
+
+
+def test_snapshot_round_trip_matches_the_json_store(tmp_path):
+    rows = PaymentsData.load_from_dir(DATA_DIR)
+    snap = build_snapshot(DATA_DIR, tmp_path / "snap")
+    loaded = load_snapshot(snap)
+    assert loaded.backend_name == "columnar"
+    assert loaded.transaction_count == rows.transaction_count
+    assert list(loaded.iter_transactions()) == list(rows.iter_transactions())
+    assert loaded.merchants == rows.merchants
+    assert loaded.chargebacks == rows.chargebacks
+    assert loaded.policies == rows.policies
+
+
+def test_publish_swaps_the_link_and_keeps_one_previous_generation(tmp_path):
+    store = PaymentsData.load_from_dir(DATA_DIR)
+    snap = tmp_path / "snap"
+    write_snapshot(store, snap)
+    first = snap.resolve()
+    reader = load_snapshot(snap)  # opened before the next publish
+
+    write_snapshot(store, snap)
+    second = snap.resolve()
+    assert snap.is_symlink() and second != first
+    assert first.exists()  # kept for readers still opening it
+    assert reader.transaction_count == store.transaction_count
+
+    write_snapshot(store, snap)
+    assert not first.exists()
+    assert generations(snap) == sorted([second.name, snap.resolve().name])
+
+
+def test_legacy_directory_is_kept_with_a_relative_out_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    legacy = Path("snap")
+    legacy.mkdir()
+    (legacy / "header.json").write_text("{}", encoding="utf-8")
+
+    write_snapshot(PaymentsData.load_from_dir(DATA_DIR), "snap")
+    assert legacy.is_symlink()
+    kept = [g for g in generations(tmp_path / "snap") if ".gen-0-" in g]
+    assert len(kept) == 1
+    assert (tmp_path / kept[0] / "header.json").exists()
+
+
+def test_ensure_snapshot_rebuilds_only_when_stale(tmp_path):
+    data = tmp_path / "data"
+    data.mkdir()
+    for f in DATA_DIR.glob("*.json"):
+        (data / f.name).write_bytes(f.read_bytes())
+    snap = tmp_path / "snap"
+
+    ensure_snapshot(data, snap)
+    built = snap.resolve()
+    ensure_snapshot(data, snap)
+    assert snap.resolve() == built
+
+    merchants = data / "merchants.json"
+    merchants.write_text(merchants.read_text(encoding="utf-8") + "\n", encoding="utf-8")
+    assert not is_fresh(snap, data)
+    ensure_snapshot(data, snap)
+    assert snap.resolve() != built and is_fresh(snap, data)
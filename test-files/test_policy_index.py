@@ -0,0 +1,158 @@
+# test_policy_index.py
+# PolicyIndex: precomputed BM25 impacts score like textbook BM25, with and without numpy.
+# Run from the project root:  python -m pytest -q test-files/test_policy_index.py
+import asyncio
+import math
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("TFY_API_KEY", "test")
+
+from src.agent import policy_index  # noqa: E402
+from src.agent.payments_data_model import PaymentsData  # noqa: E402
+from src.agent.policy_index import (  # noqa: E402
+    FIELD_WEIGHTS,
+    PolicyIndex,
+    snippet_fields,
+    tokenize,
+)
+
+DATA_DIR = Path(__file__).resolve().parents[1] / "mastercard_agent_demo_data"
+
+SNIPPETS = [
+    {
+        "id": "KB-DECLINES",
+        "title": "Handling decline spikes",
+        "tags": ["decline_spike", "05"],
+        "content": ["Declines with code 05 usually come from the issuer."],
+    },
+    {
+        "id": "KB-3DS",
+        "title": "Step-up authentication",
+        "tags": ["3ds", "risk"],
+        "content": ["Use 3DS step-up when risk is high.", "Policies apply to all."],
+    },
+    {
+        "id": "KB-CHARGEBACKS",
+        "title": "Chargeback remediation",
+        "tags": ["chargeback"],
+        "content": ["Chargebacks above the threshold need a remediation plan."],
+    },
+    {
+        "id": "KB-ISSUER",
+        "title": "Issuer outages",
+        "tags": ["issuer", "routing"],
+        "content": ["An issuer outage shows as a decline spike; reroute traffic."],
+    },
+    {"id": "KB-EMPTY", "title": "", "tags": [], "content": []},
+]
+
+QUERIES = [
+    "decline spike",
+    "Why are declines with code 05 spiking?",
+    "issuer routing",
+    "chargeback remediation policies",
+    "3DS step up risk",
+    "the and of",
+    "nothing matches this",
+    "",
+]
+
+
+def reference_scores(snippets, query, k1=1.2, b=0.75):
+    """Textbook BM25 over the same weighted bags, recomputed for every query."""
+    bags = []
+    for snip in snippets:
+        tf = {}
+        for field, text in snippet_fields(snip).items():
+            for tok in tokenize(text):
+                tf[tok] = tf.get(tok, 0.0) + FIELD_WEIGHTS[field]
+        bags.append(tf)
+    n = len(bags)
+    avgdl = sum(sum(tf.values()) for tf in bags) / n
+    scores = {}
+    for doc, tf in enumerate(bags):
+        dl = sum(tf.values())
+        score = 0.0
+        for tok in set(tokenize(query)):
+            if tok not in tf:
+                continue
+            df = sum(1 for other in bags if tok in other)
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            score += (
+                idf * tf[tok] * (k1 + 1) / (tf[tok] + k1 * (1 - b + b * dl / avgdl))
+            )
+        if score:
+            scores[doc] = score
+    return sorted(scores.items(), key=lambda kv: (-kv[1], kv[0]))
+
+
+def test_tokenize_folds_plurals_and_drops_stopwords():
+    assert tokenize("Why are the Declines and Policies spiking?") == [
+        "decline",
+        "policy",
+        "spiking",
+    ]
+    assert tokenize("access class bus") == ["access", "class", "bus"]
+    assert tokenize("what is it", keep={"what"}) == ["what"]
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+@pytest.mark.parametrize("query", QUERIES)
+def test_scores_match_textbook_bm25(monkeypatch, use_numpy, query):
+    if not use_numpy:
+        monkeypatch.setattr(policy_index, "np", None)
+    index = PolicyIndex(SNIPPETS)
+    got = index.search(query, top_k=len(SNIPPETS))
+    expected = reference_scores(SNIPPETS, query)
+    assert [doc for doc, _ in got] == [doc for doc, _ in expected]
+    for (_, a), (_, b) in zip(got, expected):
+        assert a == pytest.approx(b)
+    assert all(isinstance(doc, int) for doc, _ in got)
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_top_k_keeps_the_best_hits(monkeypatch, use_numpy):
+    if not use_numpy:
+        monkeypatch.setattr(policy_index, "np", None)
+    index = PolicyIndex(SNIPPETS)
+    query = "decline spike issuer chargeback"
+    full = index.search(query, top_k=len(SNIPPETS))
+    assert len(full) == 3
+    for k in range(len(SNIPPETS) + 1):
+        assert index.search(query, top_k=k) == full[:k]
+
+
+def test_ties_keep_kb_order():
+    twins = [{"id": f"KB-{i}", "content": ["refund window"]} for i in range(4)]
+    index = PolicyIndex(twins)
+    assert [doc for doc, _ in index.search("refund", top_k=3)] == [0, 1, 2]
+
+
+def test_empty_kb():
+    index = PolicyIndex([])
+    assert len(index) == 0
+    assert index.search("decline") == []
+
+
+def test_store_lookup_ranks_the_demo_kb():
+    store = PaymentsData.load_from_dir(DATA_DIR)
+
+    async def scenario():
+        return (
+            await store.lookup_internal_policy("spike in decline code 05", top_k=2),
+            await store.lookup_internal_policy("chargeback remediation plan"),
+            await store.lookup_internal_policy("3DS step-up", top_k=1),
+        )
+
+    declines, chargebacks, step_up = asyncio.run(scenario())
+    assert declines["results"][0]["id"] == "KB-DECLINE-SPIKE-DO-NOT-HONOR"
+    assert len(declines["results"]) <= 2
+    assert chargebacks["results"][0]["id"] == "KB-CHARGEBACK-REMEDIATION"
+    assert [r["id"] for r in step_up["results"]] == ["KB-3DS-STEPUP"]
+    scores = [r["score"] for r in chargebacks["results"]]
+    assert scores == sorted(scores, reverse=True)
@@ -0,0 +1,156 @@
+# test_policy_rules.py
+# Rule compiler (policies_kb.json `rules`) and the router's escalation decision built on it.
+# Run from the project root:  python -m pytest -q test-files/test_policy_rules.py
+import copy
+import json
+import os
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("TFY_API_KEY", "test")
+
+from src.agent.payments_data_model import (  # noqa: E402
+    MerchantProfile,
+    PaymentsPolicyKB,
+    Transaction,
+)
+from src.agent.policy_rules import compile_rules  # noqa: E402
+
+KB_PATH = (
+    Path(__file__).resolve().parents[1]
+    / "mastercard_agent_demo_data"
+    / "policies_kb.json"
+)
+KB = json.loads(KB_PATH.read_text(encoding="utf-8"))
+TXN_FIELDS = tuple(Transaction.model_fields)
+MERCHANT_FIELDS = tuple(MerchantProfile.model_fields)
+
+
+def compile_kb(kb=KB):
+    return compile_rules(PaymentsPolicyKB(**kb), TXN_FIELDS, MERCHANT_FIELDS)
+
+
+def txn(**overrides):
+    row = {f: None for f in TXN_FIELDS}
+    row.update(
+        status="approved",
+        three_ds_result="Y",
+        avs_result="Y",
+        cvv_result="M",
+        risk_score=0.1,
+        channel="ecom",
+    )
+    row.update(overrides)
+    return SimpleNamespace(**row)
+
+
+@pytest.mark.parametrize(
+    "overrides",
+    [
+        {"three_ds_result": "FAILED"},
+        {"three_ds_result": "NOT_ENROLLED", "channel": "pos"},
+        {"three_ds_result": None},
+        {"avs_result": "N"},
+        {"avs_result": "U"},
+        {"cvv_result": None},
+    ],
+)
+def test_weak_authentication_matches_the_escalation_policy(overrides):
+    assert compile_kb().weak_auth(txn(**overrides))
+
+
+def test_strong_authentication_is_not_weak():
+    assert not compile_kb().weak_auth(txn())
+    assert compile_kb().weak_auth_fields == {
+        "three_ds_result",
+        "avs_result",
+        "cvv_result",
+    }
+
+
+def test_declined_signal_message_uses_row_fields_and_defaults():
+    rules = compile_kb()
+    declined = txn(status="declined", decline_code="05", decline_reason="Do not honor")
+    assert rules.describe_signals(declined)[0] == "Declined: 05 (Do not honor)"
+    bare = txn(status="declined", decline_code="", decline_reason=None)
+    assert rules.describe_signals(bare)[0] == "Declined: UNKNOWN (No reason provided)"
+    assert rules.describe_signals(txn(avs_result="N")) == [
+        rules.signal_labels["avs_not_strong"]
+    ]
+
+
+def test_built_in_defaults_match_the_kb():
+    kb = copy.deepcopy(KB)
+    del kb["rules"]["signals"], kb["rules"]["weak_authentication"]
+    rules, defaults = compile_kb(), compile_kb(kb)
+    for row in (
+        txn(),
+        txn(three_ds_result="NOT_ENROLLED"),
+        txn(status="declined", decline_code="51"),
+    ):
+        assert defaults.weak_auth(row) == rules.weak_auth(row)
+        assert defaults.describe_signals(row) == rules.describe_signals(row)
+
+
+@pytest.mark.parametrize(
+    "section, spec, error",
+    [
+        (
+            "signals",
+            {"id": "x", "field": "nope", "in": [1]},
+            r"rules.signals\[x\].*nope",
+        ),
+        (
+            "signals",
+            {"id": "x", "field": "status", "in": ["declined"], "message": "{missing}"},
+            r"rules.signals\[x\].*missing",
+        ),
+        ("signals", {"id": "x", "field": "status"}, r"needs 'in'"),
+        (
+            "weak_authentication",
+            {"id": "w", "field": "avs_result", "in": ["N"], "when": {"nope": ["x"]}},
+            r"rules.weak_authentication\[w\].*nope",
+        ),
+    ],
+)
+def test_bad_rules_fail_at_compile_time(section, spec, error):
+    kb = copy.deepcopy(KB)
+    kb["rules"][section] = [spec]
+    with pytest.raises(ValueError, match=error):
+        compile_kb(kb)
+
+
+def test_empty_weak_authentication_is_rejected():
+    kb = copy.deepcopy(KB)
+    kb["rules"]["weak_authentication"] = []
+    with pytest.raises(ValueError, match="weak_authentication"):
+        compile_kb(kb)
+
+
+@pytest.mark.parametrize(
+    "risk_band, txn_fields, escalate",
+    [
+        (
+            "High",
+            {"risk_score": 0.9, "three_ds_result": "NOT_ENROLLED", "channel": "pos"},
+            True,
+        ),
+        ("High", {"risk_score": 0.9, "avs_result": "U"}, True),
+        ("High", {"risk_score": 0.9}, False),
+        # a risk_score at the high threshold counts even when the band is not High
+        ("Low", {"risk_score": 0.85, "cvv_result": "N"}, True),
+        ("Low", {"risk_score": 0.2, "three_ds_result": "FAILED"}, False),
+    ],
+)
+def test_router_escalates_high_risk_with_weak_authentication(
+    risk_band, txn_fields, escalate
+):
+    from src.agent.router import needs_escalation
+
+    row = {"three_ds_result": "Y", "avs_result": "Y", "cvv_result": "M", **txn_fields}
+    result = {"risk_band": risk_band, "transaction": row}
+    assert needs_escalation("analyze_transaction", result) is escalate
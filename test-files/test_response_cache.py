@@ -0,0 +1,63 @@
+# test_response_cache.py
+# ResponseCache keys: questions that differ only in what they ask must not share an answer.
+# Run from the project root:  python -m pytest -q test-files/test_response_cache.py
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.agent.payments_reload import PaymentsStoreHolder
+from src.agent.response_cache import ResponseCache, normalize_question, question_tokens
+
+
+def make_cache() -> ResponseCache:
+    return ResponseCache(PaymentsStoreHolder(data_dir=None), tools={})
+
+
+def test_normalization_keeps_interrogatives():
+    assert (
+        normalize_question("  Why was T10005   declined?? ")
+        == "why was t10005 declined"
+    )
+    assert normalize_question("Why was T10005 declined?") != normalize_question(
+        "When was T10005 declined?"
+    )
+    assert {"why", "was"} <= question_tokens("Why was T10005 declined?")
+
+
+def test_interrogative_variants_do_not_share_an_entry():
+    async def scenario():
+        cache = make_cache()
+        assert await cache.store(
+            "Why was T10005 declined?", "Insufficient funds (51).", []
+        )
+        hit = await cache.lookup("why was  T10005 declined")
+        when = await cache.lookup("When was T10005 declined?")
+        who = await cache.lookup("Who declined T10005?")
+        return cache, hit, when, who
+
+    cache, hit, when, who = asyncio.run(scenario())
+    assert hit == "Insufficient funds (51)."
+    assert when is None
+    assert who is None
+    assert cache.snapshot()["hits"] == 1
+
+
+def test_near_duplicate_needs_the_same_question_words():
+    async def scenario():
+        cache = make_cache()
+        await cache.store(
+            "Why was transaction T10005 declined by the issuer?",
+            "Insufficient funds (51).",
+            [],
+        )
+        near = await cache.lookup("Why was transaction T10005 declined by issuer?")
+        other = await cache.lookup(
+            "When was transaction T10005 declined by the issuer?"
+        )
+        return near, other
+
+    near, other = asyncio.run(scenario())
+    assert near == "Insufficient funds (51)."
+    assert other is None
@@ -0,0 +1,72 @@
+# test_result_memo.py
+# Memoized store methods: time-relative results are keyed by their window, callers get their own copies.
+# Run from the project root:  python -m pytest -q test-files/test_result_memo.py
+import asyncio
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("TFY_API_KEY", "test")
+
+from src.agent import payments_data_model  # noqa: E402
+from src.agent.payments_data_model import PaymentsData  # noqa: E402
+
+DATA_DIR = Path(__file__).resolve().parents[1] / "mastercard_agent_demo_data"
+
+
+def epoch(iso):
+    return datetime.fromisoformat(iso).timestamp()
+
+
+def test_compliance_is_memoized_per_as_of_minute(monkeypatch):
+    store = PaymentsData.load_from_dir(DATA_DIR)
+    # CB20001 (M200) was received 2026-02-09T10:30 and leaves the 30-day window at 2026-03-11T10:30
+    clock = iter(
+        epoch(t)
+        for t in (
+            "2026-03-11T10:29:10+05:30",
+            "2026-03-11T10:29:50+05:30",
+            "2026-03-11T10:31:30+05:30",
+        )
+    )
+    monkeypatch.setattr(payments_data_model.time, "time", lambda: next(clock))
+
+    async def scenario():
+        return [await store.check_merchant_compliance("M200") for _ in range(3)]
+
+    before, same_minute, later = asyncio.run(scenario())
+    assert same_minute == before
+    assert later["chargebacks"]["last_30d"] != before["chargebacks"]["last_30d"]
+    for result, as_of in ((before, "10:29"), (later, "10:31")):
+        expected = store.rollups.summary(
+            "M200", ["30d"], epoch(f"2026-03-11T{as_of}:00+05:30")
+        )["30d"]["chargebacks"]
+        assert result["chargebacks"]["last_30d"] == expected
+    stats = store.memo_stats()["by_method"]["check_merchant_compliance"]
+    assert stats == {"hits": 1, "misses": 2}
+
+
+def test_callers_get_their_own_copy():
+    store = PaymentsData.load_from_dir(DATA_DIR)
+
+    async def scenario():
+        first = await store.evaluate_transaction("T20009")
+        first["signals"].append("edited by the caller")
+        first["risk_band"] = "edited"
+        compliance = await store.check_merchant_compliance("M200")
+        compliance["thresholds"].clear()
+        return (
+            first,
+            await store.evaluate_transaction("T20009"),
+            await store.check_merchant_compliance("M200"),
+            await store.evaluate_transaction("T20009", as_json=True),
+        )
+
+    first, second, compliance, payload = asyncio.run(scenario())
+    assert second["risk_band"] != "edited"
+    assert "edited by the caller" not in second["signals"]
+    assert compliance["thresholds"]
+    assert "edited" not in payload
+    assert store.memo_stats()["hits"] == 3
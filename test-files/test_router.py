@@ -0,0 +1,132 @@
+# test_router.py
+# Rule router: which requests take the fast path, and when the fast path hands over to the agent.
+# The LLM and the ReAct agent are local stand-ins that record their calls.
+# Run from the project root:  python -m pytest -q test-files/test_router.py
+import asyncio
+import os
+import sys
+import uuid
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("TFY_API_KEY", "test")
+
+from langchain_core.messages import AIMessage, ToolMessage  # noqa: E402
+from langgraph.checkpoint.memory import MemorySaver  # noqa: E402
+
+from src.agent import router  # noqa: E402
+from src.agent.router import (  # noqa: E402
+    PHRASE_PROMPT,
+    RouterStats,
+    build_routed_agent,
+    detect_intent,
+)
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("Analyze transaction T10001", ("analyze_transaction", "T10001")),
+        ("why was t20009 declined?", ("analyze_transaction", "T20009")),
+        ("Can you look into T400S09 for me", ("analyze_transaction", "T400S09")),
+        ("Check merchant m200 compliance", ("merchant_compliance", "M200")),
+        ("What is the monitoring status of M300?", ("merchant_compliance", "M300")),
+        ("Check T10001 and T10002", None),
+        ("Check T10001 for merchant M100", None),
+        ("Analyze merchant M200", None),
+        ("Tell me about T10001", None),
+        ("Should we escalate T10001?", None),
+        ("Which policy covers M200 compliance?", None),
+        ("Investigate the decline spike at M400", None),
+        ("Check compliance for M100 over the last 30 days", None),
+        ("Hello", None),
+    ],
+)
+def test_detect_intent(text, expected):
+    intent = detect_intent(text)
+    if expected is None:
+        assert intent is None
+    else:
+        assert (intent["intent"], intent["id"]) == expected
+
+
+class RecordingLLM:
+    def __init__(self):
+        self.calls = []
+
+    async def ainvoke(self, messages, config=None):
+        self.calls.append(messages)
+        return AIMessage(content="phrased answer")
+
+
+class RecordingAgent:
+    def __init__(self):
+        self.calls = []
+
+    async def ainvoke(self, state, config=None):
+        self.calls.append(state["messages"])
+        return {"messages": state["messages"] + [AIMessage(content="agent answer")]}
+
+
+@pytest.fixture
+def routed(monkeypatch):
+    monkeypatch.setattr(router, "ROUTER_STATS", RouterStats())
+    monkeypatch.setenv("AGENT_FAST_PATH", "1")
+    llm, agent = RecordingLLM(), RecordingAgent()
+    app = build_routed_agent(agent, llm, checkpointer=MemorySaver())
+
+    def ask(text):
+        config = {"configurable": {"thread_id": str(uuid.uuid4())}}
+        result = asyncio.run(app.ainvoke({"messages": [("user", text)]}, config))
+        return result["messages"]
+
+    return SimpleNamespace(ask=ask, llm=llm, agent=agent)
+
+
+def test_canned_request_skips_the_agent(routed):
+    messages = routed.ask("Analyze transaction T10001")
+    assert routed.agent.calls == []
+    assert len(routed.llm.calls) == 1
+    assert routed.llm.calls[0][0].content == PHRASE_PROMPT
+    call, tool_msg, answer = messages[-3:]
+    assert call.tool_calls[0]["name"] == "analyze_transaction"
+    assert call.tool_calls[0]["args"] == {"transaction_id": "T10001"}
+    assert isinstance(tool_msg, ToolMessage)
+    assert tool_msg.tool_call_id == call.tool_calls[0]["id"]
+    assert answer.content == "phrased answer"
+    stats = router.ROUTER_STATS.snapshot()
+    assert (stats["requests"], stats["fast_path"], stats["handoffs"]) == (1, 1, 0)
+
+
+@pytest.mark.parametrize(
+    "text", ["Check merchant M300 compliance", "Analyze transaction T30001"]
+)
+def test_escalation_hands_over_with_the_tool_result(routed, text):
+    messages = routed.ask(text)
+    assert routed.llm.calls == []
+    (seen,) = routed.agent.calls
+    assert isinstance(seen[-1], ToolMessage)
+    assert seen[-2].tool_calls[0]["id"] == seen[-1].tool_call_id
+    assert messages[-1].content == "agent answer"
+    stats = router.ROUTER_STATS.snapshot()
+    assert (stats["fast_path"], stats["handoffs"]) == (0, 1)
+
+
+def test_unknown_id_is_answered_without_an_llm_call(routed):
+    messages = routed.ask("Analyze transaction T99999")
+    assert routed.llm.calls == [] and routed.agent.calls == []
+    assert messages[-2].status == "error"
+    assert messages[-1].content.startswith("I could not find that record")
+
+
+def test_other_requests_go_to_the_agent(routed, monkeypatch):
+    routed.ask("Should we escalate T10001?")
+    monkeypatch.setenv("AGENT_FAST_PATH", "0")
+    routed.ask("Analyze transaction T10001")
+    assert len(routed.agent.calls) == 2
+    assert routed.llm.calls == []
+    stats = router.ROUTER_STATS.snapshot()
+    assert (stats["requests"], stats["fast_path"], stats["by_intent"]) == (2, 0, {})
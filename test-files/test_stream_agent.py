@@ -0,0 +1,137 @@
+# test_stream_agent.py
+# stream_agent follows run_agent's contract: coalescing on new threads, fast-path answers only in the
+# final event, and only the ReAct agent's model tokens streamed. The LLM is a local stand-in.
+# Run from the project root:  python -m pytest -q test-files/test_stream_agent.py
+import asyncio
+import os
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("TFY_API_KEY", "test")
+
+from langchain_core.language_models import BaseChatModel  # noqa: E402
+from langchain_core.messages import (  # noqa: E402
+    AIMessage,
+    AIMessageChunk,
+    SystemMessage,
+)
+from langchain_core.outputs import (  # noqa: E402
+    ChatGeneration,
+    ChatGenerationChunk,
+    ChatResult,
+)
+from langgraph.checkpoint.memory import MemorySaver  # noqa: E402
+
+from src.agent import graph  # noqa: E402
+from src.agent.router import PHRASE_PROMPT  # noqa: E402
+from src.agent.singleflight import SingleFlight  # noqa: E402
+
+
+class WordStreamModel(BaseChatModel):
+    """Answers without tools, streamed word by word; the router's phrasing call gets its own answer."""
+
+    @property
+    def _llm_type(self) -> str:
+        return "word-stream-fake"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _reply(self, messages):
+        first = messages[0]
+        if isinstance(first, SystemMessage) and first.content == PHRASE_PROMPT:
+            return "phrased fast path answer"
+        return "answer from the agent"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        message = AIMessage(content=self._reply(messages))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        words = self._reply(messages).split(" ")
+        for i, word in enumerate(words):
+            text = word if i == len(words) - 1 else word + " "
+            yield ChatGenerationChunk(message=AIMessageChunk(content=text))
+
+
+@pytest.fixture
+def agent(monkeypatch):
+    monkeypatch.setattr(
+        graph, "AGENT", graph.build_agent(WordStreamModel(), checkpointer=MemorySaver())
+    )
+    monkeypatch.setattr(graph, "RESPONSE_CACHE", None)
+    monkeypatch.setattr(graph, "AGENT_COALESCER", SingleFlight())
+    monkeypatch.setenv("AGENT_FAST_PATH", "1")
+
+
+def collect(*questions):
+    async def one(question):
+        thread_id = str(uuid.uuid4())
+        return [event async for event in graph.stream_agent(thread_id, question)]
+
+    async def scenario():
+        return await asyncio.gather(*(one(q) for q in questions))
+
+    return asyncio.run(scenario())
+
+
+def tokens(events):
+    return "".join(e["content"] for e in events if e["type"] == "token")
+
+
+def test_agent_tokens_are_streamed(agent):
+    (events,) = collect("Hello, what can you do?")
+    assert tokens(events) == "answer from the agent"
+    assert len([e for e in events if e["type"] == "token"]) == 4
+    assert events[-1] == {
+        "type": "final",
+        "response": "answer from the agent",
+        "cached": False,
+        "coalesced": False,
+    }
+
+
+def test_fast_path_phrasing_is_not_streamed_as_agent_tokens(agent):
+    (events,) = collect("Analyze transaction T10001")
+    assert tokens(events) == ""
+    assert [e["type"] for e in events] == ["tool_start", "tool_end", "final"]
+    assert events[0]["name"] == "analyze_transaction"
+    assert events[-1]["response"] == "phrased fast path answer"
+
+
+def test_identical_streams_on_new_threads_share_one_run(agent, monkeypatch):
+    runs = []
+
+    async def fake_stream_run(config, user_input, emit):
+        runs.append(user_input)
+        for word in ("shared ", "answer"):
+            emit({"type": "token", "content": word})
+            await asyncio.sleep(0.02)
+        return "shared answer"
+
+    monkeypatch.setattr(graph, "_stream_run", fake_stream_run)
+    leader, follower = collect("Why was T10005 declined?", "why was T10005  declined")
+    assert len(runs) == 1
+    finals = [leader[-1], follower[-1]]
+    assert {e["response"] for e in finals} == {"shared answer"}
+    assert sorted(e["coalesced"] for e in finals) == [False, True]
+    # the follower gets the whole answer as one token, the leader as it was generated
+    streamed = sorted(
+        len([e for e in s if e["type"] == "token"]) for s in (leader, follower)
+    )
+    assert streamed == [1, 2]
+    assert tokens(leader) == tokens(follower) == "shared answer"
+
+
+def test_a_failed_run_ends_with_an_error_event(agent, monkeypatch):
+    async def failing_stream_run(config, user_input, emit):
+        emit({"type": "token", "content": "partial"})
+        raise RuntimeError("gateway down")
+
+    monkeypatch.setattr(graph, "_stream_run", failing_stream_run)
+    (events,) = collect("Hello?")
+    assert events[-1] == {"type": "error", "message": "An internal error has occurred."}